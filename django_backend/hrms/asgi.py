@@ -2,6 +2,9 @@
 ASGI config for hrms project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Long-lived streams such as ``/api/presence/stream/`` need this application,
+e.g. ``uvicorn hrms.asgi:application``. It also serves check-ins, the
+current status and the auth status with async views (see hrms.asgi_urls).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -0,0 +1,15 @@
+"""URL configuration of the ASGI application.
+
+AsyncRoutesMiddleware resolves ASGI requests here: the check-in and
+status paths go to their async views, everything else as in hrms.urls.
+"""
+from django.urls import include, path
+
+from timekeeping.urls import async_urlpatterns
+
+from .urls import urlpatterns as wsgi_urlpatterns
+
+urlpatterns = [
+    path('api/', include(async_urlpatterns)),
+    *wsgi_urlpatterns,
+]
@@ -22,6 +22,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'timekeeping.middleware.RequestMetricsMiddleware',
+    'timekeeping.middleware.ReplicaPinMiddleware',
+    'timekeeping.middleware.AsyncRoutesMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -56,9 +59,37 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'hrms.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when a transaction starts so concurrent
+            # check-ins queue up instead of failing with "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # A file-backed test database, so concurrency tests see real locking
+        'TEST': {
+            'NAME': BASE_DIR / 'test_hrms.sqlite3',
+        },
     }
 }
 
+# Report and admin reads go to this read-only copy of the primary when
+# HRMS_REPORTING_DATABASE is set. For a local try-out with two SQLite files,
+# point it at a second file and refresh it with `manage.py sync_reporting_database`.
+if os.environ.get('HRMS_REPORTING_DATABASE'):
+    DATABASES['reporting'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['HRMS_REPORTING_DATABASE'],
+        'OPTIONS': {
+            'timeout': 20,
+            'init_command': 'PRAGMA query_only = ON',
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    }
+
+DATABASE_ROUTERS = ['timekeeping.routing.ReportingRouter']
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -74,6 +105,17 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Users of sessions and tokens are read from the cache (see timekeeping.authentication).
+# ModelBackend stays listed so sessions logged in before the cached backend keep working.
+AUTHENTICATION_BACKENDS = [
+    'timekeeping.authentication.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Sessions are read from the cache and written through to the database. With
+# several worker processes use a shared cache, so logouts reach every worker.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
 LANGUAGE_CODE = 'vi-vn'
 TIME_ZONE = 'Asia/Ho_Chi_Minh'
 USE_I18N = True
@@ -82,17 +124,68 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 
+# Generated report files
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Per-process cache. Deployments with several worker processes should point
+# this at a shared backend (Redis/Memcached) so signal invalidations reach
+# every worker.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'hrms',
+    }
+}
+
+# Timekeeping
+TIMEKEEPING_EMPLOYEE_CACHE_TTL = 300  # seconds
+TIMEKEEPING_STATS_CACHE_TTL = 30  # seconds
+# Per-month record columns of the analytics endpoint; changes to a month retire them early
+TIMEKEEPING_ANALYTICS_CACHE_TTL = 3600  # seconds
+# Months of time records kept in the hot table, the current one included; archive_timerecords
+# moves older months to the archive. Restore the months a larger value brings back into the window.
+TIMEKEEPING_HOT_MONTHS = 13
+# How check-in/checkout spans become working hours (see timekeeping.hours). After changing
+# the options, apply them to past records with `manage.py recompute_working_hours`.
+TIMEKEEPING_WORKING_HOURS_POLICY = {
+    'BACKEND': 'timekeeping.hours.WorkingHoursPolicy',
+    # e.g. {'break_minutes': 60, 'break_after_hours': 6, 'round_minutes': 15, 'max_hours': 12}
+    'OPTIONS': {},
+}
+# Lifetime of the signed tokens of kiosks and badge readers
+TIMEKEEPING_TOKEN_MAX_AGE = 7 * 24 * 3600  # seconds
+# How long clients may reuse the records of a closed month without revalidating
+TIMEKEEPING_CLOSED_MONTH_MAX_AGE = 86400  # seconds
+# In-process registry; a shared backend is needed to fan out across processes
+TIMEKEEPING_PRESENCE_BACKEND = 'timekeeping.presence.LocalPresenceBackend'
+TIMEKEEPING_PRESENCE_KEEPALIVE = 15  # seconds between SSE keepalive comments
+TIMEKEEPING_PRESENCE_QUEUE_SIZE = 1000  # deltas buffered per SSE client before it is sent a new snapshot
+# Requests at least this slow are logged to timekeeping.slow_requests with their slowest queries
+TIMEKEEPING_SLOW_REQUEST_SECONDS = 1.0
+TIMEKEEPING_REPORTING_DATABASE = 'reporting'
+# How long a client's reads stay on the primary after it writes; cover the replication lag
+TIMEKEEPING_REPLICA_PIN_SECONDS = 5
+# URLs of the ASGI application: the async check-in and status views in front of ROOT_URLCONF
+TIMEKEEPING_ASGI_URLCONF = 'hrms.asgi_urls'
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
+        'timekeeping.authentication.SignedTokenAuthentication',
     ],
+    # Default page size of the cursor-paginated lists (override with ?page_size=)
+    'PAGE_SIZE': 50,
 }
 
+# PAGE_SIZE is used by the paginated viewsets without a global pagination class
+SILENCED_SYSTEM_CHECKS = ['rest_framework.W001']
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Employee, TimeRecord, MonthlyReport
+from .models import ArchivedMonth, Employee, TimeRecord, TimeRecordArchive, MonthlyReport, ReportJob
 
 @admin.register(Employee)
 class EmployeeAdmin(admin.ModelAdmin):
@@ -14,8 +14,32 @@ class TimeRecordAdmin(admin.ModelAdmin):
     search_fields = ['employee__full_name', 'employee__employee_id']
     date_hierarchy = 'date'
 
+@admin.register(TimeRecordArchive)
+class TimeRecordArchiveAdmin(admin.ModelAdmin):
+    list_display = ['employee', 'date', 'check_in_time', 'check_out_time', 'status', 'working_hours']
+    list_filter = ['status', 'forgot_checkout']
+    search_fields = ['employee__full_name', 'employee__employee_id']
+    date_hierarchy = 'date'
+    
+    # Archived months are read-only; restore them with archive_timerecords --restore to edit
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(ArchivedMonth)
+class ArchivedMonthAdmin(admin.ModelAdmin):
+    list_display = ['year', 'month', 'records', 'archived_at']
+    list_filter = ['year']
+
 @admin.register(MonthlyReport)
 class MonthlyReportAdmin(admin.ModelAdmin):
     list_display = ['employee', 'year', 'month', 'total_working_days', 'total_working_hours']
     list_filter = ['year', 'month']
-    search_fields = ['employee__full_name', 'employee__employee_id']
\ No newline at end of file
+    search_fields = ['employee__full_name', 'employee__employee_id']
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ['report_type', 'year', 'month', 'status', 'requested_by', 'created_at', 'finished_at']
+    list_filter = ['report_type', 'status']
\ No newline at end of file
@@ -0,0 +1,116 @@
+from django.db.models import Count, FilteredRelation, FloatField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from . import archive
+from .models import Employee
+from .periods import days_in_month
+
+
+def active_employees(department=None):
+    """Active employees, optionally of one department"""
+    employees = Employee.objects.filter(is_active=True)
+    if department:
+        employees = employees.filter(department=department)
+    return employees
+
+
+def month_records(year, month):
+    """All time records of a month, archived or not"""
+    return archive.month_records(year, month)
+
+
+def employee_month_stats(year, month, employees=None):
+    """Annotate employees with their monthly working stats in one query.
+
+    Each employee gets ``total_working_days``, ``total_working_hours``,
+    ``days_forgot_checkout`` and ``days_off``, read from the MonthlyReport
+    rollup; employees without a row for the month get an empty month.
+    """
+    if employees is None:
+        employees = active_employees()
+
+    employees = employees.select_related('user').annotate(
+        month_report=FilteredRelation(
+            'monthlyreport',
+            condition=Q(monthlyreport__year=year, monthlyreport__month=month)
+        )
+    ).annotate(
+        total_working_days=Coalesce('month_report__total_working_days', Value(0)),
+        total_working_hours=Coalesce(
+            'month_report__total_working_hours', Value(0.0), output_field=FloatField()
+        ),
+        days_forgot_checkout=Coalesce('month_report__days_forgot_checkout', Value(0)),
+        days_off=Coalesce('month_report__days_off', Value(days_in_month(year, month))),
+    ).order_by('employee_id')
+
+    for employee in employees:
+        employee.total_working_hours = round(employee.total_working_hours, 2)
+        yield employee
+
+
+def system_totals(today, department=None):
+    """Headcount, today's check-ins and this month's totals in one query.
+
+    Every employee joins at most one MonthlyReport row and one record for
+    today, so the aggregates do not fan out.
+    """
+    employees = Employee.objects.filter(department=department) if department else Employee.objects.all()
+    totals = employees.annotate(
+        month_report=FilteredRelation(
+            'monthlyreport',
+            condition=Q(monthlyreport__year=today.year, monthlyreport__month=today.month)
+        ),
+        today_record=FilteredRelation('timerecord', condition=Q(timerecord__date=today)),
+    ).aggregate(
+        total_employees=Count('pk', filter=Q(is_active=True)),
+        checked_in_today=Count('today_record', filter=Q(today_record__status='CHECKED_IN')),
+        total_working_hours=Coalesce(
+            Sum('month_report__total_working_hours'), Value(0.0), output_field=FloatField()
+        ),
+        forgotten_checkouts=Coalesce(Sum('month_report__days_forgot_checkout'), Value(0)),
+    )
+    totals['total_working_hours'] = round(totals['total_working_hours'], 2)
+    return totals
+
+
+def department_summary(year, month, today, department=None):
+    """Headcount, today's check-ins and monthly totals per department in one grouped query.
+
+    Returns a row for every department of Employee.DEPARTMENTS (or just
+    ``department``), in that order, with zeros for empty departments.
+    """
+    rows = active_employees(department).annotate(
+        month_report=FilteredRelation(
+            'monthlyreport',
+            condition=Q(monthlyreport__year=year, monthlyreport__month=month)
+        ),
+        today_record=FilteredRelation('timerecord', condition=Q(timerecord__date=today)),
+    ).values('department').annotate(
+        headcount=Count('pk'),
+        checked_in_now=Count('today_record', filter=Q(today_record__status='CHECKED_IN')),
+        total_working_days=Coalesce(Sum('month_report__total_working_days'), Value(0)),
+        total_working_hours=Coalesce(
+            Sum('month_report__total_working_hours'), Value(0.0), output_field=FloatField()
+        ),
+        forgotten_checkouts=Coalesce(Sum('month_report__days_forgot_checkout'), Value(0)),
+    ).order_by('department')
+    found = {row['department']: row for row in rows}
+
+    names = dict(Employee.DEPARTMENTS)
+    codes = [department] if department else list(names)
+    codes += sorted(set(found) - set(codes))
+    summary = []
+    for code in codes:
+        row = found.get(code) or {
+            'department': code, 'headcount': 0, 'checked_in_now': 0, 'total_working_days': 0,
+            'total_working_hours': 0.0, 'forgotten_checkouts': 0,
+        }
+        hours, days, headcount = row['total_working_hours'], row['total_working_days'], row['headcount']
+        summary.append({
+            **row,
+            'department_name': names.get(code, code),
+            'total_working_hours': round(hours, 2),
+            'average_hours_per_employee': round(hours / headcount, 2) if headcount else 0,
+            'average_hours_per_day': round(hours / days, 2) if days else 0,
+        })
+    return summary
@@ -0,0 +1,222 @@
+"""Attendance trends and distributions over arbitrary date ranges.
+
+Each month's records are fetched once as NumPy columns of raw database
+values (employee, date, working hours, forgot checkout) and cached until
+a record of that month changes; the rollups call ``invalidate_month()``
+for every change. Series for any range are then computed with grouped
+array operations instead of per-row Python objects.
+
+Records are grouped by the employee's current department.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import CharField
+from django.db.models.functions import Cast
+
+from . import archive
+from .models import Employee
+from .periods import iter_months, month_bounds
+
+MAX_MONTHS = 36
+PERCENTILES = [('p10_daily_hours', 10), ('median_daily_hours', 50), ('p90_daily_hours', 90)]
+RECORD_COLUMNS = [('employee', 'O'), ('date', 'U10'), ('hours', 'f8'), ('forgot', '?')]
+
+
+def _version_key(year, month):
+    return f'timekeeping:analytics:{year}-{month:02d}:version'
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def invalidate_month(year, month):
+    """Retire the cached columns of a month once the current transaction commits"""
+    key = _version_key(year, month)
+    transaction.on_commit(lambda: _bump(key))
+
+
+def fetch_month_columns(year, month):
+    # Dates as ISO text, which NumPy parses far faster than date objects
+    records = archive.month_records(year, month).order_by().values_list(
+        'employee_id', Cast('date', CharField()), 'working_hours', 'forgot_checkout'
+    )
+    # Raw rows skip the per-row field converters; keys and dates are converted per column
+    sql, params = records.query.sql_with_params()
+    with connections[records.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        table = np.array(cursor.fetchall(), dtype=RECORD_COLUMNS)
+
+    codes = {}
+    employee = np.fromiter((codes.setdefault(key, len(codes)) for key in table['employee']),
+                           dtype=np.int32, count=len(table))
+    to_python = Employee._meta.pk.to_python
+    return {
+        # Strings unpickle much faster than UUIDs
+        'employees': [str(to_python(key)) for key in codes],
+        'employee': employee,
+        'date': table['date'].astype('datetime64[D]'),
+        'hours': table['hours'],
+        'forgot': table['forgot'],
+    }
+
+
+def month_columns(year, month):
+    """Records of one month as arrays; ``employee`` indexes ``employees``"""
+    version = cache.get_or_set(_version_key(year, month), 0, None)
+    key = f'timekeeping:analytics:{year}-{month:02d}:{version}'
+    columns = cache.get(key)
+    if columns is None:
+        columns = fetch_month_columns(year, month)
+        cache.set(key, columns, settings.TIMEKEEPING_ANALYTICS_CACHE_TTL)
+    return columns
+
+
+def load_records(start, end, employee_ids):
+    """Records from ``start`` to ``end`` inclusive of the given employees.
+
+    Returns ``(employee, date, hours, forgot)`` arrays, with employees as
+    positions in ``employee_ids``.
+    """
+    index = {str(pk): i for i, pk in enumerate(employee_ids)}
+    first, last = np.datetime64(start, 'D'), np.datetime64(end, 'D')
+    parts = []
+    for year, month in iter_months((start.year, start.month), (end.year, end.month)):
+        columns = month_columns(year, month)
+        remap = np.array([index.get(pk, -1) for pk in columns['employees']] or [-1], dtype=np.int32)
+        employee = remap[columns['employee']]
+        keep = (employee >= 0) & (columns['date'] >= first) & (columns['date'] <= last)
+        parts.append((employee[keep], columns['date'][keep], columns['hours'][keep], columns['forgot'][keep]))
+    return tuple(np.concatenate(column) for column in zip(*parts))
+
+
+def grouped_percentiles(keys, ranks, distinct, size, percentiles):
+    """Percentiles per key in ``range(size)``, interpolated like np.percentile.
+
+    Values are given as ``ranks`` into their sorted ``distinct`` values,
+    which turns the sort by key and value into one sort of integers.
+    Keys without values get NaN.
+    """
+    values = distinct[np.sort(keys * len(distinct) + ranks) % max(len(distinct), 1)]
+    counts = np.bincount(keys, minlength=size)
+    starts = np.cumsum(counts) - counts
+    filled = counts > 0
+    results = []
+    for q in percentiles:
+        position = starts[filled] + (counts[filled] - 1) * (q / 100)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        result = np.full(size, np.nan)
+        result[filled] = values[lower] + (values[upper] - values[lower]) * (position - lower)
+        results.append(result)
+    return results
+
+
+def grouped_series(groups, n_groups, period, n_periods, records, expected_days):
+    """Series of every group as ``(n_groups, n_periods)`` arrays.
+
+    ``records`` comes from ``prepare_records()``; ``expected_days`` holds
+    the attendance days each group could have had in each period, with
+    the same shape as the result.
+    """
+    keys = groups.astype(np.int64) * n_periods + period
+    size = n_groups * n_periods
+    days = np.bincount(keys, minlength=size)
+    forgot_days = np.bincount(keys, weights=records['forgot'], minlength=size)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        series = {
+            'days_present': days,
+            'total_hours': np.bincount(keys, weights=records['hours'], minlength=size).round(2),
+            'attendance_rate': (days / expected_days.ravel()).round(4),
+            'forgot_checkout_rate': (forgot_days / days).round(4),
+        }
+    quantiles = grouped_percentiles(keys[records['completed']], records['ranks'], records['distinct'], size,
+                                    [q for _, q in PERCENTILES])
+    series.update((name, values.round(2)) for (name, _), values in zip(PERCENTILES, quantiles))
+    return {name: values.reshape(n_groups, n_periods) for name, values in series.items()}
+
+
+def prepare_records(hours, forgot):
+    """Share the ranking of daily hours between groupings.
+
+    Daily hours only count days that were checked out.
+    """
+    completed = ~forgot & (hours > 0)
+    daily_hours = hours[completed]
+    cents = np.rint(daily_hours * 100)
+    if np.array_equal(cents / 100, daily_hours):
+        # Working hours are stored rounded to hundredths, so the cents themselves are ranks
+        ranks = cents.astype(np.int64)
+        distinct = np.arange(ranks.max(initial=0) + 1) / 100
+    else:
+        distinct, ranks = np.unique(daily_hours, return_inverse=True)
+    return {'hours': hours, 'forgot': forgot, 'completed': completed, 'distinct': distinct, 'ranks': ranks}
+
+
+def to_lists(values):
+    """Rows of a 2D array as lists, with NaN (and inf) as None"""
+    if values.dtype.kind == 'f':
+        values = np.where(np.isfinite(values), values, None)
+    return values.tolist()
+
+
+def attendance_analytics(start, end, employees=None, per_employee=True):
+    """Monthly series per department, and per employee unless ``per_employee`` is False.
+
+    Covers ``start`` to ``end`` inclusive. Every series has one value per
+    month: days present, total hours, attendance rate (days present over
+    weekdays in range), forgot-checkout rate (over days present) and the
+    10th, 50th and 90th percentile of daily hours on checked-out days.
+    """
+    if employees is None:
+        employees = Employee.objects.filter(is_active=True)
+    staff = list(employees.order_by('employee_id').values_list('id', 'employee_id', 'full_name', 'department'))
+    months = list(iter_months((start.year, start.month), (end.year, end.month)))
+
+    working_days = []
+    for year, month in months:
+        first, after = month_bounds(year, month)
+        working_days.append(int(np.busday_count(max(first, start), min(after, end + timedelta(days=1)))))
+    working_days = np.array(working_days)
+
+    employee, dates, hours, forgot = load_records(start, end, [pk for pk, _, _, _ in staff])
+    period = dates.astype('datetime64[M]').astype(np.int64) - (start.year - 1970) * 12 - (start.month - 1)
+    records = prepare_records(hours, forgot)
+
+    order = {code: i for i, (code, _) in enumerate(Employee.DEPARTMENTS)}
+    departments = sorted({row[3] for row in staff}, key=lambda code: (order.get(code, len(order)), code))
+    department_index = {code: i for i, code in enumerate(departments)}
+    employee_department = np.array([department_index[row[3]] for row in staff], dtype=np.int64)
+    headcount = np.bincount(employee_department, minlength=len(departments))
+    per_department = grouped_series(employee_department[employee], len(departments), period, len(months),
+                                    records, np.outer(headcount, working_days))
+    department_series = {name: to_lists(values) for name, values in per_department.items()}
+
+    result = {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'periods': [f'{year}-{month:02d}' for year, month in months],
+        'working_days': working_days.tolist(),
+        'departments': [
+            {'department': code, 'employees': int(headcount[i]),
+             **{name: series[i] for name, series in department_series.items()}}
+            for i, code in enumerate(departments)
+        ],
+    }
+    if per_employee:
+        series = grouped_series(employee, len(staff), period, len(months), records,
+                                np.tile(working_days, (len(staff), 1)))
+        employee_series = {name: to_lists(values) for name, values in series.items()}
+        result['employees'] = [
+            {'id': str(pk), 'employee_id': code, 'full_name': name, 'department': department,
+             **{series_name: values[i] for series_name, values in employee_series.items()}}
+            for i, (pk, code, name, department) in enumerate(staff)
+        ]
+    return result
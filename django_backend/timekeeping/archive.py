@@ -0,0 +1,99 @@
+"""Hot and cold storage of time records.
+
+TimeRecord holds the last ``TIMEKEEPING_HOT_MONTHS`` months, the current
+one included. ``archive_month()`` moves an older month into
+TimeRecordArchive with one INSERT ... SELECT and one DELETE, and marks it
+with an ArchivedMonth row; ``restore_month()`` moves it back. MonthlyReport
+rows are left alone, so totals of archived months need no archive reads.
+
+Month-scoped reads go through ``month_records()``, which picks the table
+holding the month. Months inside the hot window are never archived and
+need no lookup.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import ArchivedMonth, TimeRecord, TimeRecordArchive
+from .periods import in_month, month_bounds
+
+
+def hot_window_start(today=None):
+    """First day of the oldest month kept in the hot table"""
+    today = today or timezone.now().date()
+    first = today.year * 12 + today.month - settings.TIMEKEEPING_HOT_MONTHS
+    return date(first // 12, first % 12 + 1, 1)
+
+
+def is_archived(year, month):
+    if date(year, month, 1) >= hot_window_start():
+        return False
+    return ArchivedMonth.objects.filter(year=year, month=month).exists()
+
+
+def record_model(year, month):
+    """TimeRecord, or TimeRecordArchive for an archived month"""
+    return TimeRecordArchive if is_archived(year, month) else TimeRecord
+
+
+def record_bounds():
+    """``(first, last)`` dates of all time records, hot and archived; ``(None, None)`` without any"""
+    days = [
+        day
+        for model in (TimeRecord, TimeRecordArchive)
+        for day in model.objects.aggregate(first=Min('date'), last=Max('date')).values()
+        if day is not None
+    ]
+    return (min(days), max(days)) if days else (None, None)
+
+
+def month_records(year, month):
+    """All time records of a month, from whichever table holds it"""
+    return record_model(year, month).objects.filter(**in_month(year, month))
+
+
+def _move(source, target, year, month):
+    """Move a month of rows between the record tables; returns the row count.
+
+    Plain SQL, so no per-row delete signals touch the monthly rollups.
+    """
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in TimeRecord._meta.concrete_fields)
+    day = quote(TimeRecord._meta.get_field('date').column)
+    params = [connection.ops.adapt_datefield_value(bound) for bound in month_bounds(year, month)]
+    source_table, target_table = quote(source._meta.db_table), quote(target._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {target_table} ({columns}) '
+            f'SELECT {columns} FROM {source_table} WHERE {day} >= %s AND {day} < %s',
+            params,
+        )
+        moved = cursor.rowcount
+        cursor.execute(f'DELETE FROM {source_table} WHERE {day} >= %s AND {day} < %s', params)
+    return moved
+
+
+def archive_month(year, month):
+    """Move a closed month out of the hot table; returns the number of records moved"""
+    if date(year, month, 1) >= hot_window_start():
+        raise ValueError(f'{month:02d}/{year} is inside the hot window')
+    if TimeRecord.objects.filter(status='CHECKED_IN', **in_month(year, month)).exists():
+        raise ValueError(f'{month:02d}/{year} still has open records; close them first')
+    with transaction.atomic():
+        archived, _ = ArchivedMonth.objects.select_for_update().get_or_create(year=year, month=month)
+        moved = _move(TimeRecord, TimeRecordArchive, year, month)
+        archived.records += moved
+        archived.save(update_fields=['records'])
+    return moved
+
+
+def restore_month(year, month):
+    """Move an archived month back into the hot table; returns the number of records moved"""
+    with transaction.atomic():
+        deleted, _ = ArchivedMonth.objects.filter(year=year, month=month).delete()
+        if not deleted:
+            raise ValueError(f'{month:02d}/{year} is not archived')
+        return _move(TimeRecordArchive, TimeRecord, year, month)
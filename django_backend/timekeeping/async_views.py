@@ -0,0 +1,166 @@
+import json
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import exceptions
+from rest_framework.authentication import CSRFCheck
+from rest_framework.permissions import SAFE_METHODS
+
+from . import attendance, presence
+from .authentication import SignedTokenAuthentication
+from .employees import aget_current_employee
+from .models import TimeRecord
+from .views import (ADMIN_STATUS_DATA, EXEMPT_CHECKIN_DATA, auth_status_data, checkin_data, status_data,
+                    status_validators)
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def presence_stream(request):
+    """Server-Sent Events feed of who is checked in.
+
+    Sends a ``snapshot`` event first, then a ``presence`` event for every
+    committed check-in/checkout, and a new snapshot when the day changes
+    or the client falls behind. Needs the ASGI application, since a WSGI
+    worker would be held for the lifetime of the connection.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'message': 'Authentication required'}, status=401)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'message': 'The presence stream is only served by the ASGI application'}, status=501)
+
+    async def events():
+        # Subscribe before the snapshot so no delta falls in between
+        subscription = presence.get_backend().subscribe()
+        try:
+            snapshot = await sync_to_async(presence.get_snapshot)(timezone.now().date())
+            yield sse_event('snapshot', snapshot)
+            while True:
+                delta = await subscription.get(timeout=settings.TIMEKEEPING_PRESENCE_KEEPALIVE)
+                if delta is None:
+                    yield ": keepalive\n\n"
+                elif delta is presence.RESYNC or delta['date'] != snapshot['date']:
+                    # Fell behind, or the day rolled over: start the client from a fresh snapshot
+                    day = timezone.now().date() if delta is presence.RESYNC else date.fromisoformat(delta['date'])
+                    snapshot = await sync_to_async(presence.get_snapshot)(day)
+                    yield sse_event('snapshot', snapshot)
+                else:
+                    yield sse_event('presence', delta)
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# Async versions of the busiest TimeRecordViewSet and AuthViewSet actions, served in their place by the
+# ASGI application (see hrms.asgi_urls). Their responses match the DRF actions.
+
+def csrf_failure(request):
+    """Why ``request`` fails the CSRF check, or None; the check SessionAuthentication makes"""
+    check = CSRFCheck(lambda request: None)
+    check.process_request(request)
+    return check.process_view(request, None, (), {})
+
+
+async def authenticate(request):
+    """The user of ``request`` as ``(user, error response)``, like the DRF authentication classes.
+
+    A signed token wins over the session; unsafe requests of session
+    users must pass the CSRF check.
+    """
+    try:
+        credentials = await sync_to_async(SignedTokenAuthentication().authenticate)(request)
+    except exceptions.AuthenticationFailed as e:
+        return None, JsonResponse({'detail': str(e.detail)}, status=403)
+    if credentials is not None:
+        return credentials[0], None
+
+    user = await request.auser()
+    if user.is_authenticated and request.method not in SAFE_METHODS:
+        reason = csrf_failure(request)
+        if reason:
+            return None, JsonResponse({'detail': f'CSRF Failed: {reason}'}, status=403)
+    return user, None
+
+
+def not_authenticated():
+    return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=403)
+
+
+async def current_employee(request):
+    """``(employee, error response)`` for views that need an employee profile"""
+    user, error = await authenticate(request)
+    if error:
+        return None, error
+    if not user.is_authenticated:
+        return None, not_authenticated()
+    employee = await aget_current_employee(user)
+    if employee is None:
+        return None, JsonResponse({'message': 'Employee profile not found'}, status=404)
+    return employee, None
+
+
+@require_GET
+@ensure_csrf_cookie
+async def auth_status(request):
+    """Check authentication status without requiring authentication"""
+    user, error = await authenticate(request)
+    if error:
+        return error
+    return JsonResponse(auth_status_data(user, await aget_current_employee(user)))
+
+
+@require_POST
+@csrf_exempt  # checked in authenticate(), as token clients have no CSRF token
+async def checkin_checkout(request):
+    """Check in or out for today"""
+    employee, error = await current_employee(request)
+    if error:
+        return error
+
+    # Prevent admin users from checking in/out
+    if employee.is_time_tracking_exempt:
+        return JsonResponse(EXEMPT_CHECKIN_DATA, status=403)
+
+    # The toggle locks today's record in a transaction, which the async ORM cannot do yet
+    current_time = timezone.now()
+    action_taken, today_record = await sync_to_async(attendance.toggle_attendance)(employee, current_time)
+    if action_taken is None:
+        return JsonResponse({'success': False, 'message': 'Invalid status'}, status=400)
+    return JsonResponse(checkin_data(action_taken, today_record, current_time))
+
+
+@require_GET
+async def current_status(request):
+    """Get current check-in status"""
+    employee, error = await current_employee(request)
+    if error:
+        return error
+
+    # Return special status for admin users
+    if employee.is_time_tracking_exempt:
+        return JsonResponse(ADMIN_STATUS_DATA)
+
+    today = timezone.now().date()
+    try:
+        today_record = await TimeRecord.objects.aget(employee=employee, date=today)
+    except TimeRecord.DoesNotExist:
+        today_record = None
+
+    validators = status_validators(employee, today_record, today)
+    not_modified = validators.not_modified(request)
+    if not_modified is not None:
+        return validators.apply(not_modified)
+    return validators.apply(JsonResponse(status_data(employee, today_record)))
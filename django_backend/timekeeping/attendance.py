@@ -0,0 +1,87 @@
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import presence, rollups
+from .models import TimeRecord
+from .stats import invalidate_system_stats
+
+
+def publish_on_commit(employee, record):
+    transaction.on_commit(lambda: presence.record_changed(employee, record))
+
+
+def toggle_attendance(employee, now=None):
+    """Check an employee in or out for today in a single transaction.
+
+    Today's record is locked while its state is switched, so concurrent
+    taps are applied one after the other instead of overwriting each
+    other. Returns ``(action, record)`` where ``action`` is
+    ``'checked_in'``, ``'checked_out'`` or ``None`` when today's record
+    cannot be toggled. Earlier open records are left to
+    ``close_forgotten_checkouts()``.
+    """
+    now = now or timezone.now()
+    today = now.date()
+
+    with transaction.atomic():
+        record = TimeRecord.objects.select_for_update().filter(employee=employee, date=today).first()
+        if record is None:
+            try:
+                with transaction.atomic():
+                    record = TimeRecord.objects.create(
+                        employee=employee, date=today, check_in_time=now, status='CHECKED_IN'
+                    )
+                publish_on_commit(employee, record)
+                return 'checked_in', record
+            except IntegrityError:
+                # A concurrent tap created today's record first
+                record = TimeRecord.objects.select_for_update().get(employee=employee, date=today)
+
+        record.employee = employee
+        if record.status == 'CHECKED_OUT':
+            record.check_in_time = now
+            record.status = 'CHECKED_IN'
+            record.save(update_fields=['check_in_time', 'status', 'updated_at'])
+            publish_on_commit(employee, record)
+            return 'checked_in', record
+        if record.status == 'CHECKED_IN':
+            record.check_out_time = now
+            record.status = 'CHECKED_OUT'
+            record.calculate_working_hours()
+            record.save(update_fields=['check_out_time', 'status', 'working_hours', 'updated_at'])
+            publish_on_commit(employee, record)
+            return 'checked_out', record
+        return None, record
+
+
+def close_forgotten_checkouts(before=None, batch_size=1000, now=None):
+    """Mark every record still CHECKED_IN from before ``before`` as forgotten.
+
+    ``before`` is either a day, closing records dated earlier, or a cutoff
+    datetime, closing records checked in earlier; it defaults to today.
+    Records are closed in batches of ``batch_size``, each batch in its own
+    transaction with one UPDATE. Returns the number of records closed.
+    """
+    now = now or timezone.now()
+    before = before or now.date()
+    if isinstance(before, datetime):
+        stale = TimeRecord.objects.filter(
+            status='CHECKED_IN', date__lte=timezone.localdate(before), check_in_time__lt=before
+        )
+    else:
+        stale = TimeRecord.objects.filter(status='CHECKED_IN', date__lt=before)
+    stale = stale.order_by()
+    closed = 0
+    while True:
+        with transaction.atomic():
+            batch = list(stale.select_for_update().values_list('pk', 'employee_id', 'date')[:batch_size])
+            if not batch:
+                return closed
+            TimeRecord.objects.filter(pk__in=[pk for pk, _, _ in batch]).update(
+                status='FORGOT_CHECKOUT', forgot_checkout=True, updated_at=now
+            )
+            rollups.add_forgot_checkouts((employee_id, day) for _, employee_id, day in batch)
+            invalidate_system_stats()
+        closed += len(batch)
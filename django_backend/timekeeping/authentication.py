@@ -0,0 +1,64 @@
+"""Authentication that costs no queries once a user is cached.
+
+CachedModelBackend loads the user of a session from the per-user cache
+in ``employees`` instead of ``auth_user``; with the ``cached_db`` session
+engine the session itself comes from the cache too.
+
+SignedTokenAuthentication is for kiosks and badge readers. A token from
+``/api/auth/token/`` is a signed, timestamped user id plus a fingerprint
+of the user's password hash, checked without any server-side state.
+Tokens expire after ``TIMEKEEPING_TOKEN_MAX_AGE`` seconds, and changing
+the password revokes them.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core import signing
+from django.utils.crypto import constant_time_compare, salted_hmac
+from rest_framework import authentication, exceptions
+
+from .employees import get_cached_user
+
+TOKEN_SALT = 'timekeeping.authentication.token'
+
+
+class CachedModelBackend(ModelBackend):
+
+    def get_user(self, user_id):
+        user = get_cached_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        return await sync_to_async(self.get_user)(user_id)
+
+
+def password_fingerprint(user):
+    return salted_hmac(TOKEN_SALT, user.password, algorithm='sha256').hexdigest()[:16]
+
+
+def issue_token(user):
+    return signing.dumps({'user': user.pk, 'key': password_fingerprint(user)}, salt=TOKEN_SALT)
+
+
+class SignedTokenAuthentication(authentication.BaseAuthentication):
+    """``Authorization: Token <token>`` with a token from ``issue_token()``"""
+    keyword = 'Token'
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header')
+
+        try:
+            payload = signing.loads(header[1].decode(), salt=TOKEN_SALT, max_age=settings.TIMEKEEPING_TOKEN_MAX_AGE)
+        except (signing.BadSignature, UnicodeDecodeError):
+            raise exceptions.AuthenticationFailed('Invalid or expired token')
+        user = get_cached_user(payload['user'])
+        if user is None or not user.is_active or not constant_time_compare(payload['key'], password_fingerprint(user)):
+            raise exceptions.AuthenticationFailed('Invalid or expired token')
+        return user, None
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,407 @@
+"""Endpoint benchmarks against generated datasets.
+
+Each endpoint is requested through the DRF test client, so middleware,
+authentication and rendering are all part of the measurement. Streaming
+responses are read to the end. For every endpoint and scale the suite
+records the median and slowest wall time, the number of queries and the
+peak memory traced while serving one request.
+
+run_load_comparison() instead drives the WSGI and the ASGI handler with
+many concurrent clients and compares their throughput and tail latency.
+"""
+import asyncio
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import django
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .authentication import issue_token
+from .datasets import generate_dataset
+from .models import Employee
+
+SCALES = [15, 1000, 10000]
+
+# (name, method, url, as admin); {year} and {month} are the last full month. The Excel
+# reports are built by the report worker, so benchmark_excel_export measures them instead.
+ENDPOINTS = [
+    ('checkin_checkout', 'post', '/api/timerecords/checkin_checkout/', False),
+    ('current_status', 'get', '/api/timerecords/current_status/', False),
+    ('monthly_records', 'get', '/api/timerecords/monthly_records/?year={year}&month={month}', False),
+    ('timerecords_list', 'get', '/api/timerecords/', False),
+    ('all_employees', 'get', '/api/admin/all_employees/', True),
+    ('system_stats', 'get', '/api/admin/system_stats/', True),
+    ('all_employees_records', 'get', '/api/admin/all_employees_records/?year={year}&month={month}', True),
+    ('analytics', 'get', '/api/admin/analytics/', True),
+    ('department_summary', 'get', '/api/admin/department_summary/?year={year}&month={month}', True),
+]
+
+# Query counts must not grow with the number of employees
+DEFAULT_BUDGETS = {
+    'checkin_checkout': {'queries': 4},
+    'current_status': {'queries': 1},
+    'monthly_records': {'queries': 1},
+    'timerecords_list': {'queries': 1},
+    'all_employees': {'queries': 1},
+    'system_stats': {'queries': 2},
+    'all_employees_records': {'queries': 2},
+    'analytics': {'queries': 1},
+    'department_summary': {'queries': 1},
+}
+
+# Requested with real credentials, so session and user lookups are part of the measurement
+AUTH_ENDPOINTS = [
+    ('auth_status', 'get', '/api/auth/status/'),
+    ('current_status', 'get', '/api/timerecords/current_status/'),
+    ('checkin_checkout', 'post', '/api/timerecords/checkin_checkout/'),
+]
+
+# Settings of each way to authenticate; 'token' sends a signed token instead of a session cookie
+AUTH_MODES = {
+    'db_session': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': ['django.contrib.auth.backends.ModelBackend'],
+    },
+    'cached_session': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+        'AUTHENTICATION_BACKENDS': ['timekeeping.authentication.CachedModelBackend'],
+    },
+    'token': {
+        'AUTHENTICATION_BACKENDS': ['timekeeping.authentication.CachedModelBackend'],
+    },
+}
+
+# Cached sessions and tokens add no queries to what the endpoints need themselves
+AUTH_BUDGETS = {
+    f'{name}@{mode}': {'queries': DEFAULT_BUDGETS.get(name, {}).get('queries', 0)}
+    for mode in ['cached_session', 'token'] for name, _, _ in AUTH_ENDPOINTS
+}
+
+# Requested by many kiosks at once, with signed tokens
+LOAD_ENDPOINTS = [
+    ('current_status', 'GET', '/api/timerecords/current_status/'),
+    ('checkin_checkout', 'POST', '/api/timerecords/checkin_checkout/'),
+    ('auth_status', 'GET', '/api/auth/status/'),
+]
+
+METRICS = ['wall_ms', 'queries', 'peak_mib']
+# Regressions smaller than this are treated as noise
+NOISE_FLOOR = {'wall_ms': 5, 'queries': 0, 'peak_mib': 1}
+
+
+@contextmanager
+def scratch_database():
+    """Run the block against a freshly created test database, destroyed afterwards"""
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def write_results(path, options, results):
+    """Save ``results`` as JSON along with the run's ``options`` and environment"""
+    with open(path, 'w') as f:
+        json.dump({
+            'generated_at': timezone.now().isoformat(),
+            'environment': {
+                'python': sys.version.split()[0],
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'machine': platform.platform(),
+            },
+            'options': options,
+            'results': results,
+        }, f, indent=2)
+
+
+def last_full_month(today):
+    return (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+
+
+def consume(response):
+    """Read a streaming response to the end; the test client closes it"""
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+# The suite times requests itself, and tracing makes them slow; keep them out of the slow request log
+@override_settings(TIMEKEEPING_SLOW_REQUEST_SECONDS=float('inf'))
+def measure(client, method, url, repeat):
+    request = getattr(client, method)
+    consume(request(url))  # warm up connections and caches
+
+    timings = []
+    for _ in range(repeat):
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            started = time.perf_counter()
+            response = consume(request(url))
+            timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{method.upper()} {url} returned {response.status_code}')
+
+    tracemalloc.start()
+    try:
+        consume(request(url))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'wall_ms': round(statistics.median(timings), 2),
+        'wall_ms_max': round(max(timings), 2),
+        'queries': len(queries),
+        'peak_mib': round(peak / 2 ** 20, 2),
+    }
+
+
+def run_benchmarks(scales=SCALES, months=1, repeat=5, endpoints=None, log=None):
+    """Grow the dataset through ``scales`` employees and benchmark every endpoint at each.
+
+    Must run against a scratch database. Returns
+    ``{str(scale): {endpoint: metrics}}``.
+    """
+    year, month = last_full_month(timezone.now().date())
+    employee_user = User.objects.create_user(username='benchmark-employee')
+    Employee.objects.create(user=employee_user, employee_id='BENCH', full_name='Benchmark Employee',
+                            department='ENGINEERING', position='Backend Developer')
+    admin = User.objects.create_user(username='benchmark-admin', is_staff=True)
+    clients = {False: APIClient(), True: APIClient()}
+    clients[False].force_authenticate(employee_user)
+    clients[True].force_authenticate(admin)
+
+    results = {}
+    created = 0
+    for index, scale in enumerate(sorted(scales)):
+        if scale > created:
+            generate_dataset(scale - created, months, end=(year, month), seed=index, prefix=f'S{index}')
+            created = scale
+        cache.clear()
+        results[str(scale)] = {}
+        for name, method, url, as_admin in ENDPOINTS:
+            if endpoints and name not in endpoints:
+                continue
+            metrics = measure(clients[as_admin], method, url.format(year=year, month=month), repeat)
+            results[str(scale)][name] = metrics
+            if log:
+                log(scale, name, metrics)
+    return results
+
+
+def run_auth_benchmarks(repeat=5, log=None):
+    """Benchmark AUTH_ENDPOINTS once per AUTH_MODES entry, logged in for real.
+
+    Returns ``{mode: {endpoint: metrics}}``, which check() takes like the
+    results of run_benchmarks().
+    """
+    password = 'benchmark-password'
+    user = User.objects.create_user(username='benchmark-auth', password=password)
+    Employee.objects.create(user=user, employee_id='BENCHAUTH', full_name='Benchmark Auth',
+                            department='ENGINEERING', position='Backend Developer')
+
+    results = {}
+    for mode, overrides in AUTH_MODES.items():
+        with override_settings(**overrides):
+            cache.clear()
+            client = APIClient()
+            if mode == 'token':
+                client.credentials(HTTP_AUTHORIZATION=f'Token {issue_token(user)}')
+            else:
+                client.login(username=user.username, password=password)
+            results[mode] = {}
+            for name, method, url in AUTH_ENDPOINTS:
+                metrics = measure(client, method, url, repeat)
+                results[mode][name] = metrics
+                if log:
+                    log(mode, name, metrics)
+    return results
+
+
+def wsgi_caller(threads):
+    """Serve requests like a WSGI server with ``threads`` worker threads.
+
+    Returns ``(call, shutdown)``; ``call(method, path, token)`` is a
+    coroutine returning the status code, queued until a worker is free.
+    """
+    handler = WSGIHandler()
+    executor = ThreadPoolExecutor(max_workers=threads)
+
+    def serve(method, path, token):
+        environ = {
+            'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+            'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'testserver', 'HTTP_AUTHORIZATION': f'Token {token}', 'CONTENT_LENGTH': '0',
+            'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+            'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+        }
+        started = []
+        response = handler(environ, lambda status, headers, exc_info=None: started.append(status))
+        try:
+            for _ in response:
+                pass
+        finally:
+            response.close()
+        return int(started[0].split()[0])
+
+    async def call(method, path, token):
+        return await asyncio.get_running_loop().run_in_executor(executor, serve, method, path, token)
+
+    return call, executor.shutdown
+
+
+def asgi_caller(threads):
+    """Serve requests like an ASGI server running the event loop; ``threads`` is not used"""
+    handler = ASGIHandler()
+
+    async def call(method, path, token):
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+            'query_string': b'', 'root_path': '',
+            'headers': [(b'host', b'testserver'), (b'authorization', f'Token {token}'.encode())],
+            'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+        }
+        messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+        status = []
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            # The client stays connected; the handler cancels this wait when it is done
+            await asyncio.get_running_loop().create_future()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+
+        await handler(scope, receive, send)
+        return status[0]
+
+    return call, lambda: None
+
+
+LOAD_MODES = {'wsgi': wsgi_caller, 'asgi': asgi_caller}
+
+
+async def closed_loop(call, method, path, tokens, concurrency, requests):
+    """Have ``concurrency`` clients send ``requests`` requests in total, each waiting for its last answer"""
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def client(index):
+        nonlocal errors
+        token = tokens[index % len(tokens)]
+        for _ in remaining:
+            started = time.perf_counter()
+            status = await call(method, path, token)
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += status >= 400
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(index) for index in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    percentiles = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {
+        'requests': requests,
+        'errors': errors,
+        'rps': round(requests / elapsed, 1),
+        'p50_ms': round(percentiles[49], 2),
+        'p95_ms': round(percentiles[94], 2),
+        'p99_ms': round(percentiles[98], 2),
+    }
+
+
+def run_load_comparison(employees=100, concurrency=64, requests=2000, threads=8, endpoints=None, log=None):
+    """Compare the WSGI and ASGI handlers under ``concurrency`` simultaneous clients.
+
+    Every client has its own employee and signed token. WSGI requests
+    wait for one of ``threads`` workers; ASGI requests run on one event
+    loop. The handlers are called in process, so HTTP parsing and sockets
+    are not part of the measurement. Needs a database other threads can
+    see, like the one of ``create_test_db()``.
+
+    Returns ``{mode: {endpoint: metrics}}``.
+    """
+    tokens = []
+    for number in range(employees):
+        user = User.objects.create_user(username=f'benchmark-load-{number}')
+        Employee.objects.create(user=user, employee_id=f'LOAD{number:05d}', full_name=f'Load {number}',
+                                department='ENGINEERING', position='Backend Developer')
+        tokens.append(issue_token(user))
+
+    results = {mode: {} for mode in LOAD_MODES}
+    # Queueing makes requests slow on purpose; keep it out of the slow request log
+    with override_settings(TIMEKEEPING_SLOW_REQUEST_SECONDS=float('inf')):
+        for name, method, path in LOAD_ENDPOINTS:
+            if endpoints and name not in endpoints:
+                continue
+            for mode, caller in LOAD_MODES.items():
+                cache.clear()
+                call, shutdown = caller(threads)
+                try:
+                    # Warm up caches and code paths once per client
+                    asyncio.run(closed_loop(call, method, path, tokens, concurrency, concurrency))
+                    metrics = asyncio.run(closed_loop(call, method, path, tokens, concurrency, requests))
+                finally:
+                    shutdown()
+                results[mode][name] = metrics
+                if log:
+                    log(mode, name, metrics)
+    return results
+
+
+def check(results, budgets=None, baseline=None, threshold=0.2):
+    """Budget overruns and regressions against ``baseline``, as messages.
+
+    A budget maps an endpoint, or ``"endpoint@scale"`` for one scale, to
+    limits on any of METRICS. Against a baseline, query counts may not
+    grow at all and the other metrics may grow by ``threshold`` at most
+    (or by their NOISE_FLOOR, whichever is more).
+    """
+    failures = []
+    budgets = DEFAULT_BUDGETS if budgets is None else budgets
+    for scale, endpoints in results.items():
+        for name, metrics in endpoints.items():
+            limits = {**budgets.get(name, {}), **budgets.get(f'{name}@{scale}', {})}
+            for metric, limit in limits.items():
+                if metrics[metric] > limit:
+                    failures.append(f'{name}@{scale}: {metric} {metrics[metric]} exceeds the budget of {limit}')
+
+            previous = (baseline or {}).get(scale, {}).get(name)
+            if previous is None:
+                continue
+            for metric in METRICS:
+                allowed = max(previous[metric] * (1 + threshold), previous[metric] + NOISE_FLOOR[metric])
+                if metric == 'queries':
+                    allowed = previous[metric]
+                if metrics[metric] > allowed:
+                    failures.append(
+                        f'{name}@{scale}: {metric} went from {previous[metric]} to {metrics[metric]}'
+                    )
+    return failures
@@ -0,0 +1,70 @@
+"""Conditional GET for the per-employee record endpoints.
+
+Validators are derived from ``COUNT(*)`` and ``MAX(updated_at)`` of the
+records behind a response, plus whatever else shapes it (the employee's
+code and name, the query string). For a whole month that is one
+aggregate query, so a revalidation gets its 304 without fetching or
+serializing the records; keyset pages and today's status take them from
+the few rows they fetch anyway. Every write path stamps ``updated_at``,
+the forgotten-checkout sweep and punch imports included, and deletions
+change the count.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .periods import month_bounds
+
+
+def has_conditions(request):
+    return 'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META
+
+
+def month_closed(year, month):
+    """True once a month is over and the forgotten-checkout sweep has closed its last day"""
+    return month_bounds(year, month)[1] < timezone.now().date()
+
+
+class Validators:
+    """ETag and Last-Modified of one response"""
+
+    def __init__(self, count, last_modified, *extra):
+        self.last_modified = last_modified
+        state = repr((count, last_modified.isoformat() if last_modified else None, extra))
+        self.etag = f'"{hashlib.md5(state.encode(), usedforsecurity=False).hexdigest()}"'
+
+    @classmethod
+    def for_records(cls, records, *extra):
+        """Validators of a queryset of records, in one aggregate query"""
+        stats = records.order_by().aggregate(count=Count('pk'), last_modified=Max('updated_at'))
+        return cls(stats['count'], stats['last_modified'], *extra)
+
+    @classmethod
+    def for_rows(cls, rows, *extra):
+        """The same validators from already fetched ``time_record_values()`` rows"""
+        return cls(len(rows), max((row['updated_at'] for row in rows), default=None), *extra)
+
+    def not_modified(self, request):
+        """A 304 response if the client's copy is current, else None"""
+        # HTTP dates have whole seconds
+        timestamp = int(self.last_modified.timestamp()) if self.last_modified else None
+        return get_conditional_response(request, etag=self.etag, last_modified=timestamp)
+
+    def apply(self, response, closed=False):
+        """Set the validators and caching headers on ``response``.
+
+        Closed periods may be reused for ``TIMEKEEPING_CLOSED_MONTH_MAX_AGE``
+        seconds; anything else must be revalidated on every use.
+        """
+        response['ETag'] = self.etag
+        if self.last_modified:
+            response['Last-Modified'] = http_date(self.last_modified.timestamp())
+        if closed:
+            patch_cache_control(response, private=True, max_age=settings.TIMEKEEPING_CLOSED_MONTH_MAX_AGE)
+        else:
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,238 @@
+"""Bulk corrections of time records by admins.
+
+A batch holds corrections, each setting the check-in and/or checkout
+time of one employee-day (a missing record is created), and optionally
+a ``close_open`` operation that checks out every record of a day still
+without a checkout at the given time. The whole batch is validated
+first; if any correction is invalid nothing is written. Otherwise all
+changes are applied in one transaction with one upsert per batch of
+rows, working hours are recomputed in SQL under the working-hours policy
+and the monthly rollups of the touched employees and months are rebuilt.
+
+Times are ISO 8601; naive times are taken in the configured time zone.
+"""
+from datetime import date, timezone as dt_timezone
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import archive, presence
+from .fast_serializers import serialize_time_records, time_record_values
+from .hours import get_policy
+from .models import Employee, TimeRecord
+from .punches import day_status, parse_timestamp
+from .rollups import rebuild_monthly_reports
+
+MAX_CORRECTIONS = 10000
+# Rows per IN (...) list and upsert; SQLite takes at most 999 parameters per query
+BATCH_SIZE = 500
+UPDATE_FIELDS = ['check_in_time', 'check_out_time', 'status', 'forgot_checkout', 'updated_at']
+TIME_FIELDS = ['check_in_time', 'check_out_time']
+
+
+class CorrectionError(ValueError):
+    pass
+
+
+def chunks(items, size=BATCH_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def parse_date(value):
+    if not isinstance(value, str):
+        raise ValueError
+    return date.fromisoformat(value)
+
+
+def parse_time(value):
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise ValueError
+    return parse_timestamp(value)
+
+
+def parse_correction(row):
+    """``(employee code, date, times, errors)`` of one correction; ``times`` holds the given fields"""
+    if not isinstance(row, dict):
+        return None, None, {}, ['Expected an object']
+    errors = []
+    code = row.get('employee_id')
+    if not isinstance(code, str) or not code.strip():
+        errors.append('employee_id is required')
+        code = None
+    else:
+        code = code.strip()
+    try:
+        day = parse_date(row.get('date'))
+    except ValueError:
+        errors.append('date must be an ISO 8601 date')
+        day = None
+    times = {}
+    for field in TIME_FIELDS:
+        if field in row:
+            try:
+                times[field] = parse_time(row[field])
+            except ValueError:
+                errors.append(f'{field} must be an ISO 8601 timestamp or null')
+    if not any(field in row for field in TIME_FIELDS):
+        errors.append('Give check_in_time, check_out_time or both')
+    return code, day, times, errors
+
+
+def parse_close_open(operation):
+    """``(date, checkout time)`` of a ``close_open`` operation"""
+    if not isinstance(operation, dict):
+        raise CorrectionError('close_open must be an object with "date" and "check_out_time"')
+    try:
+        day, check_out = parse_date(operation.get('date')), parse_time(operation.get('check_out_time'))
+    except ValueError:
+        check_out = None
+    if check_out is None:
+        raise CorrectionError('close_open needs an ISO 8601 "date" and "check_out_time"')
+    # Records are dated by UTC day, as checkin_checkout and punch imports do
+    if check_out.astimezone(dt_timezone.utc).date() != day:
+        raise CorrectionError(f'close_open check_out_time must fall on {day.isoformat()}')
+    return day, check_out
+
+
+def lock_records(days):
+    """Existing records of ``{date: employee pks}`` by ``(employee pk, date)``, locked"""
+    records = {}
+    for day, employee_ids in days.items():
+        for batch in chunks(employee_ids):
+            for record in TimeRecord.objects.select_for_update().filter(date=day, employee_id__in=batch):
+                records[record.employee_id, record.date] = record
+    return records
+
+
+def apply_corrections(corrections=(), close_open=None, now=None):
+    """Validate and apply a batch of corrections and/or a ``close_open`` operation.
+
+    Returns a summary with one result per correction and per record
+    ``close_open`` touched. Raises CorrectionError for malformed batches.
+    """
+    if not isinstance(corrections, list):
+        raise CorrectionError('corrections must be a list')
+    if len(corrections) > MAX_CORRECTIONS:
+        raise CorrectionError(f'At most {MAX_CORRECTIONS} corrections per request')
+    if not corrections and close_open is None:
+        raise CorrectionError('Nothing to do: give corrections or close_open')
+    closing = parse_close_open(close_open) if close_open is not None else None
+
+    now = now or timezone.now()
+    today = now.date()
+    parsed = [parse_correction(row) for row in corrections]
+    codes = {code for code, _, _, _ in parsed if code}
+    employee_ids = {}
+    for batch in chunks(codes):
+        employee_ids.update(Employee.objects.filter(employee_id__in=batch).values_list('employee_id', 'id'))
+    months = {(day.year, day.month) for _, day, _, _ in parsed if day}
+    if closing:
+        months.add((closing[0].year, closing[0].month))
+    archived = {month for month in months if archive.is_archived(*month)}
+    if closing and (closing[0].year, closing[0].month) in archived:
+        raise CorrectionError(f'{closing[0].month:02d}/{closing[0].year} is archived; restore it first')
+
+    results = []
+    seen = {}
+    days = {}
+    for index, (code, day, times, errors) in enumerate(parsed):
+        result = {'row': index, 'employee_id': code, 'date': day and day.isoformat()}
+        employee_id = employee_ids.get(code)
+        if code and employee_id is None:
+            errors.append(f'Unknown employee "{code}"')
+        if day and (day.year, day.month) in archived:
+            errors.append(f'{day.month:02d}/{day.year} is archived; restore it first')
+        if employee_id and day:
+            if (employee_id, day) in seen:
+                errors.append(f'Duplicate of row {seen[employee_id, day]}')
+            seen.setdefault((employee_id, day), index)
+            days.setdefault(day, set()).add(employee_id)
+        result['errors'] = errors
+        results.append(result)
+
+    with transaction.atomic():
+        existing = lock_records(days)
+        records = []
+        for result, (code, day, times, errors) in zip(results, parsed):
+            if errors:
+                continue
+            employee_id = employee_ids[code]
+            record = existing.get((employee_id, day))
+            if record is None:
+                record = TimeRecord(employee_id=employee_id, date=day)
+            check_in = times.get('check_in_time', record.check_in_time)
+            check_out = times.get('check_out_time', record.check_out_time)
+            if check_in is None:
+                errors.append('check_in_time is required')
+            elif check_out is not None and check_out <= check_in:
+                errors.append('check_out_time must be after check_in_time')
+            if errors:
+                continue
+            record.check_in_time, record.check_out_time = check_in, check_out
+            record.status, record.forgot_checkout = day_status(day, check_out, today)
+            record.updated_at = now
+            records.append(record)
+            result.update(action='created' if record._state.adding else 'updated', key=(employee_id, day))
+
+        invalid = sum(1 for result in results if result['errors'])
+        if invalid:
+            for result in results:
+                result['action'] = 'error' if result['errors'] else 'valid'
+                result.pop('key', None)
+            return {'applied': False, 'errors': invalid, 'results': results}
+        for result in results:
+            del result['errors']
+
+        if closing:
+            day, check_out = closing
+            corrected = days.get(day, set())
+            open_records = (TimeRecord.objects.select_for_update().select_related('employee')
+                            .filter(date=day, check_out_time__isnull=True).exclude(check_in_time__isnull=True))
+            for record in open_records:
+                if record.employee_id in corrected:
+                    continue
+                result = {'row': None, 'employee_id': record.employee.employee_id, 'date': day.isoformat()}
+                if record.check_in_time >= check_out:
+                    result.update(action='skipped', message='Checked in at or after check_out_time')
+                else:
+                    record.check_out_time = check_out
+                    record.status, record.forgot_checkout = day_status(day, check_out, today)
+                    record.updated_at = now
+                    records.append(record)
+                    result.update(action='closed', key=(record.employee_id, day))
+                results.append(result)
+
+        # One upsert for new and existing records alike, as punch imports do
+        TimeRecord.objects.bulk_create(records, batch_size=BATCH_SIZE, update_conflicts=True,
+                                       unique_fields=['employee', 'date'], update_fields=UPDATE_FIELDS)
+        touched = {}
+        for record in records:
+            touched.setdefault(record.date, []).append(record.employee_id)
+        serialized = {}
+        for day, employee_ids in touched.items():
+            for batch in chunks(employee_ids):
+                day_records = TimeRecord.objects.filter(date=day, employee_id__in=batch).order_by()
+                day_records.update(working_hours=get_policy().expression())
+                for record in serialize_time_records(time_record_values(day_records)):
+                    serialized[record['employee'], day] = record
+
+        # The bulk writes skip the save signals, so rebuild the touched employee-months
+        months = {}
+        for day, employee_ids in touched.items():
+            months.setdefault((day.year, day.month), set()).update(employee_ids)
+        for month, employee_ids in sorted(months.items()):
+            rebuild_monthly_reports(month, month, employee_ids=employee_ids)
+        if today in touched:
+            transaction.on_commit(lambda: presence.reload(today))
+
+    for result in results:
+        if 'key' in result:
+            result['record'] = serialized[result.pop('key')]
+    summary = {'applied': True, 'errors': 0}
+    for action in ['updated', 'created', 'closed', 'skipped']:
+        summary[action] = sum(1 for result in results if result['action'] == action)
+    return {**summary, 'results': results}
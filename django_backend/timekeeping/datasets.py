@@ -0,0 +1,194 @@
+"""Synthetic employees and attendance history for load tests and benchmarks.
+
+Everything is drawn from seeded ``random.Random`` instances, primary
+keys included, so the same arguments always build the same dataset. Users and employees are
+written with ``bulk_create`` and share one precomputed password hash.
+"""
+import itertools
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .hours import MICROSECONDS_PER_MINUTE, get_policy
+from .models import Employee, TimeRecord
+from .periods import month_bounds
+from .rollups import rebuild_monthly_reports
+
+DEFAULT_PASSWORD = 'password123'
+BATCH_SIZE = 5000
+RECORD_FIELDS = ['id', 'employee', 'date', 'check_in_time', 'check_out_time', 'status', 'working_hours',
+                 'forgot_checkout', 'created_at', 'updated_at']
+
+# (department, share of headcount, [(position, weight), ...])
+DEPARTMENTS = [
+    ('ENGINEERING', 40, [('Junior Developer', 25), ('Backend Developer', 25), ('Frontend Developer', 20),
+                         ('Senior Full Stack Developer', 15), ('Mobile Developer', 8), ('Engineering Manager', 7)]),
+    ('QA', 12, [('QA Engineer', 60), ('Automation Engineer', 30), ('QA Team Lead', 10)]),
+    ('DEVOPS', 8, [('DevOps Engineer', 60), ('Site Reliability Engineer', 30), ('DevOps Lead', 10)]),
+    ('PRODUCT', 8, [('Product Owner', 40), ('Product Manager', 40), ('Technical Product Manager', 20)]),
+    ('DESIGN', 7, [('UI/UX Designer', 70), ('Graphic Designer', 20), ('Design Lead', 10)]),
+    ('MARKETING', 8, [('Digital Marketing Specialist', 60), ('Content Writer', 30), ('Marketing Manager', 10)]),
+    ('HR', 5, [('HR Specialist', 60), ('Recruiter', 30), ('HR Manager', 10)]),
+    ('SALES', 12, [('Sales Executive', 70), ('Account Manager', 20), ('Sales Manager', 10)]),
+]
+
+FAMILY_NAMES = ['Nguyễn', 'Trần', 'Lê', 'Phạm', 'Hoàng', 'Huỳnh', 'Phan', 'Vũ', 'Võ', 'Đặng', 'Bùi', 'Đỗ',
+                'Hồ', 'Ngô', 'Dương', 'Lý']
+MIDDLE_NAMES = ['Văn', 'Thị', 'Hoàng', 'Minh', 'Thanh', 'Quốc', 'Ngọc', 'Đức', 'Thu', 'Gia']
+GIVEN_NAMES = ['An', 'Bình', 'Cường', 'Dung', 'Em', 'Giang', 'Hương', 'Inh', 'Kim', 'Long', 'Mai', 'Nam',
+               'Oanh', 'Phước', 'Quân', 'Sơn', 'Tâm', 'Uyên', 'Việt', 'Xuân', 'Yến', 'Khoa', 'Linh', 'Hải']
+
+
+def history_months(months, end):
+    """The ``months`` (year, month) pairs ending with ``end``"""
+    year, month = end
+    first = year * 12 + month - 1 - (months - 1)
+    return (first // 12, first % 12 + 1), end
+
+
+def seeded_uuid(rng):
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def generate_employees(rng, id_rng, count, prefix, hired_before, password_hash):
+    departments = [department for department, _, _ in DEPARTMENTS]
+    shares = [share for _, share, _ in DEPARTMENTS]
+    positions = {department: list(zip(*weighted)) for department, _, weighted in DEPARTMENTS}
+
+    users, employees = [], []
+    for i in range(count):
+        code = f'{prefix}{i + 1:06d}'
+        family, given = rng.choice(FAMILY_NAMES), rng.choice(GIVEN_NAMES)
+        department = rng.choices(departments, shares)[0]
+        names, weights = positions[department]
+        user = User(username=code.lower(), first_name=given, last_name=family, password=password_hash,
+                    email=f'{code.lower()}@company.com')
+        users.append(user)
+        employees.append(Employee(
+            id=seeded_uuid(id_rng),
+            user=user,
+            employee_id=code,
+            full_name=f'{family} {rng.choice(MIDDLE_NAMES)} {given}',
+            department=department,
+            position=rng.choices(names, weights)[0],
+            hire_date=hired_before - timedelta(days=rng.randrange(30, 3650)),
+        ))
+    return users, employees
+
+
+def working_days(first, last):
+    """Weekdays from the first day of month ``first`` to the end of month ``last``"""
+    day, end = month_bounds(*first)[0], month_bounds(*last)[1]
+    while day < end:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+
+def record_inserter(cursor):
+    """Insert TimeRecord rows given as tuples of database values.
+
+    bulk_create() prepares every value through its model field, which
+    caps it at a few thousand rows per second; generated history is
+    millions of rows, so it goes through executemany() instead.
+    """
+    columns = [TimeRecord._meta.get_field(name).column for name in RECORD_FIELDS]
+    sql = 'INSERT INTO %s (%s) VALUES (%s)' % (
+        connection.ops.quote_name(TimeRecord._meta.db_table),
+        ', '.join(connection.ops.quote_name(column) for column in columns),
+        ', '.join(['%s'] * len(columns)),
+    )
+    return lambda rows: cursor.executemany(sql, rows)
+
+
+class WorkDay:
+    """A weekday of the history, with its database values computed once"""
+
+    def __init__(self, day, tz):
+        self.date = connection.ops.adapt_datefield_value(day)
+        self.start = datetime(day.year, day.month, day.day, 7, 30, tzinfo=tz)
+        self.stamps = {}
+
+    def stamp(self, minutes):
+        """Database value of the time ``minutes`` after 07:30"""
+        value = self.stamps.get(minutes)
+        if value is None:
+            value = connection.ops.adapt_datetimefield_value(self.start + timedelta(minutes=minutes))
+            self.stamps[minutes] = value
+        return value
+
+
+def generate_records(rng, employee, days, forgot_rate, absence_rate, ids):
+    """Database rows of one employee's history, in RECORD_FIELDS order"""
+    if connection.features.has_native_uuid_field:
+        employee_id, record_id = employee.pk, lambda: uuid.UUID(int=next(ids))
+    else:
+        employee_id, record_id = employee.pk.hex, lambda: '%032x' % next(ids)
+    created_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    policy = get_policy()
+    for day in days:
+        if rng.random() < absence_rate:
+            continue
+        # Arrive between 07:30 and 09:30, to the minute
+        arrival = int(rng.random() * 120)
+        if rng.random() < forgot_rate:
+            check_out, status, hours, forgot = None, 'FORGOT_CHECKOUT', 0.0, True
+        else:
+            worked = 420 + int(rng.random() * 180)
+            check_out = day.stamp(arrival + worked)
+            status, hours, forgot = 'CHECKED_OUT', policy.hours_for(worked * MICROSECONDS_PER_MINUTE), False
+        yield (record_id(), employee_id, day.date, day.stamp(arrival), check_out,
+               status, hours, forgot, created_at, created_at)
+
+
+def generate_dataset(employees, months, end=None, seed=0, prefix='GEN', forgot_rate=0.03, absence_rate=0.05,
+                     password=DEFAULT_PASSWORD, batch_size=BATCH_SIZE):
+    """Create ``employees`` employees with ``months`` months of weekday records.
+
+    History ends with month ``end`` (a (year, month) pair, by default the
+    previous month) and the MonthlyReport rollups are rebuilt for it.
+    Returns ``(employee_count, record_count)``.
+    """
+    today = timezone.now().date()
+    if end is None:
+        end = (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+    days, hired_before = [], today
+    if months:
+        first, last = history_months(months, end)
+        tz = timezone.get_default_timezone()
+        days = [WorkDay(day, tz) for day in working_days(first, last)]
+        hired_before = month_bounds(*first)[0]
+
+    rng = random.Random(seed)
+    # Keys come from their own stream, seeded with the prefix as well, so datasets with another prefix
+    # can be added next to this one
+    id_rng = random.Random(f'{prefix}:{seed}')
+    users, staff = generate_employees(rng, id_rng, employees, prefix, hired_before, make_password(password))
+    record_count = 0
+    with transaction.atomic():
+        User.objects.bulk_create(users, batch_size=batch_size)
+        Employee.objects.bulk_create(staff, batch_size=batch_size)
+
+        # Ascending ids append to the primary key index instead of scattering over it
+        ids = itertools.count(id_rng.getrandbits(64) << 64)
+        with connection.cursor() as cursor:
+            insert = record_inserter(cursor)
+            batch = []
+            for employee in staff:
+                batch.extend(generate_records(rng, employee, days, forgot_rate, absence_rate, ids))
+                if len(batch) >= batch_size:
+                    insert(batch)
+                    record_count += len(batch)
+                    batch = []
+            if batch:
+                insert(batch)
+                record_count += len(batch)
+
+        if months:
+            rebuild_monthly_reports(first, last)
+    return len(staff), record_count
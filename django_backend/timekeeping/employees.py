@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from .models import Employee
+
+# Cached for users without an employee profile (or unknown ids), so they do not hit the database either
+NO_EMPLOYEE = 'none'
+
+
+def employee_cache_key(user_id):
+    return f'timekeeping:employee:{user_id}'
+
+
+def user_cache_key(user_id):
+    return f'timekeeping:user:{user_id}'
+
+
+def get_cached_user(user_id):
+    """The User with ``user_id``, or None, cached and invalidated like the employee profiles"""
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = User.objects.filter(pk=user_id).first() or NO_EMPLOYEE
+        cache.set(key, user, settings.TIMEKEEPING_EMPLOYEE_CACHE_TTL)
+    return None if user == NO_EMPLOYEE else user
+
+
+def get_current_employee(user):
+    """The employee profile of ``user`` with its user joined in, or None.
+
+    Profiles are cached per user and dropped by the Employee and User
+    signal handlers whenever either side changes.
+    """
+    if not user.is_authenticated:
+        return None
+    key = employee_cache_key(user.pk)
+    employee = cache.get(key)
+    if employee is None:
+        employee = Employee.objects.select_related('user').filter(user=user).first() or NO_EMPLOYEE
+        cache.set(key, employee, settings.TIMEKEEPING_EMPLOYEE_CACHE_TTL)
+    return None if employee == NO_EMPLOYEE else employee
+
+
+async def aget_current_employee(user):
+    """Async get_current_employee(), sharing its cache"""
+    if not user.is_authenticated:
+        return None
+    key = employee_cache_key(user.pk)
+    employee = await cache.aget(key)
+    if employee is None:
+        employee = await Employee.objects.select_related('user').filter(user=user).afirst() or NO_EMPLOYEE
+        await cache.aset(key, employee, settings.TIMEKEEPING_EMPLOYEE_CACHE_TTL)
+    return None if employee == NO_EMPLOYEE else employee
+
+
+def invalidate_current_employee(user_id):
+    cache.delete_many([employee_cache_key(user_id), user_cache_key(user_id)])
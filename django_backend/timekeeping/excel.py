@@ -0,0 +1,149 @@
+from django.utils import timezone
+from openpyxl import Workbook
+
+from . import aggregates
+from .models import Employee, TimeRecord
+
+CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Workbooks smaller than this stay in memory, larger ones spill to disk
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+ITERATOR_CHUNK_SIZE = 2000
+
+MONTHLY_HEADERS = [
+    'Employee ID', 'Full Name', 'Department', 'Position',
+    'Total Working Days', 'Total Working Hours', 'Days Forgot Checkout',
+    'Days Off', 'Notes'
+]
+
+SUMMARY_HEADERS = [
+    'Employee ID', 'Full Name', 'Department', 'Position',
+    'Total Working Days', 'Total Working Hours', 'Days Forgot Checkout',
+    'Days Off', 'Average Hours/Day', 'Status'
+]
+
+DEPARTMENT_HEADERS = [
+    'Department', 'Headcount', 'Total Working Days', 'Total Working Hours',
+    'Average Hours/Employee', 'Average Hours/Day', 'Days Forgot Checkout'
+]
+
+DETAILED_HEADERS = [
+    'Employee ID', 'Full Name', 'Department', 'Date',
+    'Check In', 'Check Out', 'Working Hours', 'Status', 'Notes'
+]
+
+
+def write_workbook(fileobj, sheets):
+    """Write ``(title, headers, rows)`` sheets to ``fileobj`` as an .xlsx file.
+
+    Uses openpyxl's write-only mode, so rows are flushed to disk as they
+    are appended and ``rows`` may be any iterable, including a database
+    cursor. This bounds memory, not latency: the .xlsx is a zip archive
+    that is only complete once saved, so no byte of it can be sent before
+    every row has been written.
+    """
+    wb = Workbook(write_only=True)
+    for title, headers, rows in sheets:
+        ws = wb.create_sheet(title)
+        ws.append(headers)
+        for row in rows:
+            ws.append(row)
+    wb.save(fileobj)
+
+
+def monthly_rows(year, month, department=None):
+    for employee in aggregates.employee_month_stats(year, month, aggregates.active_employees(department)):
+        yield [
+            employee.employee_id,
+            employee.full_name,
+            employee.get_department_display(),
+            employee.position,
+            employee.total_working_days,
+            employee.total_working_hours,
+            employee.days_forgot_checkout,
+            employee.days_off,
+            f"Report for {month}/{year}"
+        ]
+
+
+def summary_rows(year, month, department=None):
+    for employee in aggregates.employee_month_stats(year, month, aggregates.active_employees(department)):
+        total_working_days = employee.total_working_days
+        total_working_hours = employee.total_working_hours
+        avg_hours_per_day = round(total_working_hours / total_working_days, 2) if total_working_days > 0 else 0
+
+        # Employee status
+        status_text = "Active"
+        if employee.days_forgot_checkout > 5:
+            status_text = "Needs Attention"
+        elif total_working_hours < 40:
+            status_text = "Low Hours"
+
+        yield [
+            employee.employee_id,
+            employee.full_name,
+            employee.get_department_display(),
+            employee.position,
+            total_working_days,
+            total_working_hours,
+            employee.days_forgot_checkout,
+            employee.days_off,
+            avg_hours_per_day,
+            status_text
+        ]
+
+
+def department_rows(year, month, department=None):
+    today = timezone.now().date()
+    for row in aggregates.department_summary(year, month, today, department):
+        yield [
+            row['department_name'],
+            row['headcount'],
+            row['total_working_days'],
+            row['total_working_hours'],
+            row['average_hours_per_employee'],
+            row['average_hours_per_day'],
+            row['forgotten_checkouts'],
+        ]
+
+
+def detailed_rows(year, month, department=None):
+    """One row per record, read through a chunked cursor"""
+    departments = dict(Employee.DEPARTMENTS)
+    statuses = dict(TimeRecord.STATUS_CHOICES)
+    records = aggregates.month_records(year, month).filter(employee__is_active=True)
+    if department:
+        records = records.filter(employee__department=department)
+    records = records.order_by('employee__employee_id', 'date').values_list(
+        'employee__employee_id', 'employee__full_name', 'employee__department', 'date',
+        'check_in_time', 'check_out_time', 'working_hours', 'status', 'forgot_checkout'
+    )
+    for (employee_id, full_name, employee_department, day, check_in_time, check_out_time,
+         working_hours, record_status, forgot_checkout) in records.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        yield [
+            employee_id,
+            full_name,
+            departments.get(employee_department, employee_department),
+            day.strftime('%Y-%m-%d'),
+            check_in_time.strftime('%H:%M:%S') if check_in_time else 'N/A',
+            check_out_time.strftime('%H:%M:%S') if check_out_time else 'N/A',
+            working_hours,
+            statuses.get(record_status, record_status),
+            'Forgot checkout' if forgot_checkout else ''
+        ]
+
+
+def monthly_report_sheets(year, month, department=None):
+    return [
+        (f"Report {month}-{year}", MONTHLY_HEADERS, monthly_rows(year, month, department)),
+        ("Departments", DEPARTMENT_HEADERS, department_rows(year, month, department)),
+    ]
+
+
+def comprehensive_report_sheets(year, month, department=None):
+    return [
+        ("Summary", SUMMARY_HEADERS, summary_rows(year, month, department)),
+        ("Departments", DEPARTMENT_HEADERS, department_rows(year, month, department)),
+        ("Detailed Records", DETAILED_HEADERS, detailed_rows(year, month, department)),
+    ]
@@ -0,0 +1,60 @@
+"""Read-only serialization of large record listings.
+
+``TimeRecordSerializer`` builds a model instance per row, follows the
+employee relation for two fields and formats each value through its own
+field object. Listings here instead select the output columns with
+``values()``, join the employee in SQL and format the rows in one pass.
+The output is identical to the serializer's, key order included.
+"""
+from django.db.models import F
+from django.utils import timezone
+
+TIME_RECORD_COLUMNS = (
+    'id', 'employee', 'date', 'check_in_time', 'check_out_time', 'status',
+    'working_hours', 'forgot_checkout', 'created_at', 'updated_at',
+)
+
+
+def time_record_values(queryset):
+    """``queryset`` as dicts holding what TimeRecordSerializer outputs"""
+    return queryset.values(
+        *TIME_RECORD_COLUMNS,
+        employee_name=F('employee__full_name'),
+        employee_code=F('employee__employee_id'),
+    )
+
+
+def datetime_formatter():
+    """Format aware datetimes the way DRF's DateTimeField does"""
+    tz = timezone.get_current_timezone()
+
+    def format_datetime(value):
+        if not value:
+            return None
+        value = value.astimezone(tz).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return format_datetime
+
+
+def serialize_time_records(rows):
+    """Rows of ``time_record_values()`` as TimeRecordSerializer(many=True).data"""
+    format_datetime = datetime_formatter()
+    return [
+        {
+            'id': str(row['id']),
+            'employee': row['employee'],
+            'employee_name': row['employee_name'],
+            'employee_id': row['employee_code'],
+            'date': row['date'].isoformat(),
+            'check_in_time': format_datetime(row['check_in_time']),
+            'check_out_time': format_datetime(row['check_out_time']),
+            'status': row['status'],
+            'working_hours': float(row['working_hours']),
+            'forgot_checkout': row['forgot_checkout'],
+            'created_at': format_datetime(row['created_at']),
+            'updated_at': format_datetime(row['updated_at']),
+        }
+        for row in rows
+    ]
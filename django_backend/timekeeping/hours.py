@@ -0,0 +1,188 @@
+"""Working-hours policies.
+
+A policy turns the time between check-in and checkout into the hours
+stored in ``TimeRecord.working_hours``, both in Python (``hours()``, used
+by ``calculate_working_hours()`` on checkout, punch imports and
+generated datasets) and as a database expression (``expression()``,
+used by bulk corrections and ``recompute_working_hours``), so a policy
+change can be applied to history with set-based UPDATEs.
+
+Both sides work on whole microseconds with integer arithmetic, so they
+agree exactly; floats only appear in the final division by 100. The
+policy in use is ``TIMEKEEPING_WORKING_HOURS_POLICY``.
+"""
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Func, IntegerField, Q, Value, When
+from django.db.models.functions import Cast, Greatest, Least
+from django.db.models.lookups import GreaterThanOrEqual
+from django.db.utils import NotSupportedError
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import TimeRecord, TimeRecordArchive
+from .periods import iter_months
+from .rollups import rebuild_monthly_reports
+
+MICROSECONDS_PER_MINUTE = 60 * 10 ** 6
+# Hours are stored to the hundredth, i.e. in steps of 36 seconds
+MICROSECONDS_PER_STEP = 36 * 10 ** 6
+
+
+class WorkedMicroseconds(Func):
+    """Microseconds from the ``start`` to the ``end`` datetime expression"""
+    arity = 2
+    output_field = IntegerField()
+    # (template, order of the compiled expressions in it). SQLite keeps datetimes as
+    # 'YYYY-MM-DD HH:MM:SS[.ffffff]' text in UTC; the fraction is read as digits, not as a float.
+    templates = {
+        'sqlite': (
+            "((CAST(strftime('%%%%s', %s) AS INTEGER) - CAST(strftime('%%%%s', %s) AS INTEGER)) * 1000000"
+            " + CAST(substr(%s, 21) AS INTEGER) - CAST(substr(%s, 21) AS INTEGER))",
+            (1, 0, 1, 0),
+        ),
+        'postgresql': ('CAST(EXTRACT(EPOCH FROM (%s - %s)) * 1000000 AS BIGINT)', (1, 0)),
+        'mysql': ('TIMESTAMPDIFF(MICROSECOND, %s, %s)', (0, 1)),
+    }
+
+    def as_sql(self, compiler, connection, **extra_context):
+        if connection.vendor not in self.templates:
+            raise NotSupportedError(f'WorkedMicroseconds is not implemented for {connection.vendor}')
+        template, order = self.templates[connection.vendor]
+        compiled = [compiler.compile(expression) for expression in self.get_source_expressions()]
+        sql = template % tuple(compiled[index][0] for index in order)
+        params = [param for index in order for param in compiled[index][1]]
+        return sql, params
+
+
+class IntegerDivision(Func):
+    """``dividend`` divided by ``divisor``, rounded down; both are non-negative integer expressions"""
+    arity = 2
+    arg_joiner = ' / '
+    template = '(%(expressions)s)'
+    output_field = IntegerField()
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        # MySQL's / returns a DECIMAL even for integers; DIV is its integer division
+        return self.as_sql(compiler, connection, arg_joiner=' DIV ', **extra_context)
+
+
+class WorkingHoursPolicy:
+    """Hours worked between check-in and checkout, rounded half up to the hundredth.
+
+    ``break_minutes`` are deducted from days of at least
+    ``break_after_hours``; the remaining time is rounded half up to
+    ``round_minutes`` (when set) and capped at ``max_hours`` (when set).
+    Subclasses change the rule by overriding ``adjust()`` and
+    ``adjust_expression()`` together.
+
+    The old ``round(seconds / 3600, 2)`` rounded exact halves either way,
+    depending on float error; here they always round up. Only durations
+    of an odd multiple of 18 seconds are affected, by 0.01 hours at most.
+    """
+
+    def __init__(self, break_minutes=0, break_after_hours=0, round_minutes=0, max_hours=None):
+        self.break_us = int(break_minutes * MICROSECONDS_PER_MINUTE)
+        self.break_after_us = int(break_after_hours * 60 * MICROSECONDS_PER_MINUTE)
+        self.round_us = int(round_minutes * MICROSECONDS_PER_MINUTE)
+        self.max_us = None if max_hours is None else int(max_hours * 60 * MICROSECONDS_PER_MINUTE)
+
+    def adjust(self, worked):
+        """Microseconds to count for ``worked`` microseconds (at least 0)"""
+        if self.break_us and worked >= self.break_after_us:
+            worked = max(worked - self.break_us, 0)
+        if self.round_us:
+            worked = (worked + self.round_us // 2) // self.round_us * self.round_us
+        if self.max_us is not None:
+            worked = min(worked, self.max_us)
+        return worked
+
+    def adjust_expression(self, worked):
+        """``adjust()`` as a database expression of the integer expression ``worked``"""
+        if self.break_us:
+            worked = Case(
+                When(GreaterThanOrEqual(worked, Value(self.break_after_us)),
+                     then=Greatest(worked - Value(self.break_us), Value(0))),
+                default=worked,
+                output_field=IntegerField(),
+            )
+        if self.round_us:
+            worked = IntegerDivision(worked + Value(self.round_us // 2), Value(self.round_us)) * Value(self.round_us)
+        if self.max_us is not None:
+            worked = Least(worked, Value(self.max_us))
+        return worked
+
+    def hours_for(self, worked):
+        """Stored hours of ``worked`` microseconds"""
+        return (self.adjust(max(worked, 0)) + MICROSECONDS_PER_STEP // 2) // MICROSECONDS_PER_STEP / 100
+
+    def hours(self, check_in, check_out):
+        """Stored hours of a record; 0.0 without both times"""
+        if not (check_in and check_out):
+            return 0.0
+        return self.hours_for((check_out - check_in) // timedelta(microseconds=1))
+
+    def expression(self):
+        """``hours()`` of the ``check_in_time`` and ``check_out_time`` of TimeRecord rows"""
+        worked = self.adjust_expression(Greatest(WorkedMicroseconds(F('check_in_time'), F('check_out_time')), Value(0)))
+        steps = IntegerDivision(worked + Value(MICROSECONDS_PER_STEP // 2), Value(MICROSECONDS_PER_STEP))
+        return Case(
+            When(check_in_time__isnull=False, check_out_time__isnull=False,
+                 then=Cast(steps, FloatField()) / Value(100.0)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+def get_policy():
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            config = settings.TIMEKEEPING_WORKING_HOURS_POLICY
+            _policy = import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+        return _policy
+
+
+@receiver(setting_changed)
+def reset_policy(setting=None, **kwargs):
+    """Drop the policy instance when its setting changes, e.g. under override_settings"""
+    global _policy
+    if setting in (None, 'TIMEKEEPING_WORKING_HOURS_POLICY'):
+        with _policy_lock:
+            _policy = None
+
+
+def recompute_working_hours(start, end, chunk_days=1, now=None):
+    """Apply the current policy to the records dated from ``start`` to ``end`` inclusive.
+
+    Archived records included. Each ``chunk_days`` days are one UPDATE
+    in their own transaction, which only touches rows whose hours
+    change; the monthly rollups of the changed months are rebuilt after.
+    Returns ``(records changed, months rebuilt)``.
+    """
+    now = now or timezone.now()
+    expression = get_policy().expression()
+    changed, months = 0, set()
+    day = start
+    while day <= end:
+        last = min(day + timedelta(days=chunk_days - 1), end)
+        with transaction.atomic():
+            for model in (TimeRecord, TimeRecordArchive):
+                stale = model.objects.filter(date__range=(day, last)).filter(~Q(working_hours=expression))
+                updated = stale.update(working_hours=expression, updated_at=now)
+                if updated:
+                    changed += updated
+                    months.update(iter_months((day.year, day.month), (last.year, last.month)))
+        day = last + timedelta(days=1)
+    for month in sorted(months):
+        rebuild_monthly_reports(month, month)
+    return changed, sorted(months)
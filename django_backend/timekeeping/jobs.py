@@ -0,0 +1,85 @@
+import traceback
+from tempfile import SpooledTemporaryFile
+
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import excel, routing
+from .models import ReportJob
+
+REPORTS = {
+    'MONTHLY': ('monthly_report_{month}_{year}{suffix}.xlsx', excel.monthly_report_sheets),
+    'COMPREHENSIVE': ('admin_comprehensive_report_{month}_{year}{suffix}.xlsx', excel.comprehensive_report_sheets),
+}
+
+
+def report_filename(job):
+    suffix = f'_{job.department.lower()}' if job.department else ''
+    return REPORTS[job.report_type][0].format(year=job.year, month=job.month, suffix=suffix)
+
+
+def submit_report_job(report_type, year, month, department='', user=None):
+    """Queue a report, merging into an identical pending job if there is one.
+
+    Returns ``(job, created)``.
+    """
+    params = {'report_type': report_type, 'year': year, 'month': month, 'department': department or ''}
+    job = ReportJob.objects.filter(status='PENDING', **params).first()
+    if job:
+        return job, False
+    try:
+        with transaction.atomic():
+            return ReportJob.objects.create(requested_by=user, **params), True
+    except IntegrityError:
+        # Lost the race against an identical request
+        return ReportJob.objects.get(status='PENDING', **params), False
+
+
+def claim_next_job():
+    """Move the oldest pending job to RUNNING, or return None if there is none.
+
+    The conditional UPDATE makes the claim safe with several workers
+    polling the same table.
+    """
+    for job_id in ReportJob.objects.filter(status='PENDING').order_by('created_at').values_list('id', flat=True)[:10]:
+        claimed = ReportJob.objects.filter(pk=job_id, status='PENDING').update(
+            status='RUNNING', started_at=timezone.now()
+        )
+        if claimed:
+            return job_id
+    return None
+
+
+def fail_stale_jobs(started_before):
+    """Fail jobs left RUNNING by a worker that died before finishing them"""
+    stale = ReportJob.objects.filter(status='RUNNING', started_at__lt=started_before)
+    return stale.update(
+        status='FAILED', error='Worker stopped before the report was finished', finished_at=timezone.now()
+    )
+
+
+def fail_job(job_id, error):
+    return ReportJob.objects.filter(pk=job_id, status='RUNNING').update(
+        status='FAILED', error=error, finished_at=timezone.now()
+    )
+
+
+def run_report_job(job_id):
+    """Generate the workbook of a claimed job and store it with the job"""
+    job = ReportJob.objects.get(pk=job_id)
+    sheets = REPORTS[job.report_type][1]
+    try:
+        with SpooledTemporaryFile(max_size=excel.SPOOL_MAX_SIZE) as fileobj:
+            with routing.reporting_reads():
+                excel.write_workbook(fileobj, sheets(job.year, job.month, job.department or None))
+            fileobj.seek(0)
+            job.file.save(report_filename(job), File(fileobj), save=False)
+    except Exception:
+        job.status = 'FAILED'
+        job.error = traceback.format_exc()
+    else:
+        job.status = 'DONE'
+    job.finished_at = timezone.now()
+    job.save(update_fields=['file', 'status', 'error', 'finished_at'])
+    return job.status
@@ -0,0 +1,43 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from timekeeping import archive
+from timekeeping.models import TimeRecord
+
+from .rebuild_monthly_reports import parse_month
+
+
+class Command(BaseCommand):
+    help = 'Move time records of months older than the hot window to the archive table'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--before', help='Only archive months before this one (YYYY-MM), defaults to the hot window')
+        parser.add_argument('--restore', metavar='YYYY-MM', action='append',
+                            help='Move an archived month back into the hot table instead (repeatable)')
+    
+    def handle(self, *args, **options):
+        if options['restore']:
+            for year, month in map(parse_month, options['restore']):
+                try:
+                    moved = archive.restore_month(year, month)
+                except ValueError as e:
+                    raise CommandError(str(e))
+                self.stdout.write(f'Restored {moved} records of {month:02d}/{year}')
+            return
+        
+        cutoff = archive.hot_window_start()
+        if options['before']:
+            cutoff = min(cutoff, date(*parse_month(options['before']), 1))
+        
+        months = TimeRecord.objects.filter(date__lt=cutoff).dates('date', 'month')
+        total = 0
+        for first in months:
+            try:
+                moved = archive.archive_month(first.year, first.month)
+            except ValueError as e:
+                self.stderr.write(f'Skipped: {e}')
+                continue
+            total += moved
+            self.stdout.write(f'Archived {moved} records of {first.month:02d}/{first.year}')
+        
+        self.stdout.write(self.style.SUCCESS(f'Archived {total} records'))
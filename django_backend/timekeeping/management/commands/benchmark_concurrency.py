@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from timekeeping import benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Compare throughput and tail latency of the WSGI and ASGI applications under concurrent clients'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=100, help='Employees, one token each (default: 100)')
+        parser.add_argument('--concurrency', type=int, default=64, help='Simultaneous clients (default: 64)')
+        parser.add_argument('--requests', type=int, default=2000, help='Timed requests per endpoint and mode (default: 2000)')
+        parser.add_argument('--threads', type=int, default=8, help='Worker threads of the WSGI server (default: 8)')
+        parser.add_argument('--endpoint', action='append', dest='endpoints', metavar='NAME',
+                            choices=[name for name, _, _ in benchmarks.LOAD_ENDPOINTS],
+                            help='Only compare this endpoint (repeatable)')
+        parser.add_argument('--output', default='concurrency-results.json', help='Where to write the results')
+
+    def log(self, mode, name, metrics):
+        self.stdout.write(
+            f"{mode:>6} {name:<24} {metrics['rps']:>9.1f} {metrics['p50_ms']:>9.1f} "
+            f"{metrics['p95_ms']:>9.1f} {metrics['p99_ms']:>9.1f} {metrics['errors']:>7}"
+        )
+
+    def handle(self, *args, **options):
+        if min(options['employees'], options['concurrency'], options['requests'], options['threads']) < 1:
+            raise CommandError('--employees, --concurrency, --requests and --threads must be positive')
+
+        self.stdout.write(f"{'mode':>6} {'endpoint':<24} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        with benchmarks.scratch_database():
+            results = benchmarks.run_load_comparison(
+                options['employees'], options['concurrency'], options['requests'], options['threads'],
+                options['endpoints'], log=self.log
+            )
+
+        options_used = {key: options[key] for key in ['employees', 'concurrency', 'requests', 'threads']}
+        benchmarks.write_results(options['output'], options_used, results)
+        self.stdout.write(f"Results written to {options['output']}")
+
+        errors = sum(metrics['errors'] for endpoints in results.values() for metrics in endpoints.values())
+        if errors:
+            raise CommandError(f'{errors} requests failed')
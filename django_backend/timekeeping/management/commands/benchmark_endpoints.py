@@ -0,0 +1,66 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from timekeeping import benchmarks
+
+
+def load_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise CommandError(f'Cannot read {path}: {e}')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the timekeeping endpoints on generated datasets in a scratch test database'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', type=int, nargs='+', default=benchmarks.SCALES,
+                            help='Employee counts to benchmark (default: 15 1000 10000)')
+        parser.add_argument('--months', type=int, default=1, help='Months of history per employee (default: 1)')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed requests per endpoint (default: 5)')
+        parser.add_argument('--endpoint', action='append', dest='endpoints', metavar='NAME',
+                            choices=[name for name, _, _, _ in benchmarks.ENDPOINTS],
+                            help='Only benchmark this endpoint (repeatable)')
+        parser.add_argument('--auth', action='store_true',
+                            help='Compare the query cost of database sessions, cached sessions and signed tokens instead')
+        parser.add_argument('--output', default='benchmark-results.json', help='Where to write the results')
+        parser.add_argument('--budgets', help='JSON budgets to check instead of the default query budgets')
+        parser.add_argument('--baseline', help='Results of an earlier run to compare against')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Allowed growth of wall time and memory over the baseline (default: 0.2)')
+    
+    def log(self, scale, name, metrics):
+        self.stdout.write(
+            f"{scale:>14} {name:<24} {metrics['wall_ms']:>10.1f} {metrics['wall_ms_max']:>10.1f} "
+            f"{metrics['queries']:>8} {metrics['peak_mib']:>9.1f}"
+        )
+    
+    def handle(self, *args, **options):
+        if min(options['scales']) < 1 or options['months'] < 1 or options['repeat'] < 1:
+            raise CommandError('--scales, --months and --repeat must be positive')
+        budgets = load_json(options['budgets']) if options['budgets'] else None
+        if options['auth'] and budgets is None:
+            budgets = benchmarks.AUTH_BUDGETS
+        baseline = load_json(options['baseline'])['results'] if options['baseline'] else None
+        
+        self.stdout.write(f"{'auth' if options['auth'] else 'scale':>14} {'endpoint':<24} {'median ms':>10} {'max ms':>10} {'queries':>8} {'peak MiB':>9}")
+        with benchmarks.scratch_database():
+            if options['auth']:
+                results = benchmarks.run_auth_benchmarks(options['repeat'], log=self.log)
+            else:
+                results = benchmarks.run_benchmarks(
+                    options['scales'], options['months'], options['repeat'], options['endpoints'], log=self.log
+                )
+        
+        options_used = {key: options[key] for key in ['scales', 'months', 'repeat', 'auth']}
+        benchmarks.write_results(options['output'], options_used, results)
+        self.stdout.write(f"Results written to {options['output']}")
+        
+        failures = benchmarks.check(results, budgets, baseline, options['threshold'])
+        for failure in failures:
+            self.stderr.write(failure)
+        if failures:
+            raise CommandError(f'{len(failures)} benchmark checks failed')
+        self.stdout.write(self.style.SUCCESS('All benchmark checks passed'))
@@ -0,0 +1,75 @@
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from tempfile import SpooledTemporaryFile
+
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from openpyxl import Workbook
+from timekeeping import excel
+
+
+def synthetic_rows(count):
+    """Detailed-record rows shaped like excel.detailed_rows()"""
+    start = datetime(2025, 1, 1, 1, 0)
+    for i in range(count):
+        check_in = start + timedelta(minutes=i % 90)
+        yield [
+            f"EMP{i % 10000:05d}",
+            f"Employee {i % 10000}",
+            'Engineering',
+            (date(2025, 1, 1) + timedelta(days=i % 28)).strftime('%Y-%m-%d'),
+            check_in.strftime('%H:%M:%S'),
+            (check_in + timedelta(hours=8)).strftime('%H:%M:%S'),
+            8.0,
+            'Checked Out',
+            ''
+        ]
+
+
+def in_memory_export(count):
+    """The previous approach: full Workbook saved into an HttpResponse"""
+    wb = Workbook()
+    ws = wb.active
+    ws.append(excel.DETAILED_HEADERS)
+    for row in synthetic_rows(count):
+        ws.append(row)
+    response = HttpResponse(content_type=excel.CONTENT_TYPE)
+    wb.save(response)
+    return response.content[:1]
+
+
+def write_only_export(count):
+    """The current approach: write-only workbook spooled to a temporary file, as the report worker does"""
+    with SpooledTemporaryFile(max_size=excel.SPOOL_MAX_SIZE) as fileobj:
+        excel.write_workbook(fileobj, [("Detailed Records", excel.DETAILED_HEADERS, synthetic_rows(count))])
+        fileobj.seek(0)
+        return fileobj.read(1)
+
+
+class Command(BaseCommand):
+    help = 'Compare peak memory and time to first byte of in-memory vs write-only Excel export'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000],
+                            help='Row counts to benchmark (default: 10000 100000)')
+
+    def measure(self, export, count):
+        started = time.perf_counter()
+        export(count)
+        first_byte = time.perf_counter() - started
+
+        tracemalloc.start()
+        export(count)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return first_byte, peak
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'rows':>8} {'mode':<10} {'first byte (s)':>15} {'peak memory (MiB)':>18}")
+        for count in options['rows']:
+            for mode, export in [('in-memory', in_memory_export), ('write-only', write_only_export)]:
+                first_byte, peak = self.measure(export, count)
+                self.stdout.write(f"{count:>8} {mode:<10} {first_byte:>15.2f} {peak / 2 ** 20:>18.1f}")
+        self.stdout.write('Both modes finish the whole workbook before its first byte is available, '
+                          'so write-only mode saves memory, not time to first byte.')
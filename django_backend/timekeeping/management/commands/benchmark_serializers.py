@@ -0,0 +1,93 @@
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from timekeeping import fast_serializers
+from timekeeping.models import Employee, TimeRecord
+from timekeeping.serializers import TimeRecordSerializer
+
+
+def model_serializer(queryset):
+    return TimeRecordSerializer(queryset, many=True).data
+
+
+def model_serializer_joined(queryset):
+    return TimeRecordSerializer(queryset.select_related('employee'), many=True).data
+
+
+def values_serializer(queryset):
+    return fast_serializers.serialize_time_records(fast_serializers.time_record_values(queryset))
+
+
+PATHS = [
+    ('ModelSerializer', model_serializer),
+    ('ModelSerializer + join', model_serializer_joined),
+    ('values()', values_serializer),
+]
+
+
+def create_records(employees, days):
+    """Synthetic employees with one checked-out record per day"""
+    users = User.objects.bulk_create(User(username=f'benchmark-{i}') for i in range(employees))
+    staff = Employee.objects.bulk_create(
+        Employee(user=user, employee_id=f'BENCH{i:05d}', full_name=f'Benchmark {i}',
+                 department='ENGINEERING', position='Developer')
+        for i, user in enumerate(users)
+    )
+    start = timezone.make_aware(timezone.datetime(2025, 1, 1, 8, 0))
+    TimeRecord.objects.bulk_create(
+        TimeRecord(employee=employee, date=date(2025, 1, 1) + timedelta(days=day),
+                   check_in_time=start + timedelta(days=day),
+                   check_out_time=start + timedelta(days=day, hours=8, minutes=15),
+                   status='CHECKED_OUT', working_hours=8.25)
+        for employee in staff for day in range(days)
+    )
+    return TimeRecord.objects.filter(employee__in=staff)
+
+
+class Command(BaseCommand):
+    help = 'Compare records/sec of the ModelSerializer and values() paths for time record listings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=100)
+        parser.add_argument('--days', type=int, default=100,
+                            help='Records per employee (default: 100)')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Runs per path; the fastest is reported (default: 3)')
+
+    def measure(self, serialize, queryset, repeat):
+        best = None
+        for _ in range(repeat):
+            queries = []
+
+            def count_query(execute, sql, params, many, context):
+                queries.append(sql)
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(count_query):
+                started = time.perf_counter()
+                data = serialize(queryset.all())
+                elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, len(queries), JSONRenderer().render(data)
+
+    def handle(self, *args, **options):
+        # The synthetic records are rolled back once measured
+        with transaction.atomic():
+            records = create_records(options['employees'], options['days'])
+            count = records.count()
+            self.stdout.write(f"{count} records")
+            self.stdout.write(f"{'path':<24} {'queries':>8} {'seconds':>8} {'records/s':>10}")
+            outputs = set()
+            for name, serialize in PATHS:
+                elapsed, queries, output = self.measure(serialize, records, options['repeat'])
+                outputs.add(output)
+                self.stdout.write(f"{name:<24} {queries:>8} {elapsed:>8.3f} {count / elapsed:>10.0f}")
+            transaction.set_rollback(True)
+
+        if len(outputs) != 1:
+            self.stderr.write('Outputs differ between paths')
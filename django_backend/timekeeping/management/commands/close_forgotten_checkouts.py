@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from timekeeping.attendance import close_forgotten_checkouts
+
+
+def parse_before(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        pass
+    try:
+        cutoff = parse_datetime(value)
+    except ValueError:
+        cutoff = None
+    if cutoff is None:
+        raise CommandError(f'Invalid cutoff "{value}", expected YYYY-MM-DD or YYYY-MM-DDTHH:MM[:SS]')
+    return cutoff if timezone.is_aware(cutoff) else timezone.make_aware(cutoff)
+
+
+class Command(BaseCommand):
+    help = 'Mark time records left checked in on earlier days as forgotten checkouts'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--before',
+            help='Close records dated before this day (YYYY-MM-DD) or checked in before this time '
+                 '(YYYY-MM-DDTHH:MM[:SS]), defaults to today'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Records closed per transaction (default: 1000)')
+    
+    def handle(self, *args, **options):
+        before = None
+        if options['before']:
+            before = parse_before(options['before'])
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        
+        closed = close_forgotten_checkouts(before=before, batch_size=options['batch_size'])
+        
+        self.stdout.write(self.style.SUCCESS(f'Closed {closed} forgotten checkouts'))
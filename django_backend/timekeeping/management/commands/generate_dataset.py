@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from timekeeping.datasets import DEFAULT_PASSWORD, generate_dataset
+from timekeeping.management.commands.rebuild_monthly_reports import parse_month
+from timekeeping.models import Employee
+
+
+def rate(value):
+    value = float(value)
+    if not 0 <= value <= 1:
+        raise ValueError(value)
+    return value
+
+
+class Command(BaseCommand):
+    help = 'Create synthetic employees with months of attendance history for load tests'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=1000, help='Employees to create (default: 1000)')
+        parser.add_argument('--months', type=int, default=12, help='Months of history (default: 12)')
+        parser.add_argument('--end', help='Last month of history (YYYY-MM), defaults to the previous month')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+        parser.add_argument('--prefix', default='GEN', help='Employee ID prefix (default: GEN)')
+        parser.add_argument('--forgot-rate', type=rate, default=0.03,
+                            help='Share of worked days with a forgotten checkout (default: 0.03)')
+        parser.add_argument('--absence-rate', type=rate, default=0.05,
+                            help='Share of weekdays without a record (default: 0.05)')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD,
+                            help=f'Password of every generated user (default: {DEFAULT_PASSWORD})')
+    
+    def handle(self, *args, **options):
+        if options['employees'] < 1 or options['months'] < 0:
+            raise CommandError('--employees must be positive and --months must not be negative')
+        if not options['prefix'].isalnum() or len(options['prefix']) > 4:
+            raise CommandError('--prefix must be at most 4 letters or digits')
+        if Employee.objects.filter(employee_id__startswith=options['prefix']).exists():
+            raise CommandError(f'Employees with prefix {options["prefix"]} already exist, choose another --prefix')
+        
+        started = time.perf_counter()
+        employees, records = generate_dataset(
+            options['employees'],
+            options['months'],
+            end=parse_month(options['end']) if options['end'] else None,
+            seed=options['seed'],
+            prefix=options['prefix'],
+            forgot_rate=options['forgot_rate'],
+            absence_rate=options['absence_rate'],
+            password=options['password'],
+        )
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Created {employees} employees and {records} time records in {time.perf_counter() - started:.1f}s'
+            )
+        )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from timekeeping.punches import UPSERT_BATCH_SIZE, PunchFileError, import_punches
+
+
+class Command(BaseCommand):
+    help = 'Import a CSV of badge reader punches (employee_id, timestamp) as time records'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Punch file to import')
+        parser.add_argument('--encoding', default='utf-8-sig', help='File encoding (default: utf-8-sig)')
+        parser.add_argument('--batch-size', type=int, default=UPSERT_BATCH_SIZE,
+                            help=f'Records upserted per statement (default: {UPSERT_BATCH_SIZE})')
+    
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        try:
+            with open(options['path'], encoding=options['encoding'], newline='') as lines:
+                result = import_punches(lines, batch_size=options['batch_size'])
+        except (OSError, UnicodeDecodeError, PunchFileError) as e:
+            raise CommandError(str(e))
+        
+        for error in result['errors']:
+            self.stderr.write(error)
+        if result['unknown_employees']:
+            self.stderr.write(f"Skipped punches of unknown employees: {', '.join(result['unknown_employees'])}")
+        memory = f"{result['peak_memory_mib']:.1f} MiB" if result['peak_memory_mib'] is not None else 'n/a'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result['rows']} punches into {result['records']} time records "
+                f"({result['invalid_rows']} invalid) in {result['seconds']}s, "
+                f"{result['rows_per_second']} rows/s, peak memory {memory}"
+            )
+        )
@@ -0,0 +1,52 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from timekeeping.archive import record_bounds
+from timekeeping.models import Employee
+from timekeeping.rollups import rebuild_monthly_reports
+
+
+def parse_month(value):
+    try:
+        parsed = datetime.strptime(value, '%Y-%m')
+    except ValueError:
+        raise CommandError(f'Invalid month "{value}", expected YYYY-MM')
+    return parsed.year, parsed.month
+
+
+class Command(BaseCommand):
+    help = 'Rebuild MonthlyReport rollups from time records'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='first',
+                            help='First month to rebuild (YYYY-MM), defaults to the oldest record, archived ones included')
+        parser.add_argument('--to', dest='last', help='Last month to rebuild (YYYY-MM), defaults to the newest record')
+        parser.add_argument('--employee', action='append', dest='employees', metavar='EMPLOYEE_ID',
+                            help='Only rebuild this employee (repeatable)')
+    
+    def handle(self, *args, **options):
+        oldest, newest = record_bounds()
+        if oldest is None and not (options['first'] and options['last']):
+            self.stdout.write('No time records to roll up')
+            return
+        
+        first = parse_month(options['first']) if options['first'] else (oldest.year, oldest.month)
+        last = parse_month(options['last']) if options['last'] else (newest.year, newest.month)
+        if first > last:
+            raise CommandError('--from must not be after --to')
+        
+        employee_ids = None
+        if options['employees']:
+            employee_ids = list(
+                Employee.objects.filter(employee_id__in=options['employees']).values_list('id', flat=True)
+            )
+            if len(employee_ids) != len(set(options['employees'])):
+                raise CommandError('Unknown employee ID in --employee')
+        
+        written = rebuild_monthly_reports(first, last, employee_ids)
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Rebuilt {written} monthly reports for {first[1]:02d}/{first[0]} - {last[1]:02d}/{last[0]}'
+            )
+        )
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from timekeeping.hours import recompute_working_hours
+
+
+def parse_day(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Invalid date "{value}", expected YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = 'Recompute working_hours of past time records under the configured working-hours policy'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', required=True, help='First day to recompute (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='end', help='Last day to recompute (YYYY-MM-DD), defaults to today')
+        parser.add_argument('--chunk-days', type=int, default=1,
+                            help='Days updated per statement and transaction (default: 1)')
+    
+    def handle(self, *args, **options):
+        start = parse_day(options['start'])
+        end = parse_day(options['end']) if options['end'] else timezone.now().date()
+        if start > end:
+            raise CommandError('--from must not be after --to')
+        if options['chunk_days'] < 1:
+            raise CommandError('--chunk-days must be positive')
+        
+        changed, months = recompute_working_hours(start, end, chunk_days=options['chunk_days'])
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Recomputed {changed} time records; rebuilt the reports of {len(months)} months'
+        ))
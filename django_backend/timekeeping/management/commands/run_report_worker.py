@@ -0,0 +1,65 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import timedelta
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+
+def init_process():
+    # Runs in a freshly spawned interpreter, before any job is unpickled
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Generate queued report jobs in a pool of worker processes'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help='Number of worker processes (default: 2)')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to wait between polls when the queue is empty (default: 2)')
+        parser.add_argument('--stale-after', type=int, default=60,
+                            help='Fail RUNNING jobs started more than this many minutes ago (default: 60)')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+    
+    def handle(self, *args, **options):
+        # Imported here so that spawned children can load this module before django.setup()
+        from timekeeping.jobs import claim_next_job, fail_job, fail_stale_jobs, run_report_job
+        
+        stale = fail_stale_jobs(timezone.now() - timedelta(minutes=options['stale_after']))
+        if stale:
+            self.stdout.write(self.style.WARNING(f'Marked {stale} stale jobs as failed'))
+        
+        # Children open their own connections
+        connections.close_all()
+        running = {}
+        with ProcessPoolExecutor(
+            max_workers=options['processes'],
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_process,
+        ) as pool:
+            while True:
+                while len(running) < options['processes']:
+                    job_id = claim_next_job()
+                    if job_id is None:
+                        break
+                    self.stdout.write(f'Started job {job_id}')
+                    running[pool.submit(run_report_job, job_id)] = job_id
+                
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                
+                done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = running.pop(future)
+                    try:
+                        self.stdout.write(f'Finished job {job_id}: {future.result()}')
+                    except Exception as exc:
+                        fail_job(job_id, repr(exc))
+                        self.stderr.write(f'Job {job_id} crashed: {exc!r}')
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+from timekeeping.routing import reporting_alias, sync_sqlite_replica
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database over the reporting database (local stand-in for replication)'
+
+    def handle(self, *args, **options):
+        alias = reporting_alias()
+        if alias is None:
+            raise CommandError('No reporting database configured; set HRMS_REPORTING_DATABASE')
+        try:
+            sync_sqlite_replica(alias)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(f'Copied the primary database to "{alias}"'))
@@ -0,0 +1,104 @@
+"""Per-action request metrics, exposed in the Prometheus text format.
+
+Metrics live in process memory: each worker process reports its own
+numbers, so scrape every process (or run a single one) to see them all.
+"""
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+QUERY_BUCKETS = [0, 1, 2, 5, 10, 25, 50, 100, 250, 1000]
+SIZE_BUCKETS = [1000, 10000, 100000, 1000000, 10000000, 100000000]
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self):
+        """``(le, cumulative count)`` pairs ending with ``+Inf``, then the sum"""
+        total = 0
+        cumulative = []
+        for le, count in zip(self.buckets + ['+Inf'], self.counts):
+            total += count
+            cumulative.append((le, total))
+        return cumulative, self.sum
+
+
+class RequestMetrics:
+    """Latency, query and response size metrics keyed by action"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+            self.queries = defaultdict(lambda: Histogram(QUERY_BUCKETS))
+            self.sizes = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+            self.query_seconds = defaultdict(float)
+            self.responses = defaultdict(int)
+
+    def observe(self, action, status, seconds, queries, query_seconds, size):
+        with self.lock:
+            self.latency[action].observe(seconds)
+            self.queries[action].observe(queries)
+            self.query_seconds[action] += query_seconds
+            self.responses[action, status] += 1
+            if size is not None:
+                self.sizes[action].observe(size)
+
+    def render(self):
+        with self.lock:
+            lines = []
+            render_histogram(lines, 'timekeeping_request_duration_seconds',
+                             'Request latency per action', self.latency)
+            render_histogram(lines, 'timekeeping_request_db_queries',
+                             'Database queries per request', self.queries)
+            render_histogram(lines, 'timekeeping_response_size_bytes',
+                             'Response body size per action', self.sizes)
+            lines += [
+                '# HELP timekeeping_db_query_duration_seconds_total Time spent in database queries',
+                '# TYPE timekeeping_db_query_duration_seconds_total counter',
+            ]
+            for action, seconds in sorted(self.query_seconds.items()):
+                lines.append(f'timekeeping_db_query_duration_seconds_total{labels(action=action)} {seconds!r}')
+            lines += [
+                '# HELP timekeeping_responses_total Responses per action and status code',
+                '# TYPE timekeeping_responses_total counter',
+            ]
+            for (action, status), count in sorted(self.responses.items()):
+                lines.append(f'timekeeping_responses_total{labels(action=action, status=status)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def labels(**values):
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in values.items()) + '}'
+
+
+def render_histogram(lines, name, help_text, histograms):
+    lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for action, histogram in sorted(histograms.items()):
+        cumulative, total = histogram.samples()
+        for le, count in cumulative:
+            lines.append(f'{name}_bucket{labels(action=action, le=le)} {count}')
+        lines.append(f'{name}_sum{labels(action=action)} {total!r}')
+        lines.append(f'{name}_count{labels(action=action)} {cumulative[-1][1]}')
+
+
+registry = RequestMetrics()
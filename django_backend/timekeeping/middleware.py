@@ -0,0 +1,194 @@
+import heapq
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+
+from . import routing
+from .metrics import registry
+
+slow_request_logger = logging.getLogger('timekeeping.slow_requests')
+
+SLOW_REQUEST_TOP_QUERIES = 5
+
+
+def action_name(request):
+    """``basename.action`` of the DRF route that served the request, e.g. ``timerecord.checkin_checkout``"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    actions = getattr(match.func, 'actions', None)
+    basename = getattr(match.func, 'initkwargs', {}).get('basename')
+    if actions and basename:
+        return f'{basename}.{actions.get(request.method.lower(), request.method.lower())}'
+    return match.view_name
+
+
+class QueryTimer:
+    """Database execute wrapper counting and timing the queries of one request"""
+
+    def __init__(self, keep=SLOW_REQUEST_TOP_QUERIES):
+        self.count = 0
+        self.seconds = 0.0
+        self.keep = keep
+        self.top = []  # min-heap of the slowest (duration, sql) pairs
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.seconds += duration
+            if len(self.top) < self.keep:
+                heapq.heappush(self.top, (duration, sql))
+            elif duration > self.top[0][0]:
+                heapq.heapreplace(self.top, (duration, sql))
+
+    def slowest(self):
+        return sorted(self.top, reverse=True)
+
+
+class HybridMiddleware:
+    """Base of middleware that runs natively in both the WSGI and the ASGI stack.
+
+    Subclasses implement ``call`` for the sync stack and ``acall`` for the
+    async one.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.acall(request)
+        return self.call(request)
+
+
+@contextmanager
+def execute_wrapper(wrapper):
+    """Install ``wrapper`` on the connection of every database alias, e.g. the reporting database too"""
+    with ExitStack() as stack:
+        for alias_connection in connections.all():
+            stack.enter_context(alias_connection.execute_wrapper(wrapper))
+        yield
+
+
+def _add_execute_wrapper(wrapper):
+    for alias_connection in connections.all():
+        alias_connection.execute_wrappers.append(wrapper)
+
+
+def _remove_execute_wrapper(wrapper):
+    for alias_connection in connections.all():
+        alias_connection.execute_wrappers.remove(wrapper)
+
+
+class RequestMetricsMiddleware(HybridMiddleware):
+    """Record latency, queries and response size of every request per action.
+
+    Streaming responses are measured until their last chunk is sent.
+    Requests slower than ``TIMEKEEPING_SLOW_REQUEST_SECONDS`` are logged to
+    ``timekeeping.slow_requests`` with their slowest queries.
+    """
+
+    def call(self, request):
+        started = time.perf_counter()
+        timer = QueryTimer()
+        with execute_wrapper(timer):
+            response = self.get_response(request)
+        return self.observe(request, response, started, timer)
+
+    async def acall(self, request):
+        started = time.perf_counter()
+        timer = QueryTimer()
+        # The ORM runs in the request's thread-sensitive worker thread, so the wrapper goes on its connections
+        await sync_to_async(_add_execute_wrapper)(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(_remove_execute_wrapper)(timer)
+        return self.observe(request, response, started, timer)
+
+    def observe(self, request, response, started, timer):
+        action = action_name(request)
+
+        if response.streaming and not response.is_async:
+            response.streaming_content = self.stream(
+                response.streaming_content, request, response, action, started, timer
+            )
+        else:
+            size = None if response.streaming else len(response.content)
+            self.finish(request, response, action, started, timer, size)
+        return response
+
+    def stream(self, content, request, response, action, started, timer):
+        size = 0
+        try:
+            with execute_wrapper(timer):
+                for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            self.finish(request, response, action, started, timer, size)
+
+    def finish(self, request, response, action, started, timer, size):
+        elapsed = time.perf_counter() - started
+        registry.observe(action, response.status_code, elapsed, timer.count, timer.seconds, size)
+        if elapsed >= settings.TIMEKEEPING_SLOW_REQUEST_SECONDS:
+            slow_request_logger.warning(
+                'Slow request %s %s (%s): %.3fs, %d queries in %.3fs. Slowest queries:\n%s',
+                request.method, request.get_full_path(), action, elapsed, timer.count, timer.seconds,
+                '\n'.join(f'{duration * 1000:.1f} ms: {sql}' for duration, sql in timer.slowest()),
+            )
+
+
+class ReplicaPinMiddleware(HybridMiddleware):
+    """Keep a client's reads on the primary for a while after it writes.
+
+    Reads of the rest of the writing request are pinned by the router; the
+    cookie carries the pin to the client's next requests, which could
+    otherwise read from a replica that has not caught up yet.
+    """
+
+    def call(self, request):
+        with routing.request_pin(routing.PIN_COOKIE in request.COOKIES) as pin:
+            response = self.get_response(request)
+        return self.set_pin_cookie(response, pin)
+
+    async def acall(self, request):
+        with routing.request_pin(routing.PIN_COOKIE in request.COOKIES) as pin:
+            response = await self.get_response(request)
+        return self.set_pin_cookie(response, pin)
+
+    def set_pin_cookie(self, response, pin):
+        if pin.wrote and routing.reporting_alias():
+            response.set_cookie(routing.PIN_COOKIE, '1', max_age=settings.TIMEKEEPING_REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
+
+
+class AsyncRoutesMiddleware(HybridMiddleware):
+    """Resolve requests of the ASGI application against ``TIMEKEEPING_ASGI_URLCONF``.
+
+    That URL configuration puts the async check-in and status views in
+    front of the DRF actions, which keep serving WSGI.
+    """
+
+    def call(self, request):
+        return self.get_response(request)
+
+    async def acall(self, request):
+        if isinstance(request, ASGIRequest):
+            request.urlconf = settings.TIMEKEEPING_ASGI_URLCONF
+        return await self.get_response(request)
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-17 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timekeeping', '0002_reportjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timerecord',
+            index=models.Index(condition=models.Q(('status', 'CHECKED_IN')), fields=['date'], name='timerecord_open_date_idx'),
+        ),
+    ]
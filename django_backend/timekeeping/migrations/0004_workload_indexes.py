@@ -0,0 +1,21 @@
+# Generated by Django 5.2.3 on 2026-10-17 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timekeeping', '0003_timerecord_open_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='monthlyreport',
+            index=models.Index(fields=['year', 'month'], name='monthlyreport_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timerecord',
+            index=models.Index(fields=['date', 'status'], name='timerecord_date_status_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 00:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timekeeping', '0004_workload_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timerecord',
+            index=models.Index(fields=['date', 'employee', 'working_hours', 'forgot_checkout'], name='timerecord_analytics_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.3 on 2026-10-18 00:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timekeeping', '0005_analytics_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('month', models.IntegerField()),
+                ('records', models.IntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['year', 'month'],
+                'unique_together': {('year', 'month')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TimeRecordArchive',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('check_in_time', models.DateTimeField(blank=True, null=True)),
+                ('check_out_time', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('CHECKED_IN', 'Checked In'), ('CHECKED_OUT', 'Checked Out'), ('FORGOT_CHECKOUT', 'Forgot to Checkout')], max_length=20)),
+                ('working_hours', models.FloatField()),
+                ('forgot_checkout', models.BooleanField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_records', to='timekeeping.employee')),
+            ],
+            options={
+                'ordering': ['-date', '-check_in_time'],
+                'indexes': [models.Index(fields=['date'], name='timerecordarchive_date_idx')],
+                'unique_together': {('employee', 'date')},
+            },
+        ),
+    ]
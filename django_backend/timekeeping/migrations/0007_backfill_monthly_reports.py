@@ -0,0 +1,61 @@
+import calendar
+from datetime import date
+
+from django.db import migrations
+from django.db.models import Count, FloatField, Max, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def month_stats(records):
+    return records.values('employee_id').annotate(
+        total_working_days=Count('pk', filter=Q(check_in_time__isnull=False)),
+        total_working_hours=Coalesce(Sum('working_hours'), Value(0.0), output_field=FloatField()),
+        days_forgot_checkout=Count('pk', filter=Q(forgot_checkout=True)),
+    ).order_by()
+
+
+def backfill_monthly_reports(apps, schema_editor):
+    """Roll up every month of existing records, hot and archived, as rebuild_monthly_reports does.
+
+    Reports and stats read MonthlyReport only, so history recorded before
+    the rollup existed would otherwise show as empty months.
+    """
+    MonthlyReport = apps.get_model('timekeeping', 'MonthlyReport')
+    sources = [apps.get_model('timekeeping', 'TimeRecord'), apps.get_model('timekeeping', 'TimeRecordArchive')]
+    bounds = [source.objects.aggregate(first=Min('date'), last=Max('date')) for source in sources]
+    days = [day for bound in bounds for day in bound.values() if day is not None]
+    if not days:
+        return
+
+    year, month = min(days).year, min(days).month
+    last = (max(days).year, max(days).month)
+    while (year, month) <= last:
+        start = date(year, month, 1)
+        end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        totals = {}
+        for source in sources:
+            for stats in month_stats(source.objects.filter(date__gte=start, date__lt=end)):
+                row = totals.setdefault(stats['employee_id'], [0, 0.0, 0])
+                row[0] += stats['total_working_days']
+                row[1] += stats['total_working_hours']
+                row[2] += stats['days_forgot_checkout']
+        month_days = calendar.monthrange(year, month)[1]
+        MonthlyReport.objects.filter(year=year, month=month).delete()
+        MonthlyReport.objects.bulk_create([
+            MonthlyReport(employee_id=employee_id, year=year, month=month, total_working_days=working_days,
+                          total_working_hours=round(hours, 2), days_forgot_checkout=forgot,
+                          days_off=month_days - working_days)
+            for employee_id, (working_days, hours, forgot) in totals.items()
+        ], batch_size=1000)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timekeeping', '0006_timerecord_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_monthly_reports, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-18 01:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timekeeping', '0007_backfill_monthly_reports'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='reportjob',
+            name='unique_pending_report_job',
+        ),
+        migrations.AddField(
+            model_name='reportjob',
+            name='department',
+            field=models.CharField(blank=True, choices=[('ENGINEERING', 'Engineering'), ('QA', 'Quality Assurance'), ('DEVOPS', 'DevOps'), ('PRODUCT', 'Product Management'), ('DESIGN', 'UI/UX Design'), ('MARKETING', 'Marketing'), ('HR', 'Human Resources'), ('SALES', 'Sales')], max_length=20),
+        ),
+        migrations.AddConstraint(
+            model_name='reportjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'PENDING')), fields=('report_type', 'year', 'month', 'department'), name='unique_pending_report_job'),
+        ),
+    ]
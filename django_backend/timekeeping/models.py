@@ -26,6 +26,11 @@ class Employee(models.Model):
     
     def __str__(self):
         return f"{self.employee_id} - {self.full_name}"
+    
+    @property
+    def is_time_tracking_exempt(self):
+        """Admin accounts manage the system and do not check in/out"""
+        return self.employee_id == 'ADMIN001' or self.department == 'HR' and self.position == 'System Administrator'
 
 class TimeRecord(models.Model):
     STATUS_CHOICES = [
@@ -48,18 +53,83 @@ class TimeRecord(models.Model):
     class Meta:
         unique_together = ['employee', 'date']
         ordering = ['-date', '-check_in_time']
+        indexes = [
+            # Month ranges across all employees, optionally narrowed by status
+            models.Index(fields=['date', 'status'], name='timerecord_date_status_idx'),
+            # Open records only, for the forgotten-checkout sweep
+            models.Index(fields=['date'], condition=models.Q(status='CHECKED_IN'), name='timerecord_open_date_idx'),
+            # Covers the analytics column fetch, so it never touches the table
+            models.Index(fields=['date', 'employee', 'working_hours', 'forgot_checkout'],
+                         name='timerecord_analytics_idx'),
+        ]
     
     def __str__(self):
         return f"{self.employee.full_name} - {self.date} - {self.status}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._rollup_snapshot = instance.rollup_snapshot()
+        return instance
+    
+    def rollup_snapshot(self):
+        """This record's contribution to its MonthlyReport row, or None if unknown"""
+        if self.get_deferred_fields() & {'employee_id', 'date', 'check_in_time', 'working_hours', 'forgot_checkout'}:
+            return None
+        day = self._meta.get_field('date').to_python(self.date)
+        return (
+            self.employee_id,
+            day.year,
+            day.month,
+            int(self.check_in_time is not None),
+            self.working_hours,
+            int(self.forgot_checkout),
+        )
+    
     def calculate_working_hours(self):
-        if self.check_in_time and self.check_out_time:
-            delta = self.check_out_time - self.check_in_time
-            self.working_hours = round(delta.total_seconds() / 3600, 2)
-        else:
-            self.working_hours = 0.0
+        """Set ``working_hours`` under the configured working-hours policy"""
+        from .hours import get_policy
+        self.working_hours = get_policy().hours(self.check_in_time, self.check_out_time)
         return self.working_hours
 
+class TimeRecordArchive(models.Model):
+    """Time records of archived months, moved out of TimeRecord by archive_timerecords"""
+    id = models.UUIDField(primary_key=True, editable=False)
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='archived_records')
+    date = models.DateField()
+    check_in_time = models.DateTimeField(null=True, blank=True)
+    check_out_time = models.DateTimeField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=TimeRecord.STATUS_CHOICES)
+    working_hours = models.FloatField()
+    forgot_checkout = models.BooleanField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    
+    class Meta:
+        unique_together = ['employee', 'date']
+        ordering = ['-date', '-check_in_time']
+        indexes = [
+            # Whole-month reads; an employee's month uses the unique index
+            models.Index(fields=['date'], name='timerecordarchive_date_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.employee.full_name} - {self.date} - {self.status} (archived)"
+
+class ArchivedMonth(models.Model):
+    """A month whose time records live in TimeRecordArchive"""
+    year = models.IntegerField()
+    month = models.IntegerField()
+    records = models.IntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['year', 'month']
+        ordering = ['year', 'month']
+    
+    def __str__(self):
+        return f"{self.month}/{self.year} ({self.records} records)"
+
 class MonthlyReport(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE)
@@ -73,6 +143,51 @@ class MonthlyReport(models.Model):
     
     class Meta:
         unique_together = ['employee', 'year', 'month']
+        indexes = [
+            # Whole-month rebuilds
+            models.Index(fields=['year', 'month'], name='monthlyreport_period_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.employee.full_name} - {self.month}/{self.year}"
+
+class ReportJob(models.Model):
+    REPORT_TYPES = [
+        ('MONTHLY', 'Monthly Report'),
+        ('COMPREHENSIVE', 'Comprehensive Report'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    report_type = models.CharField(max_length=20, choices=REPORT_TYPES)
+    year = models.IntegerField()
+    month = models.IntegerField()
+    # Blank for a report of every department
+    department = models.CharField(max_length=20, choices=Employee.DEPARTMENTS, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    requested_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    file = models.FileField(upload_to='reports/', blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            # Identical pending requests share one job
+            models.UniqueConstraint(
+                fields=['report_type', 'year', 'month', 'department'],
+                condition=models.Q(status='PENDING'),
+                name='unique_pending_report_job',
+            ),
+        ]
     
     def __str__(self):
-        return f"{self.employee.full_name} - {self.month}/{self.year}"
\ No newline at end of file
+        return f"{self.get_report_type_display()} {self.month}/{self.year} - {self.status}"
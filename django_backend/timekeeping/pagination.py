@@ -0,0 +1,32 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination with the page size taken from ``?page_size=``.
+
+    Pages are fetched with ``WHERE key < cursor LIMIT n`` on an indexed
+    ordering, so a page deep into history costs the same as the first.
+    The default size is ``REST_FRAMEWORK['PAGE_SIZE']``. Lists are only
+    paginated on request, with ``?cursor=`` or ``?page_size=``; otherwise
+    they stay the plain list existing clients expect.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def is_requested(self, request):
+        """True if the client asked for a page rather than the plain list"""
+        return self.cursor_query_param in request.query_params or self.page_size_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class TimeRecordPagination(KeysetPagination):
+    # Dates are unique per employee, so the cursor position is exact for an employee's history
+    ordering = ('-date', '-check_in_time', '-id')
+
+
+class EmployeePagination(KeysetPagination):
+    ordering = ('employee_id',)
@@ -0,0 +1,34 @@
+import calendar
+from datetime import date
+
+
+def days_in_month(year, month):
+    return calendar.monthrange(year, month)[1]
+
+
+def month_bounds(year, month):
+    """First day of the month and first day of the next one"""
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def date_range(start, end, field='date'):
+    """Lookups for the half-open range ``start <= field < end``.
+
+    Plain comparisons on the column let the planner use an index, unlike
+    ``__year``/``__month`` which compile to function calls on some backends.
+    """
+    return {f'{field}__gte': start, f'{field}__lt': end}
+
+
+def in_month(year, month, field='date'):
+    return date_range(*month_bounds(year, month), field=field)
+
+
+def iter_months(first, last):
+    """Yield (year, month) pairs from ``first`` to ``last`` inclusive"""
+    year, month = first
+    while (year, month) <= tuple(last):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
@@ -0,0 +1,189 @@
+import asyncio
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import TimeRecord
+
+
+# Queued in place of the deltas a subscriber fell too far behind on; it should take a new snapshot
+RESYNC = object()
+
+
+class Subscription:
+    """Deltas published to one listener, delivered on its event loop.
+
+    At most ``TIMEKEEPING_PRESENCE_QUEUE_SIZE`` deltas wait in the queue;
+    a listener that falls further behind gets RESYNC instead of them.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=settings.TIMEKEEPING_PRESENCE_QUEUE_SIZE)
+
+    def publish(self, delta):
+        self.loop.call_soon_threadsafe(self.put, delta)
+
+    def put(self, delta):
+        try:
+            self.queue.put_nowait(delta)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    async def get(self, timeout=None):
+        """Next delta, RESYNC, or None if ``timeout`` seconds pass without one"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.backend.unsubscribe(self)
+
+
+class PresenceBackend:
+    """Who is checked in right now, per employee and per department.
+
+    Subclasses hold the state and fan deltas out to subscribers; the
+    default LocalPresenceBackend keeps everything in process memory.
+    """
+
+    def load(self, day, states):
+        """Replace the state with ``(employee_id, department, status)`` rows for ``day``"""
+        raise NotImplementedError
+
+    def update(self, day, employee_id, department, status):
+        """Record a status change and publish it as a delta.
+
+        A change for a day after the loaded one rolls the state over to
+        that day, starting with nobody checked in.
+        """
+        raise NotImplementedError
+
+    def snapshot(self, day):
+        """``{'date', 'departments', 'employees'}`` for ``day``, or None if not loaded"""
+        raise NotImplementedError
+
+    def subscribe(self):
+        """A Subscription receiving every delta published from now on"""
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class LocalPresenceBackend(PresenceBackend):
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.day = None
+        self.employees = {}
+        self.departments = Counter()
+        self.subscribers = set()
+
+    def load(self, day, states):
+        with self.lock:
+            self.day = day
+            self.employees = {employee_id: (department, status) for employee_id, department, status in states}
+            self.departments = Counter(
+                department for department, status in self.employees.values() if status == 'CHECKED_IN'
+            )
+
+    def update(self, day, employee_id, department, status):
+        with self.lock:
+            if self.day is None or day < self.day:
+                # Not loaded yet; the next snapshot reads the day from the database
+                return
+            if day > self.day:
+                self.day, self.employees, self.departments = day, {}, Counter()
+            previous = self.employees.get(employee_id, (department, None))
+            if previous[1] == 'CHECKED_IN':
+                self.departments[previous[0]] -= 1
+            if status == 'CHECKED_IN':
+                self.departments[department] += 1
+            self.employees[employee_id] = (department, status)
+            delta = {
+                'date': day.isoformat(),
+                'employee_id': employee_id,
+                'department': department,
+                'status': status,
+                'checked_in': self.departments[department],
+            }
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            subscription.publish(delta)
+
+    def snapshot(self, day):
+        with self.lock:
+            if day != self.day:
+                return None
+            return {
+                'date': day.isoformat(),
+                'departments': {department: count for department, count in self.departments.items() if count},
+                'employees': {employee_id: status for employee_id, (_, status) in self.employees.items()},
+            }
+
+    def subscribe(self):
+        subscription = Subscription(self)
+        with self.lock:
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = import_string(settings.TIMEKEEPING_PRESENCE_BACKEND)()
+        return _backend
+
+
+def reset_backend():
+    """Drop the backend instance, so the next use builds a fresh one"""
+    global _backend
+    with _backend_lock:
+        _backend = None
+
+
+def load_day(backend, day):
+    states = TimeRecord.objects.filter(date=day).values_list(
+        'employee__employee_id', 'employee__department', 'status'
+    )
+    backend.load(day, states)
+
+
+def get_snapshot(today=None):
+    """Today's presence, loaded from today's records the first time it is asked for"""
+    today = today or timezone.now().date()
+    backend = get_backend()
+    snapshot = backend.snapshot(today)
+    if snapshot is None:
+        load_day(backend, today)
+        snapshot = backend.snapshot(today)
+    return snapshot
+
+
+def reload(day):
+    """Re-read ``day`` after records were written without going through record_changed()"""
+    backend = get_backend()
+    if backend.snapshot(day) is not None:
+        load_day(backend, day)
+
+
+def record_changed(employee, record):
+    """Publish a committed change of today's record"""
+    get_backend().update(record.date, employee.employee_id, employee.department, record.status)
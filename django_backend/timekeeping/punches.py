@@ -0,0 +1,162 @@
+"""Import punch logs exported by the door badge readers.
+
+A punch file is a CSV with an ``employee_id`` column (the employee code,
+e.g. ``EMP001``) and a ``timestamp`` column in ISO 8601; naive times are
+taken in the configured time zone. Other columns are ignored. The file
+is read one line at a time and only the first and last punch of every
+employee-day is kept, so memory grows with employee-days, not punches.
+
+Each employee-day becomes one TimeRecord, upserted on (employee, date):
+the file is authoritative for the days it covers, and importing the same
+file twice leaves the same records.
+"""
+import csv
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import archive, presence
+from .models import Employee, TimeRecord
+from .rollups import rebuild_monthly_reports
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+UPSERT_BATCH_SIZE = 2000
+UPDATE_FIELDS = ['check_in_time', 'check_out_time', 'status', 'working_hours', 'forgot_checkout', 'updated_at']
+MAX_REPORTED_ERRORS = 20
+
+
+class PunchFileError(ValueError):
+    pass
+
+
+def peak_memory_mib():
+    """Peak resident memory of this process, or None where it is not available"""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def parse_timestamp(value):
+    punch = datetime.fromisoformat(value.strip())
+    if timezone.is_naive(punch):
+        punch = timezone.make_aware(punch)
+    return punch
+
+
+def read_punches(lines, employee_ids, result):
+    """First and last punch per ``(employee pk, date)`` from CSV ``lines``.
+
+    ``employee_ids`` maps employee codes to primary keys. Days are split
+    on UTC dates, the same way checkin_checkout dates its records.
+    """
+    reader = csv.reader(lines)
+    header = [column.strip().lower() for column in next(reader, [])]
+    try:
+        code_column, time_column = header.index('employee_id'), header.index('timestamp')
+    except ValueError:
+        raise PunchFileError('Punch file needs "employee_id" and "timestamp" columns')
+
+    days = {}
+    unknown = set()
+    for line_number, row in enumerate(reader, 2):
+        if not row:
+            continue
+        result['rows'] += 1
+        try:
+            code, punch = row[code_column].strip(), parse_timestamp(row[time_column])
+        except (IndexError, ValueError):
+            if len(result['errors']) < MAX_REPORTED_ERRORS:
+                result['errors'].append(f'Line {line_number}: expected employee_id and an ISO 8601 timestamp')
+            result['invalid_rows'] += 1
+            continue
+        employee_id = employee_ids.get(code)
+        if employee_id is None:
+            unknown.add(code)
+            continue
+        key = (employee_id, punch.astimezone(dt_timezone.utc).date())
+        span = days.get(key)
+        if span is None:
+            days[key] = [punch, punch]
+        elif punch < span[0]:
+            span[0] = punch
+        elif punch > span[1]:
+            span[1] = punch
+    result['unknown_employees'] = sorted(unknown)
+    return days
+
+
+def day_status(day, check_out_time, today):
+    """``(status, forgot_checkout)`` of a record of ``day``; days before ``today`` without a checkout were forgotten"""
+    if check_out_time is not None:
+        return 'CHECKED_OUT', False
+    if day < today:
+        return 'FORGOT_CHECKOUT', True
+    return 'CHECKED_IN', False
+
+
+def build_record(employee_id, day, first, last, today):
+    record = TimeRecord(employee_id=employee_id, date=day, check_in_time=first)
+    if last > first:
+        record.check_out_time = last
+    record.status, record.forgot_checkout = day_status(day, record.check_out_time, today)
+    record.calculate_working_hours()
+    return record
+
+
+def import_punches(lines, batch_size=UPSERT_BATCH_SIZE):
+    """Upsert the TimeRecords described by a punch file and refresh the rollups.
+
+    ``lines`` is any iterable of CSV lines, such as an open text file.
+    Returns a summary with row counts, rejected rows and throughput.
+    """
+    started = time.perf_counter()
+    result = {'rows': 0, 'invalid_rows': 0, 'errors': [], 'records': 0}
+    employee_ids = dict(Employee.objects.values_list('employee_id', 'id'))
+    days = read_punches(lines, employee_ids, result)
+    archived = sorted(month for month in {(day.year, day.month) for _, day in days} if archive.is_archived(*month))
+    if archived:
+        months = ', '.join(f'{month:02d}/{year}' for year, month in archived)
+        raise PunchFileError(f'Punches fall in archived months ({months}); restore them with archive_timerecords first')
+
+    today = timezone.now().date()
+    batch = []
+    for (employee_id, day), (first, last) in days.items():
+        batch.append(build_record(employee_id, day, first, last, today))
+        if len(batch) >= batch_size:
+            upsert_records(batch)
+            batch = []
+    if batch:
+        upsert_records(batch)
+    result['records'] = len(days)
+
+    if days:
+        # bulk_create skips the save signals, so rebuild the imported employee-months
+        touched = {}
+        for employee_id, day in days:
+            touched.setdefault((day.year, day.month), set()).add(employee_id)
+        for month, month_employee_ids in sorted(touched.items()):
+            rebuild_monthly_reports(month, month, employee_ids=month_employee_ids)
+        if any(day == today for _, day in days):
+            presence.reload(today)
+
+    elapsed = time.perf_counter() - started
+    result['seconds'] = round(elapsed, 2)
+    result['rows_per_second'] = round(result['rows'] / elapsed) if elapsed else None
+    result['peak_memory_mib'] = peak_memory_mib()
+    return result
+
+
+def upsert_records(records):
+    with transaction.atomic():
+        TimeRecord.objects.bulk_create(
+            records,
+            update_conflicts=True,
+            unique_fields=['employee', 'date'],
+            update_fields=UPDATE_FIELDS,
+        )
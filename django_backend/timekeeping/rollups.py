@@ -0,0 +1,157 @@
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from . import analytics, archive
+from .models import MonthlyReport
+from .periods import days_in_month, iter_months
+from .stats import invalidate_system_stats
+
+# Employees per IN (...) list; SQLite takes at most 999 parameters per query
+EMPLOYEE_BATCH_SIZE = 500
+
+
+def _month_stats(records):
+    return records.values('employee_id').annotate(
+        total_working_days=Count('pk', filter=Q(check_in_time__isnull=False)),
+        total_working_hours=Coalesce(Sum('working_hours'), Value(0.0), output_field=FloatField()),
+        days_forgot_checkout=Count('pk', filter=Q(forgot_checkout=True)),
+    ).order_by()
+
+
+def refresh_monthly_report(employee_id, year, month):
+    """Recompute one employee's MonthlyReport row from its time records"""
+    analytics.invalidate_month(year, month)
+    records = archive.month_records(year, month).filter(employee_id=employee_id)
+    stats = next(iter(_month_stats(records)), None)
+    reports = MonthlyReport.objects.filter(employee_id=employee_id, year=year, month=month)
+    if stats is None:
+        # Readers treat a missing row as an empty month
+        reports.delete()
+        return
+    del stats['employee_id']
+    stats['total_working_hours'] = round(stats['total_working_hours'], 2)
+    stats['days_off'] = days_in_month(year, month) - stats['total_working_days']
+    try:
+        with transaction.atomic():
+            MonthlyReport.objects.update_or_create(
+                employee_id=employee_id, year=year, month=month, defaults=stats
+            )
+    except IntegrityError:
+        # A concurrent writer created the row first; ours is just as fresh
+        reports.update(**stats)
+
+
+def apply_delta(employee_id, year, month, working_days=0, working_hours=0.0, forgot_checkout=0):
+    """Shift one employee's MonthlyReport row by the given amounts"""
+    if not (working_days or working_hours or forgot_checkout):
+        return
+    updated = MonthlyReport.objects.filter(
+        employee_id=employee_id, year=year, month=month
+    ).update(
+        total_working_days=F('total_working_days') + working_days,
+        total_working_hours=F('total_working_hours') + working_hours,
+        days_forgot_checkout=F('days_forgot_checkout') + forgot_checkout,
+        days_off=F('days_off') - working_days,
+    )
+    if not updated:
+        # No row yet: build it from the records, which already include this change
+        refresh_monthly_report(employee_id, year, month)
+
+
+def add_forgot_checkouts(marks):
+    """Count newly forgotten checkouts, given as ``(employee_id, date)`` pairs.
+
+    Employees are grouped by month and by how many marks they got, so a
+    sweep over the whole company costs a handful of UPDATEs.
+    """
+    per_employee = Counter((employee_id, day.year, day.month) for employee_id, day in marks)
+    groups = defaultdict(list)
+    for (employee_id, year, month), count in per_employee.items():
+        groups[year, month, count].append(employee_id)
+
+    for (year, month, count), employee_ids in groups.items():
+        analytics.invalidate_month(year, month)
+        reports = MonthlyReport.objects.filter(year=year, month=month, employee_id__in=employee_ids)
+        updated = reports.update(days_forgot_checkout=F('days_forgot_checkout') + count)
+        if updated < len(employee_ids):
+            existing = set(reports.values_list('employee_id', flat=True))
+            for employee_id in set(employee_ids) - existing:
+                refresh_monthly_report(employee_id, year, month)
+
+
+def record_changed(old, new):
+    """Move a record's contribution from its ``old`` to its ``new`` snapshot.
+
+    Snapshots come from ``TimeRecord.rollup_snapshot()``; ``None`` stands
+    for a record that does not exist (before creation or after deletion).
+    """
+    if old == new:
+        return
+    for snapshot in (old, new):
+        if snapshot is not None:
+            analytics.invalidate_month(*snapshot[1:3])
+    if old is not None and new is not None and old[:3] == new[:3]:
+        apply_delta(
+            *new[:3],
+            working_days=new[3] - old[3],
+            working_hours=new[4] - old[4],
+            forgot_checkout=new[5] - old[5],
+        )
+        return
+    if old is not None:
+        apply_delta(*old[:3], working_days=-old[3], working_hours=-old[4], forgot_checkout=-old[5])
+    if new is not None:
+        apply_delta(*new[:3], working_days=new[3], working_hours=new[4], forgot_checkout=new[5])
+
+
+def _employee_batches(employee_ids):
+    if employee_ids is None:
+        yield None
+        return
+    employee_ids = sorted(set(employee_ids))
+    for start in range(0, len(employee_ids), EMPLOYEE_BATCH_SIZE):
+        yield employee_ids[start:start + EMPLOYEE_BATCH_SIZE]
+
+
+def rebuild_monthly_reports(first, last, employee_ids=None):
+    """Rebuild MonthlyReport rows for every month from ``first`` to ``last``.
+
+    ``first`` and ``last`` are (year, month) pairs; ``employee_ids``
+    limits the rebuild to those employees. Each month is replaced in its
+    own transaction with one grouped query and one bulk insert per batch
+    of employees. Returns the number of rows written.
+    """
+    written = 0
+    for year, month in iter_months(first, last):
+        month_days = days_in_month(year, month)
+        scopes = []
+        for batch in _employee_batches(employee_ids):
+            records = archive.month_records(year, month)
+            reports = MonthlyReport.objects.filter(year=year, month=month)
+            if batch is not None:
+                records = records.filter(employee_id__in=batch)
+                reports = reports.filter(employee_id__in=batch)
+            rows = [
+                MonthlyReport(
+                    employee_id=stats['employee_id'],
+                    year=year,
+                    month=month,
+                    total_working_days=stats['total_working_days'],
+                    total_working_hours=round(stats['total_working_hours'], 2),
+                    days_forgot_checkout=stats['days_forgot_checkout'],
+                    days_off=month_days - stats['total_working_days'],
+                )
+                for stats in _month_stats(records)
+            ]
+            scopes.append((reports, rows))
+        with transaction.atomic():
+            for reports, rows in scopes:
+                reports.delete()
+                MonthlyReport.objects.bulk_create(rows, batch_size=1000)
+                written += len(rows)
+            invalidate_system_stats()
+            analytics.invalidate_month(year, month)
+    return written
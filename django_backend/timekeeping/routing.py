@@ -0,0 +1,98 @@
+"""Send report and analytics reads to a reporting replica.
+
+Reads made inside ``reporting_reads()`` go to the database alias named by
+``TIMEKEEPING_REPORTING_DATABASE`` when it is configured, and to the
+primary otherwise. Writes always go to the primary.
+
+A replica lags behind the primary, so once a request writes, its later
+reads stay on the primary, and ReplicaPinMiddleware sets a cookie that
+keeps the client's reads there for ``TIMEKEEPING_REPLICA_PIN_SECONDS``.
+"""
+import sqlite3
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'timekeeping_primary_pin'
+
+_reporting = ContextVar('timekeeping_reporting_reads', default=False)
+_pin = ContextVar('timekeeping_primary_pin', default=None)
+
+
+class Pin:
+    """Whether the current request must read from the primary"""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+def reporting_alias():
+    """The configured reporting database alias, or None"""
+    alias = settings.TIMEKEEPING_REPORTING_DATABASE
+    return alias if alias in connections.settings else None
+
+
+@contextmanager
+def reporting_reads():
+    token = _reporting.set(True)
+    try:
+        yield
+    finally:
+        _reporting.reset(token)
+
+
+@contextmanager
+def request_pin(pinned):
+    """Track writes of one request; yields its Pin"""
+    pin = Pin(pinned)
+    token = _pin.set(pin)
+    try:
+        yield pin
+    finally:
+        _pin.reset(token)
+
+
+class ReportingRouter:
+
+    def db_for_read(self, model, **hints):
+        pin = _pin.get()
+        if _reporting.get() and not (pin and pin.pinned):
+            return reporting_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        pin = _pin.get()
+        if pin is not None:
+            pin.pinned = pin.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # The replica gets its schema from the primary
+        if db == settings.TIMEKEEPING_REPORTING_DATABASE:
+            return False
+        return None
+
+
+def sync_sqlite_replica(alias=None):
+    """Copy the primary SQLite database over the reporting one.
+
+    A local stand-in for replication, to try the reporting setup with two
+    SQLite files.
+    """
+    alias = alias or reporting_alias()
+    primary = connections[DEFAULT_DB_ALIAS]
+    if alias is None or primary.vendor != 'sqlite' or connections[alias].vendor != 'sqlite':
+        raise ValueError('Needs a SQLite primary and a SQLite reporting database')
+    primary.ensure_connection()
+    replica = sqlite3.connect(connections[alias].settings_dict['NAME'])
+    try:
+        primary.connection.backup(replica)
+    finally:
+        replica.close()
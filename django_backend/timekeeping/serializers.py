@@ -1,6 +1,7 @@
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 from django.contrib.auth.models import User
-from .models import Employee, TimeRecord, MonthlyReport
+from .models import Employee, TimeRecord, MonthlyReport, ReportJob
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -30,4 +31,25 @@ class MonthlyReportSerializer(serializers.ModelSerializer):
     class Meta:
         model = MonthlyReport
         fields = ['id', 'employee', 'employee_name', 'employee_id', 'year', 'month', 
-                 'total_working_days', 'total_working_hours', 'days_forgot_checkout', 'days_off', 'created_at']
\ No newline at end of file
+                 'total_working_days', 'total_working_hours', 'days_forgot_checkout', 'days_off', 'created_at']
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ReportJob
+        fields = ['id', 'report_type', 'year', 'month', 'department', 'status', 'error',
+                 'created_at', 'started_at', 'finished_at', 'download_url']
+        read_only_fields = ['status', 'error', 'created_at', 'started_at', 'finished_at']
+        # Duplicate pending requests are merged, not rejected
+        validators = []
+    
+    def validate_month(self, value):
+        if not 1 <= value <= 12:
+            raise serializers.ValidationError('Month must be between 1 and 12')
+        return value
+    
+    def get_download_url(self, obj):
+        if obj.status != 'DONE':
+            return None
+        return reverse('report-jobs-download', kwargs={'pk': obj.id}, request=self.context.get('request'))
\ No newline at end of file
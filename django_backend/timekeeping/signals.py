@@ -0,0 +1,51 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import rollups
+from .stats import invalidate_system_stats
+from .employees import invalidate_current_employee
+from .models import Employee, TimeRecord
+
+
+@receiver(post_save, sender=TimeRecord)
+def update_rollup_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_system_stats()
+    new = instance.rollup_snapshot()
+    if new is None:
+        new = TimeRecord.objects.get(pk=instance.pk).rollup_snapshot()
+    if created:
+        old = None
+    elif getattr(instance, '_rollup_snapshot', None) is not None:
+        old = instance._rollup_snapshot
+    else:
+        # Previous state unknown (deferred fields or unsaved copy): recount the month
+        rollups.refresh_monthly_report(*new[:3])
+        instance._rollup_snapshot = new
+        return
+    rollups.record_changed(old, new)
+    instance._rollup_snapshot = new
+
+
+@receiver(post_delete, sender=TimeRecord)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    invalidate_system_stats()
+    rollups.record_changed(getattr(instance, '_rollup_snapshot', None) or instance.rollup_snapshot(), None)
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def invalidate_employee_on_change(sender, instance, **kwargs):
+    invalidate_current_employee(instance.user_id)
+    invalidate_system_stats()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_employee_on_user_change(sender, instance, update_fields=None, **kwargs):
+    # Logging in only touches last_login, which the cached profile does not show
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    invalidate_current_employee(instance.pk)
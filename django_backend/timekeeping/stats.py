@@ -0,0 +1,73 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import aggregates
+
+VERSION_KEY = 'timekeeping:system_stats:version'
+HITS_KEY = 'timekeeping:system_stats:hits'
+MISSES_KEY = 'timekeeping:system_stats:misses'
+RECOMPUTE_KEY = 'timekeeping:system_stats:recompute_ms'
+
+
+def _incr(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        return cache.incr(key)
+
+
+def invalidate_system_stats():
+    """Retire cached stats once the current transaction commits.
+
+    Bumping the version only after commit keeps a concurrent request
+    from caching pre-commit numbers under the new version.
+    """
+    transaction.on_commit(lambda: _incr(VERSION_KEY))
+
+
+def compute_system_stats(today, department=None):
+    totals = aggregates.system_totals(today, department)
+    return {
+        'total_employees': totals['total_employees'],
+        'checked_in_today': totals['checked_in_today'],
+        'checked_out_today': totals['total_employees'] - totals['checked_in_today'],
+        'total_working_hours_this_month': totals['total_working_hours'],
+        'forgotten_checkouts_this_month': totals['forgotten_checkouts'],
+        'month_year': f"{today.strftime('%B')} {today.year}"
+    }
+
+
+def get_system_stats(today, department=None):
+    """System stats for ``today``, of one department or all, served from cache until a record changes.
+
+    Returns ``(stats, hit)``.
+    """
+    version = cache.get_or_set(VERSION_KEY, 0, None)
+    key = f'timekeeping:system_stats:{today.isoformat()}:{department or "all"}:{version}'
+    stats = cache.get(key)
+    if stats is not None:
+        _incr(HITS_KEY)
+        return stats, True
+
+    _incr(MISSES_KEY)
+    started = time.perf_counter()
+    stats = compute_system_stats(today, department)
+    cache.set(RECOMPUTE_KEY, round((time.perf_counter() - started) * 1000, 2), None)
+    cache.set(key, stats, settings.TIMEKEEPING_STATS_CACHE_TTL)
+    return stats, False
+
+
+def cache_info():
+    """Hit rate and last recompute time of the system stats cache"""
+    counters = cache.get_many([HITS_KEY, MISSES_KEY, RECOMPUTE_KEY])
+    hits, misses = counters.get(HITS_KEY, 0), counters.get(MISSES_KEY, 0)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+        'last_recompute_ms': counters.get(RECOMPUTE_KEY),
+    }
@@ -1,3 +1,1541 @@
-from django.test import TestCase
+import calendar
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from importlib import import_module
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.db.models import Value
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+import numpy as np
+from openpyxl import load_workbook
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from . import (aggregates, analytics, archive, async_views, attendance, benchmarks, fast_serializers, hours, jobs, metrics,
+               presence, routing)
+from .authentication import issue_token
+from .models import ArchivedMonth, Employee, MonthlyReport, ReportJob, TimeRecord, TimeRecordArchive
+from .periods import in_month, month_bounds
+from .punches import PunchFileError, import_punches
+from .serializers import TimeRecordSerializer
+
+
+def create_employee(code, department='ENGINEERING', position='Backend Developer', **kwargs):
+    user = User.objects.create_user(username=code.lower())
+    return Employee.objects.create(
+        user=user,
+        employee_id=code,
+        full_name=f'Employee {code}',
+        department=department,
+        position=position,
+        **kwargs
+    )
+
+
+def create_record(employee, day, hours=8.0, forgot_checkout=False):
+    check_in = timezone.make_aware(datetime.combine(day, datetime.min.time()).replace(hour=8))
+    if forgot_checkout:
+        return TimeRecord.objects.create(
+            employee=employee, date=day, check_in_time=check_in,
+            status='FORGOT_CHECKOUT', forgot_checkout=True
+        )
+    return TimeRecord.objects.create(
+        employee=employee, date=day, check_in_time=check_in,
+        check_out_time=check_in + timedelta(hours=hours),
+        status='CHECKED_OUT', working_hours=hours
+    )
+
+
+class TimekeepingTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+
+class AdminTestCase(TimekeepingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user(username='admin', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def add_employees(self, count, year=2025, month=3):
+        start = Employee.objects.count()
+        for i in range(start, start + count):
+            employee = create_employee(f'EMP{i:03d}')
+            create_record(employee, date(year, month, 3), hours=8.0)
+            create_record(employee, date(year, month, 4), hours=7.5)
+            create_record(employee, date(year, month, 5), forgot_checkout=True)
+
+    def run_report(self, url):
+        """Queue a report through ``url``, run its job as the worker would and download it"""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(str(jobs.claim_next_job()), response.data['id'])
+        self.assertEqual(jobs.run_report_job(response.data['id']), 'DONE')
+        download = self.client.get(self.client.get(response['Location']).data['download_url'])
+        self.assertEqual(download.status_code, 200)
+        return download
+
+
+class AllEmployeesRecordsTests(AdminTestCase):
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_stats_match_records(self):
+        self.add_employees(2)
+        response = self.client.get('/api/admin/all_employees_records/?year=2025&month=3')
+        employees_data = response.data['employees_data']
+        self.assertEqual(len(employees_data), 2)
+        stats = employees_data[0]['stats']
+        self.assertEqual(stats['total_working_days'], 3)
+        self.assertEqual(stats['total_working_hours'], 15.5)
+        self.assertEqual(stats['days_forgot_checkout'], 1)
+        self.assertEqual(stats['days_off'], 28)
+        self.assertEqual(len(stats['records']), 3)
+        self.assertEqual(stats['records'][0]['employee_name'], 'Employee EMP000')
+
+    def test_query_count_does_not_grow_with_employees(self):
+        self.add_employees(2)
+        small, _ = self.count_queries('/api/admin/all_employees_records/?year=2025&month=3')
+        self.add_employees(8)
+        large, response = self.count_queries('/api/admin/all_employees_records/?year=2025&month=3')
+        self.assertEqual(len(response.data['employees_data']), 10)
+        self.assertEqual(small, large)
+
+    def count_report_queries(self, url):
+        job_id = self.client.get(url).data['id']
+        jobs.claim_next_job()
+        with CaptureQueriesContext(connection) as queries:
+            jobs.run_report_job(job_id)
+        return len(queries)
+
+    def assert_constant_queries(self, url):
+        self.add_employees(2)
+        small = self.count_report_queries(url)
+        self.add_employees(8)
+        large = self.count_report_queries(url)
+        self.assertEqual(small, large)
+
+    def test_comprehensive_excel_query_count_does_not_grow_with_employees(self):
+        self.assert_constant_queries('/api/admin/comprehensive_excel/?year=2025&month=3')
+
+    def test_monthly_excel_query_count_does_not_grow_with_employees(self):
+        self.assert_constant_queries('/api/reports/monthly_excel/?year=2025&month=3')
+
+    def test_invalid_year_or_month_is_rejected(self):
+        urls = ['/api/admin/all_employees_records/', '/api/admin/comprehensive_excel/',
+                '/api/admin/department_summary/', '/api/reports/monthly_excel/']
+        for query in ['month=13', 'month=abc', 'year=2025&month=0', 'year=10000']:
+            for url in urls:
+                self.assertEqual(self.client.get(f'{url}?{query}').status_code, 400, (url, query))
+        self.client.force_authenticate(create_employee('EMP001').user)
+        self.assertEqual(self.client.get('/api/timerecords/monthly_records/?month=abc').status_code, 400)
+
+
+class MonthlyReportRollupTests(TimekeepingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.employee = create_employee('EMP001')
+
+    def report(self, year=2025, month=3):
+        return MonthlyReport.objects.get(employee=self.employee, year=year, month=month)
+
+    def test_checkin_and_checkout_update_rollup(self):
+        client = APIClient()
+        client.force_authenticate(self.employee.user)
+        client.post('/api/timerecords/checkin_checkout/')
+        today = timezone.now().date()
+        report = self.report(today.year, today.month)
+        self.assertEqual(report.total_working_days, 1)
+        self.assertEqual(report.days_off, calendar.monthrange(today.year, today.month)[1] - 1)
+
+        record = TimeRecord.objects.get(employee=self.employee)
+        TimeRecord.objects.filter(pk=record.pk).update(check_in_time=record.check_in_time - timedelta(hours=2))
+        client.post('/api/timerecords/checkin_checkout/')
+        report.refresh_from_db()
+        self.assertEqual(report.total_working_days, 1)
+        self.assertEqual(report.total_working_hours, 2.0)
+
+    def test_edits_and_deletes_apply_deltas(self):
+        record = create_record(self.employee, date(2025, 3, 3), hours=8.0)
+        create_record(self.employee, date(2025, 3, 4), forgot_checkout=True)
+        report = self.report()
+        self.assertEqual((report.total_working_days, report.total_working_hours, report.days_forgot_checkout),
+                         (2, 8.0, 1))
+
+        record.working_hours = 6.5
+        record.save()
+        self.assertEqual(self.report().total_working_hours, 6.5)
+
+        record = TimeRecord.objects.get(pk=record.pk)
+        record.date = date(2025, 4, 1)
+        record.save()
+        self.assertEqual(self.report().total_working_days, 1)
+        self.assertEqual(self.report().total_working_hours, 0.0)
+        self.assertEqual(self.report(month=4).total_working_hours, 6.5)
+
+        TimeRecord.objects.get(pk=record.pk).delete()
+        self.assertEqual(self.report(month=4).total_working_days, 0)
+        self.assertEqual(self.report(month=4).days_off, 30)
+
+    def test_rebuild_command_repairs_drift(self):
+        create_record(self.employee, date(2025, 3, 3), hours=8.0)
+        create_record(self.employee, date(2025, 5, 3), hours=4.0)
+        MonthlyReport.objects.all().update(total_working_days=99, total_working_hours=0.0)
+        call_command('rebuild_monthly_reports', '--from', '2025-03', '--to', '2025-05', stdout=StringIO())
+        self.assertEqual(MonthlyReport.objects.count(), 2)
+        self.assertEqual(self.report().total_working_days, 1)
+        self.assertEqual(self.report(month=5).total_working_hours, 4.0)
+        self.assertEqual(self.report(month=5).days_off, 30)
+
+
+class ExcelExportTests(AdminTestCase):
+
+    def load(self, url):
+        response = self.run_report(url)
+        self.assertTrue(response.streaming)
+        return load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)
+
+    def test_comprehensive_excel_contents(self):
+        self.add_employees(2)
+        wb = self.load('/api/admin/comprehensive_excel/?year=2025&month=3')
+        self.assertEqual(wb.sheetnames, ['Summary', 'Departments', 'Detailed Records'])
+        summary = list(wb['Summary'].values)
+        self.assertEqual(summary[1][:8], ('EMP000', 'Employee EMP000', 'Engineering', 'Backend Developer',
+                                          3, 15.5, 1, 28))
+        detailed = list(wb['Detailed Records'].values)
+        self.assertEqual(len(detailed), 7)
+        self.assertEqual(detailed[3][3:], ('2025-03-05', '01:00:00', 'N/A', 0, 'Forgot to Checkout',
+                                           'Forgot checkout'))
+
+    def test_monthly_excel_contents(self):
+        self.add_employees(1)
+        wb = self.load('/api/reports/monthly_excel/?year=2025&month=3')
+        rows = list(wb['Report 3-2025'].values)
+        self.assertEqual(rows[1], ('EMP000', 'Employee EMP000', 'Engineering', 'Backend Developer',
+                                   3, 15.5, 1, 28, 'Report for 3/2025'))
+        departments = list(wb['Departments'].values)
+        self.assertEqual(len(departments), 9)
+        self.assertEqual(departments[1], ('Engineering', 1, 3, 15.5, 15.5, 5.17, 1))
+
+
+class ReportJobTests(AdminTestCase):
+
+    def submit(self, report_type='COMPREHENSIVE', year=2025, month=3):
+        return self.client.post('/api/report-jobs/', {'report_type': report_type, 'year': year, 'month': month})
+
+    def test_identical_pending_requests_are_merged(self):
+        first = self.submit()
+        second = self.submit()
+        other = self.submit(month=4)
+        self.assertEqual(first.status_code, 202)
+        self.assertFalse(first.data['merged'])
+        self.assertTrue(second.data['merged'])
+        self.assertEqual(first.data['id'], second.data['id'])
+        self.assertNotEqual(first.data['id'], other.data['id'])
+        self.assertEqual(ReportJob.objects.count(), 2)
+
+    def test_department_reports_are_separate_jobs(self):
+        everyone = self.submit()
+        qa = self.client.post('/api/report-jobs/', {'report_type': 'COMPREHENSIVE', 'year': 2025, 'month': 3,
+                                                    'department': 'QA'})
+        self.assertEqual((qa.status_code, qa.data['department']), (202, 'QA'))
+        self.assertNotEqual(everyone.data['id'], qa.data['id'])
+        # The old GET endpoints queue the same jobs instead of building the workbook in the request
+        merged = self.client.get('/api/admin/comprehensive_excel/?year=2025&month=3&department=QA')
+        self.assertEqual((merged.status_code, merged.data['id'], merged.data['merged']), (202, qa.data['id'], True))
+        self.assertTrue(merged['Location'].endswith(f'/api/report-jobs/{qa.data["id"]}/'))
+        unknown = self.client.post('/api/report-jobs/', {'report_type': 'MONTHLY', 'year': 2025, 'month': 3,
+                                                         'department': 'LEGAL'})
+        self.assertEqual(unknown.status_code, 400)
+
+    def test_comprehensive_reports_require_admin(self):
+        employee = create_employee('EMP001')
+        self.client.force_authenticate(employee.user)
+        self.assertEqual(self.submit().status_code, 403)
+        self.assertEqual(self.submit('MONTHLY').status_code, 202)
+
+    def test_worker_generates_and_serves_report(self):
+        self.add_employees(2)
+        job_id = self.submit().data['id']
+        self.assertEqual(self.client.get(f'/api/report-jobs/{job_id}/download/').status_code, 409)
+
+        self.assertEqual(str(jobs.claim_next_job()), job_id)
+        self.assertIsNone(jobs.claim_next_job())
+        self.assertEqual(jobs.run_report_job(job_id), 'DONE')
+
+        job = self.client.get(f'/api/report-jobs/{job_id}/').data
+        self.assertEqual(job['status'], 'DONE')
+        response = self.client.get(job['download_url'])
+        self.assertEqual(response.status_code, 200)
+        wb = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)
+        self.assertEqual(len(list(wb['Summary'].values)), 3)
+
+        # A finished job no longer absorbs new requests
+        self.assertFalse(self.submit().data['merged'])
+
+
+class CheckinCheckoutConcurrencyTests(TransactionTestCase):
+    TOGGLES_PER_EMPLOYEE = 25
+    EMPLOYEES = 8
+
+    def toggle(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        started = time.perf_counter()
+        try:
+            response = client.post('/api/timerecords/checkin_checkout/')
+        finally:
+            connection.close()
+        return response.status_code, time.perf_counter() - started
+
+    def setUp(self):
+        cache.clear()
+
+    def test_simultaneous_toggles(self):
+        employees = [create_employee(f'EMP{i:03d}') for i in range(self.EMPLOYEES)]
+        # Odd number of taps for the first half, even for the rest
+        taps = []
+        for i, employee in enumerate(employees):
+            taps += [employee.user] * (self.TOGGLES_PER_EMPLOYEE + i % 2)
+
+        barrier = threading.Barrier(16)
+        def tap(user):
+            try:
+                barrier.wait(timeout=1)
+            except threading.BrokenBarrierError:
+                pass
+            return self.toggle(user)
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(tap, taps))
+
+        self.assertEqual([code for code, _ in results], [200] * len(taps))
+        for i, employee in enumerate(employees):
+            record = TimeRecord.objects.get(employee=employee)
+            self.assertEqual(record.status, 'CHECKED_IN' if (self.TOGGLES_PER_EMPLOYEE + i % 2) % 2 else 'CHECKED_OUT')
+
+        latencies = sorted(latency for _, latency in results)
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        self.assertLess(p99, 2.0, f'p99 latency of {len(taps)} toggles')
+
+
+class CurrentEmployeeTests(TimekeepingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.employee = create_employee('EMP001')
+        self.client = APIClient()
+        self.client.force_authenticate(self.employee.user)
+
+    def test_employee_is_resolved_from_cache(self):
+        self.client.get('/api/timerecords/current_status/')
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/timerecords/current_status/')
+        self.assertEqual(response.data['status'], 'CHECKED_OUT')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/employees/current/')
+        self.assertEqual(response.data['user']['username'], 'emp001')
+
+    def test_cache_is_invalidated_on_save(self):
+        self.client.get('/api/employees/current/')
+        self.employee.position = 'System Administrator'
+        self.employee.department = 'HR'
+        self.employee.save()
+        response = self.client.get('/api/timerecords/current_status/')
+        self.assertEqual(response.data['status'], 'ADMIN')
+        self.assertEqual(self.client.post('/api/timerecords/checkin_checkout/').status_code, 403)
+
+    def test_user_without_profile(self):
+        self.client.force_authenticate(User.objects.create_user(username='nobody'))
+        self.assertEqual(self.client.get('/api/employees/current/').status_code, 404)
+        self.assertEqual(self.client.get('/api/timerecords/').data, [])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AuthenticationTests(TimekeepingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.employee = create_employee('EMP001')
+        self.employee.user.set_password('secret')
+        self.employee.user.save()
+        self.client = APIClient()
+
+    def get_token(self):
+        response = self.client.post('/api/auth/token/', {'username': 'emp001', 'password': 'secret'}, format='json')
+        return response.data['token']
+
+    def test_session_requests_are_served_from_the_cache(self):
+        self.client.post('/api/auth/login/', {'username': 'emp001', 'password': 'secret'}, format='json')
+        self.client.get('/api/auth/status/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/auth/status/')
+        self.assertTrue(response.data['authenticated'])
+
+        # A new password still ends the other sessions
+        self.employee.user.set_password('changed')
+        self.employee.user.save()
+        self.assertFalse(self.client.get('/api/auth/status/').data['authenticated'])
+
+    def test_sessions_from_the_plain_model_backend_stay_logged_in(self):
+        self.client.force_login(self.employee.user, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertTrue(self.client.get('/api/auth/status/').data['authenticated'])
+        self.client.logout()
+        self.client.post('/api/auth/login/', {'username': 'emp001', 'password': 'secret'}, format='json')
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY], 'timekeeping.authentication.CachedModelBackend')
+
+    def test_signed_token_checks_in_without_a_session(self):
+        token = self.get_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        self.assertEqual(self.client.post('/api/timerecords/checkin_checkout/').data['action'], 'checked_in')
+        self.assertNotIn('sessionid', self.client.cookies)
+        with self.assertNumQueries(0):
+            self.assertTrue(self.client.get('/api/auth/status/').data['authenticated'])
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token[:-1]}x')
+        self.assertEqual(self.client.get('/api/timerecords/current_status/').status_code, 403)
+        with override_settings(TIMEKEEPING_TOKEN_MAX_AGE=-1):
+            self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+            self.assertEqual(self.client.get('/api/timerecords/current_status/').status_code, 403)
+
+        self.employee.user.set_password('changed')
+        self.employee.user.save()
+        self.assertEqual(self.client.get('/api/timerecords/current_status/').status_code, 403)
+
+    def test_token_needs_valid_credentials(self):
+        response = self.client.post('/api/auth/token/', {'username': 'emp001', 'password': 'wrong'}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+
+class CloseForgottenCheckoutsTests(TimekeepingTestCase):
+
+    def open_record(self, employee, day):
+        return TimeRecord.objects.create(
+            employee=employee, date=day, status='CHECKED_IN',
+            check_in_time=timezone.make_aware(datetime.combine(day, datetime.min.time()))
+        )
+
+    def test_sweeps_all_stale_open_records(self):
+        first, second = create_employee('EMP001'), create_employee('EMP002')
+        today = timezone.now().date()
+        self.open_record(first, date(2025, 2, 28))
+        self.open_record(first, date(2025, 3, 7))
+        self.open_record(second, date(2025, 3, 7))
+        create_record(second, date(2025, 3, 6))
+        self.open_record(second, today)
+
+        out = StringIO()
+        call_command('close_forgotten_checkouts', '--batch-size', '2', stdout=out)
+        self.assertIn('Closed 3 forgotten checkouts', out.getvalue())
+
+        self.assertEqual(TimeRecord.objects.filter(status='CHECKED_IN').get().date, today)
+        self.assertEqual(TimeRecord.objects.filter(forgot_checkout=True, status='FORGOT_CHECKOUT').count(), 3)
+        reports = {(r.employee.employee_id, r.month): r.days_forgot_checkout for r in MonthlyReport.objects.filter(year=2025)}
+        self.assertEqual(reports, {('EMP001', 2): 1, ('EMP001', 3): 1, ('EMP002', 3): 1})
+
+    def test_before_limits_the_sweep(self):
+        employee = create_employee('EMP001')
+        self.open_record(employee, date(2025, 3, 6))
+        self.open_record(employee, date(2025, 3, 7))
+        call_command('close_forgotten_checkouts', '--before', '2025-03-07', stdout=StringIO())
+        self.assertEqual(TimeRecord.objects.get(status='CHECKED_IN').date, date(2025, 3, 7))
+
+    def test_before_accepts_a_cutoff_time(self):
+        employee = create_employee('EMP001')
+        self.open_record(employee, date(2025, 3, 6))
+        self.open_record(employee, date(2025, 3, 7))
+        self.open_record(employee, date(2025, 3, 8))
+        call_command('close_forgotten_checkouts', '--before', '2025-03-07T12:00', stdout=StringIO())
+        self.assertEqual(TimeRecord.objects.get(status='CHECKED_IN').date, date(2025, 3, 8))
+
+        with self.assertRaises(CommandError):
+            call_command('close_forgotten_checkouts', '--before', 'yesterday', stdout=StringIO())
+
+
+class SystemStatsTests(AdminTestCase):
+
+    def test_stats_are_computed_in_one_query_and_cached(self):
+        self.add_employees(3, year=timezone.now().year, month=timezone.now().month)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/admin/system_stats/')
+        self.assertFalse(response.data['cache']['hit'])
+        self.assertEqual(response.data['total_employees'], 3)
+        self.assertEqual(response.data['forgotten_checkouts_this_month'], 3)
+        self.assertEqual(response.data['total_working_hours_this_month'], 46.5)
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/admin/system_stats/')
+        self.assertTrue(response.data['cache']['hit'])
+        self.assertEqual(response.data['cache']['hit_rate'], 0.5)
+        self.assertIsNotNone(response.data['cache']['last_recompute_ms'])
+
+    def test_record_writes_invalidate_cache(self):
+        employee = create_employee('EMP001')
+        self.client.get('/api/admin/system_stats/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            attendance.toggle_attendance(employee)
+        response = self.client.get('/api/admin/system_stats/')
+        self.assertFalse(response.data['cache']['hit'])
+        self.assertEqual(response.data['checked_in_today'], 1)
+        self.assertEqual(response.data['checked_out_today'], 0)
+
+
+class PresenceTests(TimekeepingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        presence.reset_backend()
+        self.addCleanup(presence.reset_backend)
+
+    def test_snapshot_is_loaded_from_todays_records(self):
+        first, second = create_employee('EMP001'), create_employee('EMP002', department='QA')
+        today = timezone.now().date()
+        TimeRecord.objects.create(employee=first, date=today, status='CHECKED_IN', check_in_time=timezone.now())
+        create_record(second, today)
+        self.assertEqual(presence.get_snapshot(today), {
+            'date': today.isoformat(),
+            'departments': {'ENGINEERING': 1},
+            'employees': {'EMP001': 'CHECKED_IN', 'EMP002': 'CHECKED_OUT'},
+        })
+
+    def test_committed_toggles_update_the_registry(self):
+        employee = create_employee('EMP001')
+        presence.get_snapshot()
+        with self.captureOnCommitCallbacks(execute=True):
+            attendance.toggle_attendance(employee)
+        self.assertEqual(presence.get_snapshot()['departments'], {'ENGINEERING': 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            attendance.toggle_attendance(employee)
+        self.assertEqual(presence.get_snapshot()['departments'], {})
+        self.assertEqual(presence.get_snapshot()['employees'], {'EMP001': 'CHECKED_OUT'})
+
+    async def test_stream_pushes_snapshot_then_deltas(self):
+        employee = await sync_to_async(create_employee)('EMP001')
+        await self.async_client.aforce_login(employee.user)
+        response = await self.async_client.get('/api/presence/stream/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = response.streaming_content
+
+        snapshot = await anext(events)
+        self.assertTrue(snapshot.startswith(b'event: snapshot\n'))
+
+        def toggle():
+            with self.captureOnCommitCallbacks(execute=True):
+                attendance.toggle_attendance(employee)
+        await sync_to_async(toggle)()
+
+        delta = await anext(events)
+        self.assertTrue(delta.startswith(b'event: presence\n'))
+        payload = json.loads(delta.decode().split('data: ', 1)[1])
+        self.assertEqual((payload['employee_id'], payload['status'], payload['checked_in']),
+                         ('EMP001', 'CHECKED_IN', 1))
+        await events.aclose()
+
+    def test_a_later_day_rolls_the_registry_over(self):
+        backend = presence.get_backend()
+        backend.load(date(2025, 3, 3), [('EMP001', 'ENGINEERING', 'CHECKED_IN'), ('EMP002', 'QA', 'CHECKED_IN')])
+        backend.update(date(2025, 3, 2), 'EMP001', 'ENGINEERING', 'CHECKED_OUT')
+        backend.update(date(2025, 3, 4), 'EMP002', 'QA', 'CHECKED_IN')
+        self.assertIsNone(backend.snapshot(date(2025, 3, 3)))
+        self.assertEqual(backend.snapshot(date(2025, 3, 4)), {
+            'date': '2025-03-04', 'departments': {'QA': 1}, 'employees': {'EMP002': 'CHECKED_IN'},
+        })
+
+    async def test_stream_resnapshots_on_rollover_and_when_behind(self):
+        employee = await sync_to_async(create_employee)('EMP001')
+        await self.async_client.aforce_login(employee.user)
+        backend = presence.get_backend()
+        events = (await self.async_client.get('/api/presence/stream/')).streaming_content
+        await anext(events)
+
+        tomorrow = timezone.now().date() + timedelta(days=1)
+        backend.update(tomorrow, 'EMP001', 'ENGINEERING', 'CHECKED_IN')
+        event = await anext(events)
+        self.assertTrue(event.startswith(b'event: snapshot\n'))
+        self.assertEqual(json.loads(event.decode().split('data: ', 1)[1]), {
+            'date': tomorrow.isoformat(), 'departments': {'ENGINEERING': 1}, 'employees': {'EMP001': 'CHECKED_IN'},
+        })
+        await events.aclose()
+
+        with override_settings(TIMEKEEPING_PRESENCE_QUEUE_SIZE=2):
+            subscription = backend.subscribe()
+        for status in ['CHECKED_OUT', 'CHECKED_IN', 'CHECKED_OUT']:
+            backend.update(tomorrow, 'EMP001', 'ENGINEERING', status)
+        self.assertIs(await subscription.get(timeout=1), presence.RESYNC)
+        self.assertIsNone(await subscription.get(timeout=0.01))
+        subscription.close()
+
+    def test_stream_requires_asgi_and_login(self):
+        self.assertEqual(self.client.get('/api/presence/stream/').status_code, 401)
+        self.client.force_login(create_employee('EMP001').user)
+        self.assertEqual(self.client.get('/api/presence/stream/').status_code, 501)
+
+
+class AsyncViewTests(TimekeepingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.employee = create_employee('EMP001')
+
+    async def test_asgi_requests_are_served_by_the_async_views(self):
+        await self.async_client.aforce_login(self.employee.user)
+        for path, view in [('/api/auth/status/', async_views.auth_status),
+                           ('/api/timerecords/current_status/', async_views.current_status)]:
+            response = await self.async_client.get(path)
+            self.assertIs(response.resolver_match.func, view)
+        response = await self.async_client.get('/api/timerecords/monthly_records/')
+        self.assertEqual(response.resolver_match.view_name, 'timerecord-monthly-records')
+
+    async def test_responses_match_the_drf_actions(self):
+        await self.async_client.aforce_login(self.employee.user)
+        await sync_to_async(self.client.force_login)(self.employee.user)
+        get = sync_to_async(self.client.get)
+
+        response = await self.async_client.post('/api/timerecords/checkin_checkout/')
+        self.assertEqual(response.json()['action'], 'checked_in')
+        for path in ['/api/auth/status/', '/api/timerecords/current_status/']:
+            expected = await get(path)
+            response = await self.async_client.get(path)
+            self.assertEqual(response.json(), expected.json())
+        self.assertEqual(response['ETag'], expected['ETag'])
+
+        response = await self.async_client.get('/api/timerecords/current_status/', headers={'if-none-match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_checkin_authentication(self):
+        client = AsyncClient(enforce_csrf_checks=True)
+        self.assertEqual((await client.post('/api/timerecords/checkin_checkout/')).status_code, 403)
+        self.assertEqual((await client.get('/api/timerecords/checkin_checkout/')).status_code, 405)
+
+        await client.aforce_login(self.employee.user)
+        response = await client.post('/api/timerecords/checkin_checkout/')
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('CSRF', response.json()['detail'])
+
+        token = await sync_to_async(issue_token)(self.employee.user)
+        response = await client.post('/api/timerecords/checkin_checkout/', headers={'authorization': f'Token {token}'})
+        self.assertEqual(response.json()['action'], 'checked_in')
+        response = await client.get('/api/timerecords/current_status/', headers={'authorization': f'Token {token}x'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_wsgi_requests_keep_the_drf_actions(self):
+        self.client.force_login(self.employee.user)
+        response = self.client.get('/api/timerecords/current_status/')
+        self.assertEqual(response.resolver_match.view_name, 'timerecord-current-status')
+
+
+class LoadComparisonTests(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_wsgi_and_asgi_serve_every_request(self):
+        results = benchmarks.run_load_comparison(employees=4, concurrency=4, requests=12, threads=2,
+                                                 endpoints=['current_status', 'checkin_checkout'])
+        self.assertEqual(set(results), {'wsgi', 'asgi'})
+        for endpoints in results.values():
+            self.assertEqual(set(endpoints), {'current_status', 'checkin_checkout'})
+            for metrics in endpoints.values():
+                self.assertEqual((metrics['requests'], metrics['errors']), (12, 0))
+                self.assertLessEqual(metrics['p50_ms'], metrics['p99_ms'])
+        self.assertEqual(TimeRecord.objects.count(), 4)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'Plans are checked against the SQLite planner')
+class QueryPlanTests(AdminTestCase):
+
+    def assertUsesIndex(self, queryset, index=None):
+        plan = queryset.explain()
+        context = f'{queryset.query}\n{plan}'
+        table = queryset.model._meta.db_table
+        self.assertNotRegex(plan, rf'SCAN {table}\b', context)
+        self.assertIn(f'SEARCH {table} USING', plan, context)
+        if index:
+            self.assertIn(index, plan, context)
+
+    def test_month_range_predicates(self):
+        self.assertEqual(month_bounds(2024, 12), (date(2024, 12, 1), date(2025, 1, 1)))
+        self.assertEqual(in_month(2025, 2), {'date__gte': date(2025, 2, 1), 'date__lt': date(2025, 3, 1)})
+        self.add_employees(2, 2025, 2)
+        create_record(Employee.objects.first(), date(2025, 3, 1))
+        self.assertEqual(aggregates.month_records(2025, 2).count(), 6)
+
+    def test_report_queries_use_indexes(self):
+        self.add_employees(3)
+        employee = Employee.objects.first()
+        start, end = month_bounds(2025, 3)
+        self.assertUsesIndex(aggregates.month_records(2025, 3), 'timerecord_date_status_idx')
+        self.assertUsesIndex(TimeRecord.objects.filter(employee=employee, **in_month(2025, 3)))
+        self.assertUsesIndex(TimeRecord.objects.filter(date=start, status='CHECKED_IN'))
+        self.assertUsesIndex(TimeRecord.objects.filter(status='CHECKED_IN', date__lt=end), 'timerecord_open_date_idx')
+        self.assertUsesIndex(MonthlyReport.objects.filter(year=2025, month=3), 'monthlyreport_period_idx')
+
+
+class CursorPaginationTests(TimekeepingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.employee = create_employee('EMP001')
+        for offset in range(30):
+            create_record(self.employee, date(2025, 1, 1) + timedelta(days=offset))
+        self.client = APIClient()
+        self.client.force_authenticate(self.employee.user)
+
+    def walk(self, url):
+        pages, queries = [], []
+        while url:
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data['results'])
+            queries.append([query['sql'] for query in captured.captured_queries])
+            url = response.data['next']
+        return pages, queries
+
+    def test_time_records_are_paged_by_keyset(self):
+        pages, queries = self.walk('/api/timerecords/?page_size=7')
+        dates = [record['date'] for page in pages for record in page]
+        self.assertEqual(len(pages), 5)
+        self.assertEqual(dates, sorted(dates, reverse=True))
+        self.assertEqual(len(set(dates)), 30)
+        # Deep pages seek to the cursor instead of skipping rows; the first request also caches the employee
+        self.assertEqual(len({len(page_queries) for page_queries in queries[1:]}), 1)
+        deep = next(sql for sql in queries[-1] if 'timekeeping_timerecord' in sql)
+        self.assertIn('"timekeeping_timerecord"."date" <', deep)
+        self.assertNotIn('OFFSET', deep)
+
+    def test_lists_paginate_only_on_request(self):
+        for i in range(2, 5):
+            create_employee(f'EMP{i:03d}')
+        response = self.client.get('/api/timerecords/')
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 30)
+        response = self.client.get('/api/employees/')
+        self.assertEqual([e['employee_id'] for e in response.data], ['EMP001', 'EMP002', 'EMP003', 'EMP004'])
+        pages, _ = self.walk('/api/employees/?page_size=3')
+        self.assertEqual([[e['employee_id'] for e in page] for page in pages],
+                         [['EMP001', 'EMP002', 'EMP003'], ['EMP004']])
+
+    def test_monthly_records_paginates_only_on_request(self):
+        response = self.client.get('/api/timerecords/monthly_records/?year=2025&month=1')
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 30)
+        pages, _ = self.walk('/api/timerecords/monthly_records/?year=2025&month=1&page_size=20')
+        self.assertEqual([len(page) for page in pages], [20, 10])
+
+
+class FastSerializerTests(TimekeepingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.employee = create_employee('EMP001')
+        create_record(self.employee, date(2025, 3, 3), hours=7.25)
+        create_record(self.employee, date(2025, 3, 4), forgot_checkout=True)
+        TimeRecord.objects.create(employee=self.employee, date=date(2025, 3, 5), status='CHECKED_IN',
+                                  check_in_time=timezone.make_aware(datetime(2025, 3, 5, 8, 30, 15, 123456)))
+
+    def assert_matches_serializer(self, queryset):
+        expected = JSONRenderer().render(TimeRecordSerializer(queryset, many=True).data)
+        rows = fast_serializers.time_record_values(queryset)
+        self.assertEqual(JSONRenderer().render(fast_serializers.serialize_time_records(rows)), expected)
+
+    def test_output_is_byte_identical(self):
+        records = TimeRecord.objects.all()
+        self.assert_matches_serializer(records)
+        with timezone.override('UTC'):
+            self.assert_matches_serializer(records)
+
+    def test_listings_use_one_records_query(self):
+        client = APIClient()
+        client.force_authenticate(self.employee.user)
+        client.get('/api/timerecords/current_status/')
+        for url in ['/api/timerecords/', '/api/timerecords/monthly_records/?year=2025&month=3']:
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len([q for q in queries if 'timekeeping_timerecord' in q['sql']]), 1)
+
+
+class ConditionalGetTests(TimekeepingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.employee = create_employee('EMP001')
+        self.record = create_record(self.employee, date(2025, 3, 3))
+        create_record(self.employee, date(2025, 3, 4))
+        self.client = APIClient()
+        self.client.force_authenticate(self.employee.user)
+        self.client.get('/api/timerecords/current_status/')
+
+    def revalidate(self, url, response, header='HTTP_IF_NONE_MATCH', value=None):
+        value = value or response['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            revalidated = self.client.get(url, **{header: value})
+        return revalidated, [q['sql'] for q in queries if 'timekeeping_timerecord' in q['sql']]
+
+    def test_unchanged_month_is_not_modified(self):
+        url = '/api/timerecords/monthly_records/?year=2025&month=3'
+        response = self.client.get(url)
+        self.assertEqual(len(response.data), 2)
+        self.assertIn('max-age=86400', response['Cache-Control'])
+
+        revalidated, queries = self.revalidate(url, response)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated['ETag'], response['ETag'])
+        self.assertEqual(len(queries), 1)
+        self.assertIn('MAX(', queries[0])
+        revalidated, _ = self.revalidate(url, response, 'HTTP_IF_MODIFIED_SINCE', response['Last-Modified'])
+        self.assertEqual(revalidated.status_code, 304)
+
+        self.record.working_hours = 6.0
+        self.record.save()
+        changed, _ = self.revalidate(url, response)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], response['ETag'])
+        self.record.delete()
+        self.assertEqual(self.revalidate(url, changed)[0].status_code, 200)
+
+    def test_open_periods_must_revalidate(self):
+        today = timezone.now().date()
+        response = self.client.get(f'/api/timerecords/monthly_records/?year={today.year}&month={today.month}')
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        url = '/api/timerecords/current_status/'
+        response = self.client.get(url)
+        self.assertEqual(self.revalidate(url, response)[0].status_code, 304)
+        self.client.post('/api/timerecords/checkin_checkout/')
+        changed, _ = self.revalidate(url, response)
+        self.assertEqual(changed.data['status'], 'CHECKED_IN')
+
+    def test_pages_are_validated_separately(self):
+        first = self.client.get('/api/timerecords/?page_size=1')
+        second = self.client.get(first.data['next'])
+        self.assertNotEqual(first['ETag'], second['ETag'])
+        revalidated, queries = self.revalidate(first.data['next'], second)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(len(queries), 1)
+        create_record(self.employee, date(2025, 3, 5))
+        self.assertEqual(self.revalidate('/api/timerecords/?page_size=1', first)[0].status_code, 200)
+
+
+class ImportPunchesTests(AdminTestCase):
+
+    PUNCHES = (
+        'employee_id,timestamp,device\n'
+        'EMP001,2025-03-03T17:30:00+07:00,door-2\n'
+        'EMP001,2025-03-03T08:00:00+07:00,door-1\n'
+        'EMP001,2025-03-03T12:10:00+07:00,door-1\n'
+        'EMP002,2025-03-03T09:00:00,door-1\n'
+        'EMP002,2025-03-04T09:00:00+07:00,door-1\n'
+        'EMP999,2025-03-03T09:00:00+07:00,door-1\n'
+        'EMP001,yesterday,door-1\n'
+    )
+
+    def setUp(self):
+        super().setUp()
+        self.first = create_employee('EMP001')
+        self.second = create_employee('EMP002')
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'punches.csv')
+        with open(self.path, 'w') as f:
+            f.write(self.PUNCHES)
+
+    def import_file(self):
+        out, err = StringIO(), StringIO()
+        call_command('import_punches', self.path, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def records(self):
+        return list(TimeRecord.objects.order_by('employee__employee_id', 'date').values_list(
+            'employee__employee_id', 'date', 'check_in_time', 'check_out_time', 'status', 'working_hours'
+        ))
+
+    def test_pairs_first_and_last_punch(self):
+        out, err = self.import_file()
+        self.assertIn('Imported 7 punches into 3 time records (1 invalid)', out)
+        self.assertIn('Line 8', err)
+        self.assertIn('EMP999', err)
+        tz = timezone.get_current_timezone()
+        self.assertEqual(self.records(), [
+            ('EMP001', date(2025, 3, 3), datetime(2025, 3, 3, 8, tzinfo=tz), datetime(2025, 3, 3, 17, 30, tzinfo=tz),
+             'CHECKED_OUT', 9.5),
+            ('EMP002', date(2025, 3, 3), datetime(2025, 3, 3, 9, tzinfo=tz), None, 'FORGOT_CHECKOUT', 0.0),
+            ('EMP002', date(2025, 3, 4), datetime(2025, 3, 4, 9, tzinfo=tz), None, 'FORGOT_CHECKOUT', 0.0),
+        ])
+        report = MonthlyReport.objects.get(employee=self.second, year=2025, month=3)
+        self.assertEqual((report.total_working_days, report.days_forgot_checkout), (2, 2))
+
+    def test_reimport_is_idempotent(self):
+        create_record(self.first, date(2025, 3, 3), hours=2.0)
+        self.import_file()
+        imported = self.records()
+        reports = list(MonthlyReport.objects.order_by('employee__employee_id').values_list(
+            'total_working_days', 'total_working_hours', 'days_forgot_checkout'
+        ))
+        self.import_file()
+        self.assertEqual(self.records(), imported)
+        self.assertEqual(reports, [(1, 9.5, 0), (2, 0.0, 2)])
+        self.assertEqual(list(MonthlyReport.objects.order_by('employee__employee_id').values_list(
+            'total_working_days', 'total_working_hours', 'days_forgot_checkout'
+        )), reports)
+
+    def test_rebuilds_only_imported_employee_months(self):
+        third = create_employee('EMP003')
+        untouched = [
+            MonthlyReport.objects.create(employee=third, year=2025, month=3, total_working_days=5,
+                                         total_working_hours=40.0, days_forgot_checkout=0, days_off=26),
+            MonthlyReport.objects.create(employee=self.first, year=2025, month=2, total_working_days=3,
+                                         total_working_hours=24.0, days_forgot_checkout=0, days_off=25),
+        ]
+        with open(self.path, 'w') as f:
+            f.write('employee_id,timestamp\nEMP001,2025-01-06T08:00:00\nEMP001,2025-03-03T08:00:00\n')
+        self.import_file()
+        self.assertEqual(
+            sorted(MonthlyReport.objects.values_list('employee__employee_id', 'month', 'total_working_days')),
+            [('EMP001', 1, 1), ('EMP001', 2, 3), ('EMP001', 3, 1), ('EMP003', 3, 5)]
+        )
+        for report in untouched:
+            self.assertEqual(MonthlyReport.objects.get(pk=report.pk).total_working_hours, report.total_working_hours)
+
+    def test_upload_endpoint(self):
+        with open(self.path, 'rb') as f:
+            response = self.client.post('/api/admin/import_punches/', {'file': f}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['rows'], response.data['records']), (7, 3))
+        self.assertIn('rows_per_second', response.data)
+        self.assertEqual(self.client.post('/api/admin/import_punches/', {}, format='multipart').status_code, 400)
+
+        bad = SimpleUploadedFile('punches.csv', b'who,when\nEMP001,2025-03-03T08:00:00\n')
+        response = self.client.post('/api/admin/import_punches/', {'file': bad}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+
+        self.client.force_authenticate(self.first.user)
+        self.assertEqual(self.client.post('/api/admin/import_punches/', {}, format='multipart').status_code, 403)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class BulkCorrectionTests(AdminTestCase):
+    URL = '/api/admin/bulk_corrections/'
+
+    def setUp(self):
+        super().setUp()
+        self.first = create_employee('EMP001')
+        self.second = create_employee('EMP002')
+
+    def post(self, **body):
+        return self.client.post(self.URL, body, format='json')
+
+    def test_corrections_update_and_create_records(self):
+        forgotten = create_record(self.first, date(2025, 3, 3), forgot_checkout=True)
+        response = self.post(corrections=[
+            {'employee_id': 'EMP001', 'date': '2025-03-03', 'check_out_time': '2025-03-03T17:20:00+07:00'},
+            {'employee_id': 'EMP002', 'date': '2025-03-03',
+             'check_in_time': '2025-03-03T08:05:00', 'check_out_time': '2025-03-03T16:45:30'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(row['row'], row['action']) for row in response.data['results']], [(0, 'updated'), (1, 'created')])
+        self.assertEqual((response.data['updated'], response.data['created']), (1, 1))
+
+        forgotten.refresh_from_db()
+        self.assertEqual((forgotten.status, forgotten.forgot_checkout, forgotten.working_hours), ('CHECKED_OUT', False, 9.33))
+        created = TimeRecord.objects.get(employee=self.second)
+        self.assertEqual(created.working_hours, created.calculate_working_hours())
+        self.assertEqual(response.data['results'][1]['record']['working_hours'], 8.68)
+        self.assertEqual(
+            list(MonthlyReport.objects.order_by('employee__employee_id').values_list('total_working_hours', 'days_forgot_checkout')),
+            [(9.33, 0), (8.68, 0)]
+        )
+
+    def test_invalid_batch_writes_nothing(self):
+        create_record(self.first, date(2025, 3, 3), forgot_checkout=True)
+        response = self.post(corrections=[
+            {'employee_id': 'EMP001', 'date': '2025-03-03', 'check_out_time': '2025-03-03T07:00:00+07:00'},
+            {'employee_id': 'EMP002', 'date': '2025-03-03', 'check_in_time': '2025-03-03T08:00:00'},
+            {'employee_id': 'EMP002', 'date': '2025-03-03', 'check_out_time': '2025-03-03T17:00:00'},
+            {'employee_id': 'EMP999', 'date': '03/03/2025'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.data['applied'])
+        self.assertEqual([row['action'] for row in response.data['results']], ['error', 'valid', 'error', 'error'])
+        self.assertEqual(response.data['results'][0]['errors'], ['check_out_time must be after check_in_time'])
+        self.assertEqual(response.data['results'][2]['errors'], ['Duplicate of row 1'])
+        self.assertEqual(len(response.data['results'][3]['errors']), 3)
+        self.assertEqual(TimeRecord.objects.count(), 1)
+        self.assertEqual(TimeRecord.objects.get().status, 'FORGOT_CHECKOUT')
+
+    def test_close_open_records_of_a_day(self):
+        day = date(2025, 3, 3)
+        tz = timezone.get_current_timezone()
+        third, fourth = create_employee('EMP003'), create_employee('EMP004')
+        for employee, hour in [(self.first, 8), (self.second, 9), (third, 18)]:
+            TimeRecord.objects.create(employee=employee, date=day, status='CHECKED_IN',
+                                      check_in_time=datetime(2025, 3, 3, hour, tzinfo=tz))
+        create_record(fourth, day, hours=4)
+        response = self.post(
+            corrections=[{'employee_id': 'EMP002', 'date': '2025-03-03', 'check_out_time': '2025-03-03T12:00:00'}],
+            close_open={'date': '2025-03-03', 'check_out_time': '2025-03-03T17:30:00'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted((row['employee_id'], row['action']) for row in response.data['results']),
+                         [('EMP001', 'closed'), ('EMP002', 'updated'), ('EMP003', 'skipped')])
+        self.assertEqual(
+            list(TimeRecord.objects.order_by('employee__employee_id').values_list('status', 'working_hours')),
+            [('CHECKED_OUT', 9.5), ('CHECKED_OUT', 3.0), ('CHECKED_IN', 0.0), ('CHECKED_OUT', 4.0)]
+        )
+
+    def test_close_open_rejects_malformed_times_and_other_days(self):
+        for check_out_time in [1741000000, True, None, '2025-03-04T17:30:00', '2025-03-03T03:00:00']:
+            response = self.post(close_open={'date': '2025-03-03', 'check_out_time': check_out_time})
+            self.assertEqual(response.status_code, 400, check_out_time)
+            self.assertIn('check_out_time', response.data['message'])
+
+    def test_rollups_of_other_employees_are_left_alone(self):
+        MonthlyReport.objects.create(employee=self.second, year=2025, month=3, total_working_days=5,
+                                     total_working_hours=40.0, days_forgot_checkout=0, days_off=26)
+        self.post(corrections=[{'employee_id': 'EMP001', 'date': '2025-03-03',
+                                'check_in_time': '2025-03-03T08:00:00', 'check_out_time': '2025-03-03T17:00:00'}])
+        self.assertEqual(
+            list(MonthlyReport.objects.order_by('employee__employee_id').values_list('total_working_days', 'total_working_hours')),
+            [(1, 9.0), (5, 40.0)]
+        )
+
+    def test_thousands_of_rows_in_one_request(self):
+        Employee.objects.bulk_create([
+            Employee(user=User.objects.create_user(username=f'bulk{i}'), employee_id=f'BULK{i:04d}',
+                     full_name=f'Bulk {i}', department='QA', position='QA Engineer')
+            for i in range(1200)
+        ])
+        rows = [{'employee_id': f'BULK{i:04d}', 'date': '2025-03-03',
+                 'check_in_time': '2025-03-03T08:00:00', 'check_out_time': f'2025-03-03T16:{i % 60:02d}:00'}
+                for i in range(1200)]
+        response = self.post(corrections=rows)
+        self.assertEqual(response.data['created'], 1200)
+        self.assertEqual(TimeRecord.objects.filter(working_hours__gte=8, working_hours__lt=9).count(), 1200)
+        self.assertEqual(MonthlyReport.objects.filter(month=3).count(), 1200)
+
+        rows = [{**row, 'check_out_time': '2025-03-03T18:00:00'} for row in rows]
+        response = self.post(corrections=rows)
+        self.assertEqual(response.data['updated'], 1200)
+        self.assertEqual(set(TimeRecord.objects.values_list('working_hours', flat=True)), {10.0})
+
+    def test_admin_and_well_formed_body_required(self):
+        self.assertEqual(self.post().status_code, 400)
+        self.assertEqual(self.post(close_open={'date': '2025-03-03'}).status_code, 400)
+        self.client.force_authenticate(self.first.user)
+        self.assertEqual(self.post(close_open={'date': '2025-03-03', 'check_out_time': '2025-03-03T17:00:00'}).status_code, 403)
+
+
+class GenerateDatasetTests(TimekeepingTestCase):
+
+    def generate(self, **options):
+        out = StringIO()
+        call_command('generate_dataset', employees=20, months=2, end='2025-02', seed=7, stdout=out, **options)
+        return out.getvalue()
+
+    def snapshot(self):
+        return list(TimeRecord.objects.order_by('employee__employee_id', 'date').values_list(
+            'id', 'employee', 'employee__employee_id', 'employee__department', 'date', 'check_in_time',
+            'check_out_time', 'status', 'working_hours', 'forgot_checkout'
+        ))
+
+    def test_same_seed_same_dataset(self):
+        self.assertIn('Created 20 employees', self.generate())
+        first = self.snapshot()
+        User.objects.filter(username__startswith='gen').delete()
+        self.generate()
+        self.assertEqual(self.snapshot(), first)
+        self.assertTrue(User.objects.get(username='gen000001').check_password('password123'))
+        with self.assertRaises(CommandError):
+            self.generate()
+
+    def test_rates_and_rollups(self):
+        self.generate(forgot_rate=0, absence_rate=0)
+        weekdays = sum(1 for day in range(59) if (date(2025, 1, 1) + timedelta(days=day)).weekday() < 5)
+        self.assertEqual(TimeRecord.objects.count(), 20 * weekdays)
+        self.assertFalse(TimeRecord.objects.filter(forgot_checkout=True).exists())
+
+        self.generate(prefix='ABS', forgot_rate=0.5, absence_rate=0.5)
+        records = TimeRecord.objects.filter(employee__employee_id__startswith='ABS')
+        self.assertLess(records.count(), 20 * weekdays * 0.7)
+        self.assertTrue(records.filter(forgot_checkout=True, check_out_time__isnull=True).exists())
+        reports = MonthlyReport.objects.filter(year=2025, month=2, employee__employee_id__startswith='ABS')
+        self.assertEqual(reports.count(), 20)
+        for report in reports:
+            month = records.filter(employee=report.employee, **in_month(2025, 2))
+            self.assertEqual(report.total_working_days, month.count())
+            self.assertEqual(report.days_forgot_checkout, month.filter(forgot_checkout=True).count())
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class EndpointBenchmarkTests(TimekeepingTestCase):
+
+    def test_query_budgets_hold_as_employees_grow(self):
+        results = benchmarks.run_benchmarks(scales=[3, 30], repeat=1)
+        self.assertEqual(set(results['30']), {name for name, _, _, _ in benchmarks.ENDPOINTS})
+        self.assertEqual(benchmarks.check(results), [])
+        for name, metrics in results['30'].items():
+            self.assertEqual(metrics['queries'], results['3'][name]['queries'], name)
+
+    def test_budgets_and_baseline_regressions(self):
+        baseline = {'100': {'system_stats': {'wall_ms': 10.0, 'wall_ms_max': 12.0, 'queries': 1, 'peak_mib': 2.0}}}
+        slower = {'100': {'system_stats': {'wall_ms': 40.0, 'wall_ms_max': 45.0, 'queries': 1, 'peak_mib': 2.5}}}
+        self.assertEqual(benchmarks.check(baseline, baseline=slower), [])
+        self.assertEqual(benchmarks.check(slower, baseline=baseline),
+                         ['system_stats@100: wall_ms went from 10.0 to 40.0'])
+        self.assertEqual(
+            benchmarks.check(slower, budgets={'system_stats': {'queries': 0}, 'system_stats@100': {'wall_ms': 30}}),
+            ['system_stats@100: queries 1 exceeds the budget of 0',
+             'system_stats@100: wall_ms 40.0 exceeds the budget of 30'],
+        )
+
+    def test_cached_auth_drops_the_session_and_user_queries(self):
+        results = benchmarks.run_auth_benchmarks(repeat=1)
+        self.assertEqual(benchmarks.check(results, benchmarks.AUTH_BUDGETS), [])
+        for name, _, _ in benchmarks.AUTH_ENDPOINTS:
+            self.assertEqual(results['db_session'][name]['queries'] - results['cached_session'][name]['queries'], 2)
+            self.assertEqual(results['token'][name]['queries'], results['cached_session'][name]['queries'])
+
+
+class RequestMetricsTests(AdminTestCase):
+
+    def setUp(self):
+        super().setUp()
+        metrics.registry.reset()
+        self.employee = create_employee('EMP001')
+        self.employee_client = APIClient()
+        self.employee_client.force_authenticate(self.employee.user)
+
+    def scrape(self):
+        response = self.client.get('/api/admin/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        for line in body.splitlines():
+            if not line.startswith('#'):
+                self.assertRegex(line, r'^[a-z_]+\{[^}]*\} [0-9.e+-]+$')
+        return body
+
+    def test_actions_are_measured(self):
+        self.employee_client.post('/api/timerecords/checkin_checkout/')
+        self.employee_client.post('/api/timerecords/checkin_checkout/')
+        self.employee_client.get('/api/timerecords/')
+        size = len(self.client.get('/api/admin/comprehensive_excel/?year=2025&month=3').content)
+
+        body = self.scrape()
+        self.assertIn('timekeeping_request_duration_seconds_count{action="timerecord.checkin_checkout"} 2', body)
+        self.assertIn('timekeeping_request_duration_seconds_bucket{action="timerecord.list",le="+Inf"} 1', body)
+        self.assertIn('timekeeping_responses_total{action="timerecord.checkin_checkout",status="200"} 2', body)
+        self.assertIn(f'timekeeping_response_size_bytes_sum{{action="admin.comprehensive_excel"}} {size}', body)
+        self.assertRegex(body, r'timekeeping_request_db_queries_sum\{action="admin.comprehensive_excel"\} [1-9]')
+        self.assertRegex(body, r'timekeeping_db_query_duration_seconds_total\{action="timerecord.list"\} [0-9.e-]+')
+
+    def test_url_names_are_unchanged(self):
+        self.assertEqual(reverse('employee-list'), '/api/employees/')
+        self.assertEqual(reverse('timerecord-detail', kwargs={'pk': 1}), '/api/timerecords/1/')
+
+    def test_metrics_are_admin_only(self):
+        self.assertEqual(self.employee_client.get('/api/admin/metrics/').status_code, 403)
+
+    @override_settings(TIMEKEEPING_SLOW_REQUEST_SECONDS=0)
+    def test_slow_requests_are_logged_with_their_queries(self):
+        with self.assertLogs('timekeeping.slow_requests', 'WARNING') as logs:
+            self.employee_client.get('/api/timerecords/monthly_records/?year=2025&month=3')
+        self.assertIn('(timerecord.monthly_records)', logs.output[0])
+        self.assertIn('FROM "timekeeping_timerecord"', logs.output[0])
+
+
+class DepartmentSummaryTests(AdminTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.add_employees(2)
+        qa = create_employee('QA001', department='QA', position='QA Engineer')
+        create_record(qa, date(2025, 3, 3), hours=6.0)
+
+    def test_summary_is_one_grouped_query(self):
+        today = timezone.now().date()
+        TimeRecord.objects.create(employee=Employee.objects.get(employee_id='QA001'), date=today,
+                                  check_in_time=timezone.now(), status='CHECKED_IN')
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/admin/department_summary/?year=2025&month=3')
+        departments = response.data['departments']
+        self.assertEqual([row['department'] for row in departments], [code for code, _ in Employee.DEPARTMENTS])
+        engineering, qa = departments[0], departments[1]
+        self.assertEqual(engineering['headcount'], 2)
+        self.assertEqual(engineering['total_working_hours'], 31.0)
+        self.assertEqual(engineering['average_hours_per_employee'], 15.5)
+        self.assertEqual(engineering['average_hours_per_day'], 5.17)
+        self.assertEqual(engineering['forgotten_checkouts'], 2)
+        self.assertEqual(qa['checked_in_now'], 1)
+        self.assertEqual(departments[2]['headcount'], 0)
+
+    def test_admin_endpoints_filter_by_department(self):
+        response = self.client.get('/api/admin/department_summary/?year=2025&month=3&department=QA')
+        self.assertEqual([row['department'] for row in response.data['departments']], ['QA'])
+        response = self.client.get('/api/admin/all_employees/?department=QA')
+        self.assertEqual([row['employee_id'] for row in response.data], ['QA001'])
+        response = self.client.get('/api/admin/all_employees_records/?year=2025&month=3&department=QA')
+        self.assertEqual(len(response.data['employees_data']), 1)
+        self.assertEqual(len(response.data['employees_data'][0]['stats']['records']), 1)
+        response = self.client.get('/api/admin/system_stats/?department=ENGINEERING')
+        self.assertEqual(response.data['total_employees'], 2)
+
+        response = self.run_report('/api/admin/comprehensive_excel/?year=2025&month=3&department=QA')
+        self.assertIn('admin_comprehensive_report_3_2025_qa.xlsx', response['Content-Disposition'])
+        wb = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)
+        self.assertEqual([row[0] for row in wb['Summary'].values], ['Employee ID', 'QA001'])
+        self.assertEqual(len(list(wb['Detailed Records'].values)), 2)
+
+    def test_unknown_department(self):
+        for url in ['/api/admin/department_summary/', '/api/admin/all_employees/', '/api/admin/system_stats/',
+                    '/api/reports/monthly_excel/']:
+            self.assertEqual(self.client.get(url + '?department=LEGAL').status_code, 400)
+
+
+class AnalyticsTests(AdminTestCase):
+    URL = '/api/admin/analytics/?start=2025-02-01&end=2025-03-31'
+
+    def setUp(self):
+        super().setUp()
+        self.engineer = create_employee('EMP000')
+        self.tester = create_employee('EMP001', department='QA', position='QA Engineer')
+        create_record(self.engineer, date(2025, 2, 3), hours=8.0)
+        create_record(self.engineer, date(2025, 2, 4), hours=6.0)
+        create_record(self.engineer, date(2025, 3, 3), hours=8.0)
+        create_record(self.engineer, date(2025, 3, 4), hours=7.5)
+        create_record(self.engineer, date(2025, 3, 5), forgot_checkout=True)
+        create_record(self.tester, date(2025, 3, 3), hours=9.0)
+
+    def test_monthly_series(self):
+        data = self.client.get(self.URL).data
+        self.assertEqual(data['periods'], ['2025-02', '2025-03'])
+        self.assertEqual(data['working_days'], [20, 21])
+
+        engineer, tester = data['employees']
+        self.assertEqual(engineer['employee_id'], 'EMP000')
+        self.assertEqual(engineer['days_present'], [2, 3])
+        self.assertEqual(engineer['total_hours'], [14.0, 15.5])
+        self.assertEqual(engineer['attendance_rate'], [0.1, 0.1429])
+        self.assertEqual(engineer['forgot_checkout_rate'], [0.0, 0.3333])
+        self.assertEqual(engineer['p10_daily_hours'], [6.2, 7.55])
+        self.assertEqual(engineer['median_daily_hours'], [7.0, 7.75])
+        self.assertEqual(engineer['p90_daily_hours'], [7.8, 7.95])
+        self.assertEqual(tester['days_present'], [0, 1])
+        self.assertEqual(tester['forgot_checkout_rate'], [None, 0.0])
+        self.assertEqual(tester['median_daily_hours'], [None, 9.0])
+
+        departments = {row['department']: row for row in data['departments']}
+        self.assertEqual(list(departments), ['ENGINEERING', 'QA'])
+        self.assertEqual(departments['QA']['employees'], 1)
+        self.assertEqual(departments['ENGINEERING']['total_hours'], engineer['total_hours'])
+
+    def test_filters(self):
+        data = self.client.get(self.URL + '&department=QA&employees=false').data
+        self.assertNotIn('employees', data)
+        self.assertEqual([row['department'] for row in data['departments']], ['QA'])
+
+        data = self.client.get('/api/admin/analytics/?start=2025-03-04&end=2025-03-31').data
+        self.assertEqual(data['working_days'], [20])
+        self.assertEqual(data['employees'][0]['days_present'], [2])
+
+    def test_month_columns_are_cached_until_a_record_changes(self):
+        self.client.get(self.URL)
+        with self.assertNumQueries(1):
+            self.client.get(self.URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_record(self.tester, date(2025, 2, 5), hours=8.0)
+        data = self.client.get(self.URL).data
+        self.assertEqual(data['employees'][1]['days_present'], [1, 1])
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get('/api/admin/analytics/?start=March').status_code, 400)
+        self.assertEqual(self.client.get('/api/admin/analytics/?start=2025-04-01&end=2025-03-01').status_code, 400)
+        self.assertEqual(self.client.get('/api/admin/analytics/?start=2020-01-01&end=2025-01-01').status_code, 400)
+        self.assertEqual(self.client.get(self.URL + '&department=LEGAL').status_code, 400)
+        employee_client = APIClient()
+        employee_client.force_authenticate(self.engineer.user)
+        self.assertEqual(employee_client.get(self.URL).status_code, 403)
+
+    def test_grouped_percentiles_match_numpy(self):
+        rng = np.random.default_rng(0)
+        keys = rng.integers(0, 50, 2000)
+        for values in (rng.uniform(1, 12, 2000), np.round(rng.uniform(1, 12, 2000), 2)):
+            records = analytics.prepare_records(values, np.zeros(len(values), dtype=bool))
+            results = analytics.grouped_percentiles(keys, records['ranks'], records['distinct'], 51, [10, 50, 90])
+            for key in range(50):
+                expected = np.percentile(values[keys == key], [10, 50, 90])
+                np.testing.assert_allclose([result[key] for result in results], expected)
+            self.assertTrue(all(np.isnan(result[50]) for result in results))
+
+
+class WorkingHoursPolicyTests(TimekeepingTestCase):
+    POLICIES = [
+        {},
+        {'break_minutes': 60, 'break_after_hours': 6},
+        {'round_minutes': 15},
+        {'max_hours': 10},
+        {'break_minutes': 45, 'break_after_hours': 5.5, 'round_minutes': 7.5, 'max_hours': 9.25},
+    ]
+
+    def policy_settings(self, options):
+        return override_settings(TIMEKEEPING_WORKING_HOURS_POLICY={
+            'BACKEND': 'timekeeping.hours.WorkingHoursPolicy', 'OPTIONS': options,
+        })
+
+    def test_default_policy_rounds_halves_up(self):
+        policy = hours.get_policy()
+        # round(seconds / 3600, 2) gave 0.01 for both 18 and 54 seconds
+        self.assertEqual([policy.hours_for(seconds * 10 ** 6) for seconds in [17, 18, 54, 8 * 3600 + 54]],
+                         [0.0, 0.01, 0.02, 8.02])
+
+    def test_database_expression_matches_python(self):
+        rng = random.Random(25)
+        employees = [create_employee(f'EMP{i:03d}') for i in range(4)]
+        records = []
+        for day in range(200):
+            check_in = timezone.make_aware(datetime(2025, 1, 1, 6) + timedelta(days=day, seconds=rng.randrange(10800),
+                                                                                 microseconds=rng.randrange(10 ** 6)))
+            # Any span up to 16 hours, or one on a rounding tie: a multiple of 18 seconds or 3.75 minutes
+            span = rng.choice([
+                timedelta(microseconds=rng.randrange(16 * 3600 * 10 ** 6)),
+                timedelta(seconds=18 * rng.randrange(3200)),
+                timedelta(seconds=225 * rng.randrange(256)),
+            ])
+            check_out = rng.choice([check_in + span, check_in + span, check_in - span, None])
+            for employee in employees[:rng.randrange(1, 5)]:
+                records.append(TimeRecord(employee=employee, date=check_in.date(), check_in_time=check_in,
+                                          check_out_time=check_out, status='CHECKED_OUT'))
+        TimeRecord.objects.bulk_create(records)
+
+        for options in self.POLICIES:
+            with self.subTest(options=options), self.policy_settings(options):
+                policy = hours.get_policy()
+                rows = TimeRecord.objects.annotate(sql_hours=policy.expression()).values_list(
+                    'check_in_time', 'check_out_time', 'sql_hours'
+                )
+                mismatches = [row for row in rows if policy.hours(row[0], row[1]) != row[2]]
+                self.assertEqual(mismatches, [])
+
+    def test_integer_division_truncates_on_every_backend(self):
+        pairs = [(0, 7), (6, 7), (7, 7), (20, 7), (10 ** 12 + 5, 36 * 10 ** 6)]
+        employee = create_employee('EMP001')
+        annotations = {f'q{i}': hours.IntegerDivision(Value(a), Value(b)) for i, (a, b) in enumerate(pairs)}
+        values = Employee.objects.filter(pk=employee.pk).annotate(**annotations).values(*annotations).get()
+        self.assertEqual([values[f'q{i}'] for i in range(len(pairs))], [a // b for a, b in pairs])
+
+        # MySQL's / gives a DECIMAL, so the expression must render DIV there
+        compiler = Employee.objects.all().query.get_compiler(connection=connection)
+        sql, params = hours.IntegerDivision(Value(20), Value(7)).as_mysql(compiler, connection)
+        self.assertEqual((sql, params), ('(%s DIV %s)', [20, 7]))
+
+    def test_checkout_applies_the_policy(self):
+        record = TimeRecord(check_in_time=timezone.now(), check_out_time=timezone.now() + timedelta(hours=8, minutes=8))
+        self.assertEqual(record.calculate_working_hours(), 8.13)
+        with self.policy_settings(self.POLICIES[-1]):
+            self.assertEqual(record.calculate_working_hours(), 7.38)
+
+    def test_recompute_command_updates_records_and_reports(self):
+        employee = create_employee('EMP001')
+        for day, worked in [(3, 8.0), (4, 5.0), (5, 9.5)]:
+            create_record(employee, date(2025, 3, day), hours=worked)
+        create_record(employee, date(2025, 3, 6), forgot_checkout=True)
+        create_record(employee, date(2025, 4, 1), hours=8.0)
+
+        out = StringIO()
+        with self.policy_settings(self.POLICIES[1]):
+            call_command('recompute_working_hours', '--from', '2025-03-01', '--to', '2025-03-31', '--chunk-days', '2', stdout=out)
+            self.assertIn('Recomputed 2 time records; rebuilt the reports of 1 months', out.getvalue())
+            call_command('recompute_working_hours', '--from', '2025-03-01', '--to', '2025-03-31', stdout=out)
+            self.assertIn('Recomputed 0 time records', out.getvalue())
+
+        self.assertEqual(list(TimeRecord.objects.order_by('date').values_list('working_hours', flat=True)),
+                         [7.0, 5.0, 8.5, 0.0, 8.0])
+        self.assertEqual(MonthlyReport.objects.get(month=3).total_working_hours, 20.5)
+        with self.assertRaises(CommandError):
+            call_command('recompute_working_hours', '--from', '2025-03-31', '--to', '2025-03-01')
+
+
+class ArchiveTests(AdminTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.add_employees(2)
+        self.employee = Employee.objects.get(employee_id='EMP000')
+        self.hot = create_record(self.employee, timezone.now().date() - timedelta(days=1))
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command('archive_timerecords', *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def responses(self):
+        employee_client = APIClient()
+        employee_client.force_authenticate(self.employee.user)
+        records = employee_client.get('/api/timerecords/monthly_records/?year=2025&month=3').data
+        report = self.run_report('/api/admin/comprehensive_excel/?year=2025&month=3')
+        wb = load_workbook(BytesIO(b''.join(report.streaming_content)), read_only=True)
+        return records, [list(wb[name].values) for name in wb.sheetnames]
+
+    def test_old_months_move_to_the_archive_and_read_the_same(self):
+        before = self.responses()
+        self.assertIn('Archived 6 records of 03/2025', self.archive())
+
+        self.assertEqual(TimeRecordArchive.objects.count(), 6)
+        self.assertEqual(list(TimeRecord.objects.all()), [self.hot])
+        self.assertEqual(ArchivedMonth.objects.get(year=2025, month=3).records, 6)
+        self.assertEqual(self.responses(), before)
+        self.assertEqual(len(before[0]), 3)
+        # Rebuilding the rollups of an archived month reads the archive
+        rollups_before = list(MonthlyReport.objects.filter(year=2025, month=3).order_by('employee__employee_id').values_list(
+            'total_working_days', 'total_working_hours', 'days_forgot_checkout'))
+        call_command('rebuild_monthly_reports', '--from', '2025-03', '--to', '2025-03', stdout=StringIO())
+        self.assertEqual(list(MonthlyReport.objects.filter(year=2025, month=3).order_by('employee__employee_id').values_list(
+            'total_working_days', 'total_working_hours', 'days_forgot_checkout')), rollups_before)
+
+        self.assertIn('Restored 6 records of 03/2025', self.archive('--restore', '2025-03'))
+        self.assertEqual(TimeRecord.objects.count(), 7)
+        self.assertFalse(ArchivedMonth.objects.exists())
+        self.assertEqual(self.responses(), before)
+
+    def test_full_rebuilds_and_the_backfill_include_archived_months(self):
+        def reports():
+            return list(MonthlyReport.objects.order_by('employee__employee_id', 'year', 'month').values_list(
+                'employee__employee_id', 'year', 'month', 'total_working_days', 'total_working_hours',
+                'days_forgot_checkout'))
+
+        backfill = import_module('timekeeping.migrations.0007_backfill_monthly_reports').backfill_monthly_reports
+        self.archive()
+        expected = reports()
+        for rebuild in [lambda: call_command('rebuild_monthly_reports', stdout=StringIO()),
+                        lambda: backfill(django_apps, None)]:
+            MonthlyReport.objects.all().delete()
+            rebuild()
+            self.assertEqual(reports(), expected)
+
+    def test_hot_window_and_open_records_stay_put(self):
+        start = archive.hot_window_start()
+        with self.assertRaises(ValueError):
+            archive.archive_month(start.year, start.month)
+        TimeRecord.objects.filter(date=date(2025, 3, 5)).update(status='CHECKED_IN')
+        self.assertIn('Archived 0 records', self.archive())
+        self.assertEqual(TimeRecordArchive.objects.count(), 0)
+
+    def test_hot_months_need_no_lookup(self):
+        with self.assertNumQueries(0):
+            self.assertIs(archive.record_model(self.hot.date.year, self.hot.date.month), TimeRecord)
+        with self.assertNumQueries(1):
+            self.assertIs(archive.record_model(2025, 3), TimeRecord)
+
+    def test_punches_into_archived_months_are_rejected(self):
+        self.archive()
+        with self.assertRaisesMessage(PunchFileError, '03/2025'):
+            import_punches(['employee_id,timestamp\n', 'EMP000,2025-03-10T08:00:00+07:00\n'])
+
+
+class ReportingDatabaseTests(TransactionTestCase):
+    """Report reads against a second SQLite file standing in for a replica"""
+    databases = '__all__'  # 'reporting' is registered in setUpClass
+
+    @classmethod
+    def setUpClass(cls):
+        cls.replica_dir = tempfile.mkdtemp()
+        connections.settings['reporting'] = {
+            **connections.settings['default'], 'NAME': os.path.join(cls.replica_dir, 'reporting.sqlite3')
+        }
+        routing.sync_sqlite_replica('reporting')
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['reporting'].close()
+        del connections['reporting']
+        del connections.settings['reporting']
+        shutil.rmtree(cls.replica_dir)
+
+    def setUp(self):
+        cache.clear()
+        self.employee = create_employee('EMP001')
+        self.client = APIClient()
+        self.client.force_authenticate(self.employee.user)
+        self.admin = APIClient()
+        self.admin.force_authenticate(User.objects.create_user(username='admin', is_staff=True))
+        create_record(self.employee, date(2025, 3, 3))
+        routing.sync_sqlite_replica()
+        create_record(self.employee, date(2025, 3, 4))  # not replicated yet
+
+    def test_report_reads_use_the_replica(self):
+        response = self.admin.get('/api/admin/all_employees_records/?year=2025&month=3')
+        self.assertEqual(len(response.data['employees_data'][0]['stats']['records']), 1)
+        response = self.client.get('/api/timerecords/monthly_records/?year=2025&month=3')
+        self.assertEqual(len(response.data), 1)
+        # Other reads stay on the primary
+        self.assertEqual(len(self.client.get('/api/timerecords/').data), 2)
+
+        routing.sync_sqlite_replica()
+        response = self.client.get('/api/timerecords/monthly_records/?year=2025&month=3')
+        self.assertEqual(len(response.data), 2)
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        response = self.client.post('/api/timerecords/checkin_checkout/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(routing.PIN_COOKIE, response.cookies)
+        self.assertFalse(TimeRecord.objects.using('reporting').filter(date=timezone.now().date()).exists())
+
+        today = timezone.now()
+        url = f'/api/timerecords/monthly_records/?year={today.year}&month={today.month}'
+        self.assertEqual(len(self.client.get(url).data), 1)
+        other_client = APIClient()
+        other_client.force_authenticate(self.employee.user)
+        self.assertEqual(other_client.get(url).data, [])
+
+    def test_request_metrics_count_reporting_queries(self):
+        metrics.registry.reset()
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['reporting']) as replica:
+            self.client.get('/api/timerecords/monthly_records/?year=2025&month=3')
+        self.assertTrue(replica.captured_queries)
+        self.assertIn(
+            f'timekeeping_request_db_queries_sum{{action="timerecord.monthly_records"}} {len(primary) + len(replica)}',
+            metrics.registry.render()
+        )
+
+    @override_settings(TIMEKEEPING_REPORTING_DATABASE='missing')
+    def test_reads_stay_on_the_primary_without_a_reporting_database(self):
+        response = self.client.get('/api/timerecords/monthly_records/?year=2025&month=3')
+        self.assertEqual(len(response.data), 2)
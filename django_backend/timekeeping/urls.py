@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register(r'auth', views.AuthViewSet, basename='auth')
@@ -8,7 +8,17 @@ router.register(r'employees', views.EmployeeViewSet)
 router.register(r'timerecords', views.TimeRecordViewSet)
 router.register(r'reports', views.ReportViewSet, basename='reports')
 router.register(r'admin', views.AdminViewSet, basename='admin')
+router.register(r'report-jobs', views.ReportJobViewSet, basename='report-jobs')
+
+# Served by the ASGI application in front of the router (see hrms.asgi_urls); named
+# like the DRF actions they replace, so request metrics group them together
+async_urlpatterns = [
+    path('auth/status/', async_views.auth_status, name='auth.status'),
+    path('timerecords/checkin_checkout/', async_views.checkin_checkout, name='timerecord.checkin_checkout'),
+    path('timerecords/current_status/', async_views.current_status, name='timerecord.current_status'),
+]
 
 urlpatterns = [
+    path('presence/stream/', async_views.presence_stream, name='presence-stream'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,23 +1,112 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from django.contrib.auth import authenticate, login, logout
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.db.models import Q
 from django.middleware.csrf import get_token
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.utils.decorators import method_decorator
-from datetime import date, timedelta, datetime
-import calendar
+from django.core.exceptions import ValidationError
+from django.http import FileResponse, HttpResponse
+import io
+from collections import defaultdict
+from datetime import MAXYEAR, MINYEAR, date, datetime
 import pytz
-from openpyxl import Workbook
-from django.http import HttpResponse
-from .models import Employee, TimeRecord, MonthlyReport
-from .serializers import EmployeeSerializer, TimeRecordSerializer, MonthlyReportSerializer
+from . import aggregates, analytics, attendance, authentication, conditional, corrections, excel, fast_serializers, jobs, metrics, punches, routing
+from . import stats as system_stats
+from .employees import get_current_employee
+from .models import Employee, TimeRecord, MonthlyReport, ReportJob
+from .pagination import EmployeePagination, TimeRecordPagination
+from .serializers import EmployeeSerializer, TimeRecordSerializer, MonthlyReportSerializer, ReportJobSerializer
+
+class CurrentEmployeeMixin:
+    """Resolve the requesting user's employee profile once per request.
+
+    Sets ``request.employee`` to the (cached) Employee with its user
+    joined in, or None for anonymous users and users without a profile.
+    """
+    
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        request.employee = get_current_employee(request.user)
+
+class ReportingReadsMixin:
+    """Serve the reads of report-style actions from the reporting database.
+
+    Safe requests to ``reporting_actions`` (every action when None) read
+    through ``routing.reporting_reads()``.
+    """
+    reporting_actions = None
+    
+    def dispatch(self, request, *args, **kwargs):
+        action_name = self.action_map.get(request.method.lower())
+        if request.method in SAFE_METHODS and (self.reporting_actions is None or action_name in self.reporting_actions):
+            with routing.reporting_reads():
+                return super().dispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+# Response bodies shared with the async views of the ASGI application
+
+EXEMPT_CHECKIN_DATA = {
+    'success': False,
+    'message': 'Admin users cannot check in/out. Use the Admin Dashboard to manage employee data.'
+}
+
+ADMIN_STATUS_DATA = {
+    'status': 'ADMIN',
+    'record': None,
+    'is_admin': True,
+    'message': 'Admin users do not track time. Access Admin Dashboard for system management.'
+}
+
+def auth_status_data(user, employee):
+    if not user.is_authenticated:
+        return {'authenticated': False}
+    if employee is None:
+        return {'authenticated': False, 'message': 'Employee profile not found'}
+    return {'authenticated': True, 'employee': EmployeeSerializer(employee).data}
+
+def checkin_data(action_taken, today_record, current_time):
+    # Format time for Vietnam timezone display
+    vietnam_tz = pytz.timezone('Asia/Ho_Chi_Minh')
+    vietnam_time = current_time.astimezone(vietnam_tz)
+    formatted_time = vietnam_time.strftime("%H:%M:%S")
+    
+    if action_taken == 'checked_in':
+        message = f'Checked in at {formatted_time}'
+    else:
+        message = f'Checked out at {formatted_time} - Worked {today_record.working_hours} hours'
+    
+    return {
+        'success': True,
+        'action': action_taken,
+        'message': message,
+        'record': TimeRecordSerializer(today_record).data
+    }
+
+def status_validators(employee, today_record, today):
+    return conditional.Validators(
+        int(today_record is not None), today_record and today_record.updated_at,
+        employee.employee_id, employee.full_name, today
+    )
+
+def status_data(employee, today_record):
+    if today_record is None:
+        return {'status': 'CHECKED_OUT', 'record': None, 'is_admin': False}
+    today_record.employee = employee
+    return {
+        'status': today_record.status,
+        'record': TimeRecordSerializer(today_record).data,
+        'is_admin': False
+    }
 
 @method_decorator(ensure_csrf_cookie, name='dispatch')
-class AuthViewSet(viewsets.ViewSet):
+class AuthViewSet(CurrentEmployeeMixin, viewsets.ViewSet):
     permission_classes = []
     
     @action(detail=False, methods=['get'])
@@ -33,19 +122,32 @@ class AuthViewSet(viewsets.ViewSet):
         user = authenticate(username=username, password=password)
         if user:
             login(request, user)
-            try:
-                employee = Employee.objects.get(user=user)
+            employee = get_current_employee(user)
+            if employee:
                 return Response({
                     'success': True,
                     'employee': EmployeeSerializer(employee).data
                 })
-            except Employee.DoesNotExist:
+            else:
                 return Response({'success': False, 'message': 'Employee profile not found'}, 
                               status=status.HTTP_404_NOT_FOUND)
         else:
             return Response({'success': False, 'message': 'Invalid credentials'}, 
                           status=status.HTTP_401_UNAUTHORIZED)
     
+    @action(detail=False, methods=['post'])
+    def token(self, request):
+        """Issue a signed token for kiosks and badge readers (``Authorization: Token <token>``)"""
+        user = authenticate(username=request.data.get('username'), password=request.data.get('password'))
+        if user is None:
+            return Response({'success': False, 'message': 'Invalid credentials'}, 
+                          status=status.HTTP_401_UNAUTHORIZED)
+        return Response({
+            'success': True,
+            'token': authentication.issue_token(user),
+            'expires_in': settings.TIMEKEEPING_TOKEN_MAX_AGE
+        })
+    
     @action(detail=False, methods=['post'])
     def logout(self, request):
         logout(request)
@@ -54,189 +156,170 @@ class AuthViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def status(self, request):
         """Check authentication status without requiring authentication"""
-        if request.user.is_authenticated:
-            try:
-                employee = Employee.objects.get(user=request.user)
-                return Response({
-                    'authenticated': True,
-                    'employee': EmployeeSerializer(employee).data
-                })
-            except Employee.DoesNotExist:
-                return Response({
-                    'authenticated': False,
-                    'message': 'Employee profile not found'
-                })
-        else:
-            return Response({'authenticated': False})
-        return Response({'success': True, 'message': 'Logged out successfully'})
+        return Response(auth_status_data(request.user, request.employee))
 
-class EmployeeViewSet(viewsets.ModelViewSet):
-    queryset = Employee.objects.all()
+class EmployeeViewSet(CurrentEmployeeMixin, viewsets.ModelViewSet):
+    queryset = Employee.objects.select_related('user')
     serializer_class = EmployeeSerializer
+    pagination_class = EmployeePagination
     
     @action(detail=False, methods=['get'])
     def current(self, request):
         if request.user.is_authenticated:
-            try:
-                employee = Employee.objects.get(user=request.user)
-                return Response(EmployeeSerializer(employee).data)
-            except Employee.DoesNotExist:
+            if request.employee:
+                return Response(EmployeeSerializer(request.employee).data)
+            else:
                 return Response({'message': 'Employee profile not found'}, 
                               status=status.HTTP_404_NOT_FOUND)
         return Response({'message': 'Not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
 
-class TimeRecordViewSet(viewsets.ModelViewSet):
+class TimeRecordViewSet(CurrentEmployeeMixin, ReportingReadsMixin, viewsets.ModelViewSet):
     queryset = TimeRecord.objects.all()
     serializer_class = TimeRecordSerializer
+    pagination_class = TimeRecordPagination
+    reporting_actions = {'monthly_records'}
     
     def get_queryset(self):
-        if self.request.user.is_authenticated:
-            try:
-                employee = Employee.objects.get(user=self.request.user)
-                return TimeRecord.objects.filter(employee=employee)
-            except Employee.DoesNotExist:
-                return TimeRecord.objects.none()
+        if self.request.employee:
+            return TimeRecord.objects.filter(employee=self.request.employee).select_related('employee')
         return TimeRecord.objects.none()
     
+    def list(self, request, *args, **kwargs):
+        rows = fast_serializers.time_record_values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.page_response(request, page)
+        return Response(fast_serializers.serialize_time_records(rows))
+    
+    def validator_context(self, request):
+        """What shapes a record listing besides the records themselves"""
+        employee = request.employee
+        return (employee and employee.employee_id, employee and employee.full_name, request.META.get('QUERY_STRING', ''))
+    
+    def page_response(self, request, page, closed=False):
+        """A page of ``time_record_values()`` rows, or a 304 if the client holds the same page.
+
+        Keyset pages only change with their own rows and links, so the
+        validators come from the fetched page and just the serializer is saved.
+        """
+        validators = conditional.Validators.for_rows(
+            page, *self.validator_context(request), self.paginator.get_next_link(), self.paginator.get_previous_link()
+        )
+        response = validators.not_modified(request)
+        if response is None:
+            response = self.get_paginated_response(fast_serializers.serialize_time_records(page))
+        return validators.apply(response, closed)
+    
     @action(detail=False, methods=['post'])
     def checkin_checkout(self, request):
-        """Smart check-in/checkout logic with forgotten checkout handling"""
-        try:
-            employee = Employee.objects.get(user=request.user)
-        except Employee.DoesNotExist:
+        """Check in or out for today"""
+        employee = request.employee
+        if employee is None:
             return Response({'message': 'Employee profile not found'}, 
                           status=status.HTTP_404_NOT_FOUND)
         
         # Prevent admin users from checking in/out
-        if employee.employee_id == 'ADMIN001' or employee.department == 'HR' and employee.position == 'System Administrator':
-            return Response({
-                'success': False,
-                'message': 'Admin users cannot check in/out. Use the Admin Dashboard to manage employee data.'
-            }, status=status.HTTP_403_FORBIDDEN)
+        if employee.is_time_tracking_exempt:
+            return Response(EXEMPT_CHECKIN_DATA, status=status.HTTP_403_FORBIDDEN)
         
-        today = timezone.now().date()
         current_time = timezone.now()
+        action_taken, today_record = attendance.toggle_attendance(employee, current_time)
         
-        # Check if there's a record for today
-        today_record, created = TimeRecord.objects.get_or_create(
-            employee=employee,
-            date=today,
-            defaults={'status': 'CHECKED_OUT'}
-        )
-        
-        # Check if employee forgot to checkout yesterday
-        yesterday = today - timedelta(days=1)
-        try:
-            yesterday_record = TimeRecord.objects.get(employee=employee, date=yesterday)
-            if yesterday_record.status == 'CHECKED_IN':
-                # Mark yesterday as forgot checkout
-                yesterday_record.status = 'FORGOT_CHECKOUT'
-                yesterday_record.forgot_checkout = True
-                yesterday_record.save()
-        except TimeRecord.DoesNotExist:
-            pass
-        
-        # Current action logic
-        if today_record.status == 'CHECKED_OUT':
-            # Check in
-            today_record.check_in_time = current_time
-            today_record.status = 'CHECKED_IN'
-            today_record.save()
-            
-            # Format time for Vietnam timezone display
-            vietnam_tz = pytz.timezone('Asia/Ho_Chi_Minh')
-            vietnam_time = current_time.astimezone(vietnam_tz)
-            formatted_time = vietnam_time.strftime("%H:%M:%S")
-            
-            return Response({
-                'success': True,
-                'action': 'checked_in',
-                'message': f'Checked in at {formatted_time}',
-                'record': TimeRecordSerializer(today_record).data
-            })
-        elif today_record.status == 'CHECKED_IN':
-            # Check out
-            today_record.check_out_time = current_time
-            today_record.status = 'CHECKED_OUT'
-            today_record.calculate_working_hours()
-            today_record.save()
-            
-            # Format time for Vietnam timezone display
-            vietnam_tz = pytz.timezone('Asia/Ho_Chi_Minh')
-            vietnam_time = current_time.astimezone(vietnam_tz)
-            formatted_time = vietnam_time.strftime("%H:%M:%S")
-            
-            return Response({
-                'success': True,
-                'action': 'checked_out',
-                'message': f'Checked out at {formatted_time} - Worked {today_record.working_hours} hours',
-                'record': TimeRecordSerializer(today_record).data
-            })
-        else:
+        if action_taken is None:
             return Response({
                 'success': False,
                 'message': 'Invalid status'
             }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(checkin_data(action_taken, today_record, current_time))
     
     @action(detail=False, methods=['get'])
     def current_status(self, request):
         """Get current check-in status"""
-        try:
-            employee = Employee.objects.get(user=request.user)
-        except Employee.DoesNotExist:
+        employee = request.employee
+        if employee is None:
             return Response({'message': 'Employee profile not found'}, 
                           status=status.HTTP_404_NOT_FOUND)
         
         # Return special status for admin users
-        if employee.employee_id == 'ADMIN001' or employee.department == 'HR' and employee.position == 'System Administrator':
-            return Response({
-                'status': 'ADMIN',
-                'record': None,
-                'is_admin': True,
-                'message': 'Admin users do not track time. Access Admin Dashboard for system management.'
-            })
+        if employee.is_time_tracking_exempt:
+            return Response(ADMIN_STATUS_DATA)
         
         today = timezone.now().date()
         try:
             today_record = TimeRecord.objects.get(employee=employee, date=today)
-            return Response({
-                'status': today_record.status,
-                'record': TimeRecordSerializer(today_record).data,
-                'is_admin': False
-            })
         except TimeRecord.DoesNotExist:
-            return Response({
-                'status': 'CHECKED_OUT',
-                'record': None,
-                'is_admin': False
-            })
+            today_record = None
+        
+        validators = status_validators(employee, today_record, today)
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return validators.apply(not_modified)
+        return validators.apply(Response(status_data(employee, today_record)))
     
     @action(detail=False, methods=['get'])
     def monthly_records(self, request):
         """Get monthly time records"""
-        try:
-            employee = Employee.objects.get(user=request.user)
-        except Employee.DoesNotExist:
+        employee = request.employee
+        if employee is None:
             return Response({'message': 'Employee profile not found'}, 
                           status=status.HTTP_404_NOT_FOUND)
         
-        year = int(request.query_params.get('year', timezone.now().year))
-        month = int(request.query_params.get('month', timezone.now().month))
+        year, month, error = month_params(request)
+        if error:
+            return error
+        
+        records = aggregates.month_records(year, month).filter(employee=employee).order_by('-date')
+        closed = conditional.month_closed(year, month)
         
-        records = TimeRecord.objects.filter(
-            employee=employee,
-            date__year=year,
-            date__month=month
-        ).order_by('-date')
+        # Paginated only on request; without ?cursor= or ?page_size= the whole month is returned as a list
+        if self.paginator.is_requested(request):
+            page = self.paginate_queryset(fast_serializers.time_record_values(records))
+            return self.page_response(request, page, closed)
         
-        return Response(TimeRecordSerializer(records, many=True).data)
+        # A revalidation costs one aggregate query instead of fetching and serializing the month
+        if conditional.has_conditions(request):
+            validators = conditional.Validators.for_records(records, *self.validator_context(request))
+            not_modified = validators.not_modified(request)
+            if not_modified is not None:
+                return validators.apply(not_modified, closed)
+        
+        rows = list(fast_serializers.time_record_values(records))
+        validators = conditional.Validators.for_rows(rows, *self.validator_context(request))
+        return validators.apply(Response(fast_serializers.serialize_time_records(rows)), closed)
+
+def month_params(request):
+    """The ?year= and ?month= parameters, defaulting to this month, as ``(year, month, error response)``"""
+    now = timezone.now()
+    try:
+        year = int(request.query_params.get('year', now.year))
+        month = int(request.query_params.get('month', now.month))
+    except ValueError:
+        year = month = None
+    if year is None or not MINYEAR <= year < MAXYEAR or not 1 <= month <= 12:
+        return None, None, Response({'message': 'Invalid year or month, expected a year and a month from 1 to 12'}, 
+                                    status=status.HTTP_400_BAD_REQUEST)
+    return year, month, None
 
-class AdminViewSet(viewsets.ViewSet):
+def department_param(request):
+    """The optional ?department= filter as ``(department, error response)``"""
+    department = request.query_params.get('department') or None
+    if department is not None and department not in dict(Employee.DEPARTMENTS):
+        return None, Response({'message': f'Unknown department "{department}"'}, 
+                              status=status.HTTP_400_BAD_REQUEST)
+    return department, None
+
+def is_admin(user):
+    """Check if user has admin privileges"""
+    return user.is_authenticated and (user.is_superuser or user.is_staff)
+
+class AdminViewSet(ReportingReadsMixin, viewsets.ViewSet):
     """Admin-only endpoints for system-wide data management"""
+    # comprehensive_excel queues a job, which must see the pending jobs on the primary
+    reporting_actions = {'all_employees', 'system_stats', 'all_employees_records', 'analytics', 'department_summary'}
     
     def _is_admin(self, user):
-        """Check if user has admin privileges"""
-        return user.is_authenticated and (user.is_superuser or user.is_staff)
+        return is_admin(user)
     
     @action(detail=False, methods=['get'])
     def all_employees(self, request):
@@ -245,7 +328,11 @@ class AdminViewSet(viewsets.ViewSet):
             return Response({'message': 'Admin access required'}, 
                           status=status.HTTP_403_FORBIDDEN)
         
-        employees = Employee.objects.filter(is_active=True)
+        department, error = department_param(request)
+        if error:
+            return error
+        
+        employees = aggregates.active_employees(department).select_related('user')
         return Response(EmployeeSerializer(employees, many=True).data)
     
     @action(detail=False, methods=['get'])
@@ -255,31 +342,14 @@ class AdminViewSet(viewsets.ViewSet):
             return Response({'message': 'Admin access required'}, 
                           status=status.HTTP_403_FORBIDDEN)
         
-        today = timezone.now().date()
-        
-        # Basic stats
-        total_employees = Employee.objects.filter(is_active=True).count()
-        checked_in_today = TimeRecord.objects.filter(
-            date=today,
-            status='CHECKED_IN'
-        ).count()
-        
-        # Monthly stats
-        current_month_records = TimeRecord.objects.filter(
-            date__year=today.year,
-            date__month=today.month
-        )
-        
-        total_working_hours_month = sum([r.working_hours for r in current_month_records])
-        forgotten_checkouts_month = current_month_records.filter(forgot_checkout=True).count()
+        department, error = department_param(request)
+        if error:
+            return error
         
+        stats, cache_hit = system_stats.get_system_stats(timezone.now().date(), department)
         return Response({
-            'total_employees': total_employees,
-            'checked_in_today': checked_in_today,
-            'checked_out_today': total_employees - checked_in_today,
-            'total_working_hours_this_month': round(total_working_hours_month, 2),
-            'forgotten_checkouts_this_month': forgotten_checkouts_month,
-            'month_year': f"{today.strftime('%B')} {today.year}"
+            **stats,
+            'cache': {'hit': cache_hit, **system_stats.cache_info()}
         })
     
     @action(detail=False, methods=['get'])
@@ -289,35 +359,31 @@ class AdminViewSet(viewsets.ViewSet):
             return Response({'message': 'Admin access required'}, 
                           status=status.HTTP_403_FORBIDDEN)
         
-        year = int(request.query_params.get('year', timezone.now().year))
-        month = int(request.query_params.get('month', timezone.now().month))
+        year, month, error = month_params(request)
+        if error:
+            return error
+        department, error = department_param(request)
+        if error:
+            return error
+        
+        month_records = aggregates.month_records(year, month).filter(employee__is_active=True)
+        if department:
+            month_records = month_records.filter(employee__department=department)
+        records = defaultdict(list)
+        rows = fast_serializers.time_record_values(month_records)
+        for record in fast_serializers.serialize_time_records(rows):
+            records[record['employee']].append(record)
         
         employees_data = []
-        employees = Employee.objects.filter(is_active=True)
-        
-        for employee in employees:
-            records = TimeRecord.objects.filter(
-                employee=employee,
-                date__year=year,
-                date__month=month
-            )
-            
-            total_working_days = records.filter(check_in_time__isnull=False).count()
-            total_working_hours = sum([r.working_hours for r in records])
-            days_forgot_checkout = records.filter(forgot_checkout=True).count()
-            
-            # Calculate days off (total days in month - working days)
-            days_in_month = calendar.monthrange(year, month)[1]
-            days_off = days_in_month - total_working_days
-            
+        for employee in aggregates.employee_month_stats(year, month, aggregates.active_employees(department)):
             employees_data.append({
                 'employee': EmployeeSerializer(employee).data,
                 'stats': {
-                    'total_working_days': total_working_days,
-                    'total_working_hours': round(total_working_hours, 2),
-                    'days_forgot_checkout': days_forgot_checkout,
-                    'days_off': days_off,
-                    'records': TimeRecordSerializer(records, many=True).data
+                    'total_working_days': employee.total_working_days,
+                    'total_working_hours': employee.total_working_hours,
+                    'days_forgot_checkout': employee.days_forgot_checkout,
+                    'days_off': employee.days_off,
+                    'records': records[employee.pk]
                 }
             })
         
@@ -327,155 +393,192 @@ class AdminViewSet(viewsets.ViewSet):
             'employees_data': employees_data
         })
     
+    @action(detail=False, methods=['get'])
+    def analytics(self, request):
+        """Monthly attendance series per department and employee over a date range - Admin only
+
+        ?start= and ?end= (YYYY-MM-DD) default to the last twelve months,
+        ?department= narrows to one department and ?employees=false leaves
+        out the per-employee series.
+        """
+        if not self._is_admin(request.user):
+            return Response({'message': 'Admin access required'}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        today = timezone.now().date()
+        try:
+            end = date.fromisoformat(request.query_params.get('end', today.isoformat()))
+            if 'start' in request.query_params:
+                start = date.fromisoformat(request.query_params['start'])
+            else:
+                # The twelve months ending with the month of ``end``
+                first = end.year * 12 + end.month - 12
+                start = date(first // 12, first % 12 + 1, 1)
+        except ValueError:
+            return Response({'message': 'Invalid date, expected YYYY-MM-DD'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        if start > end:
+            return Response({'message': 'start must not be after end'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        if (end.year - start.year) * 12 + end.month - start.month >= analytics.MAX_MONTHS:
+            return Response({'message': f'The range may span at most {analytics.MAX_MONTHS} months'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        department, error = department_param(request)
+        if error:
+            return error
+        
+        employees = aggregates.active_employees(department)
+        per_employee = request.query_params.get('employees', 'true').lower() not in ('false', '0')
+        return Response(analytics.attendance_analytics(start, end, employees, per_employee=per_employee))
+    
     @action(detail=False, methods=['get'])
     def comprehensive_excel(self, request):
-        """Generate comprehensive Excel report for all employees - Admin only"""
+        """Queue the comprehensive Excel report of all employees - Admin only"""
+        if not self._is_admin(request.user):
+            return Response({'message': 'Admin access required'}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        return submit_report(request, 'COMPREHENSIVE')
+    
+    @action(detail=False, methods=['get'])
+    def department_summary(self, request):
+        """Per-department headcount, check-ins and monthly totals - Admin only"""
+        if not self._is_admin(request.user):
+            return Response({'message': 'Admin access required'}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        year, month, error = month_params(request)
+        if error:
+            return error
+        department, error = department_param(request)
+        if error:
+            return error
+        
+        return Response({
+            'year': year,
+            'month': month,
+            'departments': aggregates.department_summary(year, month, timezone.now().date(), department)
+        })
+    
+    @action(detail=False, methods=['get'])
+    def metrics(self, request):
+        """Request metrics of this process in the Prometheus text format - Admin only"""
+        if not self._is_admin(request.user):
+            return Response({'message': 'Admin access required'}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        return HttpResponse(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+    
+    @action(detail=False, methods=['post'])
+    def import_punches(self, request):
+        """Import an uploaded badge reader punch file (CSV) - Admin only"""
+        if not self._is_admin(request.user):
+            return Response({'message': 'Admin access required'}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'message': 'Upload the punch file as "file"'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            lines = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+            result = punches.import_punches(lines)
+        except (UnicodeDecodeError, punches.PunchFileError) as e:
+            return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+    
+    @action(detail=False, methods=['post'])
+    def bulk_corrections(self, request):
+        """Correct check-in/out times of many records in one transaction - Admin only
+        
+        Body: ``{"corrections": [{"employee_id", "date", "check_in_time", "check_out_time"}, ...],
+        "close_open": {"date", "check_out_time"}}``, either part optional.
+        """
         if not self._is_admin(request.user):
             return Response({'message': 'Admin access required'}, 
                           status=status.HTTP_403_FORBIDDEN)
         
-        year = int(request.query_params.get('year', timezone.now().year))
-        month = int(request.query_params.get('month', timezone.now().month))
-        
-        # Create workbook with multiple sheets
-        wb = Workbook()
-        
-        # Summary Sheet
-        ws_summary = wb.active
-        ws_summary.title = "Summary"
-        
-        # Summary headers
-        summary_headers = [
-            'Employee ID', 'Full Name', 'Department', 'Position',
-            'Total Working Days', 'Total Working Hours', 'Days Forgot Checkout',
-            'Days Off', 'Average Hours/Day', 'Status'
-        ]
-        ws_summary.append(summary_headers)
-        
-        # Detailed Sheet
-        ws_detailed = wb.create_sheet("Detailed Records")
-        detailed_headers = [
-            'Employee ID', 'Full Name', 'Department', 'Date',
-            'Check In', 'Check Out', 'Working Hours', 'Status', 'Notes'
-        ]
-        ws_detailed.append(detailed_headers)
-        
-        # Get all employees and their data
-        employees = Employee.objects.filter(is_active=True)
-        
-        for employee in employees:
-            records = TimeRecord.objects.filter(
-                employee=employee,
-                date__year=year,
-                date__month=month
-            ).order_by('date')
-            
-            total_working_days = records.filter(check_in_time__isnull=False).count()
-            total_working_hours = sum([r.working_hours for r in records])
-            days_forgot_checkout = records.filter(forgot_checkout=True).count()
-            
-            # Calculate stats
-            days_in_month = calendar.monthrange(year, month)[1]
-            days_off = days_in_month - total_working_days
-            avg_hours_per_day = round(total_working_hours / total_working_days, 2) if total_working_days > 0 else 0
-            
-            # Employee status
-            status_text = "Active"
-            if days_forgot_checkout > 5:
-                status_text = "Needs Attention"
-            elif total_working_hours < 40:
-                status_text = "Low Hours"
-            
-            # Add to summary sheet
-            summary_row = [
-                employee.employee_id,
-                employee.full_name,
-                employee.get_department_display(),
-                employee.position,
-                total_working_days,
-                round(total_working_hours, 2),
-                days_forgot_checkout,
-                days_off,
-                avg_hours_per_day,
-                status_text
-            ]
-            ws_summary.append(summary_row)
-            
-            # Add detailed records
-            for record in records:
-                detailed_row = [
-                    employee.employee_id,
-                    employee.full_name,
-                    employee.get_department_display(),
-                    record.date.strftime('%Y-%m-%d'),
-                    record.check_in_time.strftime('%H:%M:%S') if record.check_in_time else 'N/A',
-                    record.check_out_time.strftime('%H:%M:%S') if record.check_out_time else 'N/A',
-                    record.working_hours,
-                    record.get_status_display(),
-                    'Forgot checkout' if record.forgot_checkout else ''
-                ]
-                ws_detailed.append(detailed_row)
-        
-        # Create response
-        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        response['Content-Disposition'] = f'attachment; filename="admin_comprehensive_report_{month}_{year}.xlsx"'
-        wb.save(response)
-        return response
+        if not isinstance(request.data, dict):
+            return Response({'message': 'Expected a JSON object'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        try:
+            result = corrections.apply_corrections(request.data.get('corrections', []), request.data.get('close_open'))
+        except corrections.CorrectionError as e:
+            return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_200_OK if result['applied'] else status.HTTP_400_BAD_REQUEST)
 
 class ReportViewSet(viewsets.ViewSet):
     
     @action(detail=False, methods=['get'])
     def monthly_excel(self, request):
-        """Generate monthly Excel report for all employees"""
-        year = int(request.query_params.get('year', timezone.now().year))
-        month = int(request.query_params.get('month', timezone.now().month))
-        
-        # Create workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = f"Report {month}-{year}"
-        
-        # Headers
-        headers = [
-            'Employee ID', 'Full Name', 'Department', 'Position',
-            'Total Working Days', 'Total Working Hours', 'Days Forgot Checkout',
-            'Days Off', 'Notes'
-        ]
-        ws.append(headers)
-        
-        # Get all employees
-        employees = Employee.objects.filter(is_active=True)
-        
-        for employee in employees:
-            records = TimeRecord.objects.filter(
-                employee=employee,
-                date__year=year,
-                date__month=month
-            )
-            
-            total_working_days = records.filter(check_in_time__isnull=False).count()
-            total_working_hours = sum([r.working_hours for r in records])
-            days_forgot_checkout = records.filter(forgot_checkout=True).count()
-            
-            # Calculate days off (total days in month - working days)
-            days_in_month = calendar.monthrange(year, month)[1]
-            days_off = days_in_month - total_working_days
-            
-            row = [
-                employee.employee_id,
-                employee.full_name,
-                employee.get_department_display(),
-                employee.position,
-                total_working_days,
-                round(total_working_hours, 2),
-                days_forgot_checkout,
-                days_off,
-                f"Report for {month}/{year}"
-            ]
-            ws.append(row)
-        
-        # Create response
-        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        response['Content-Disposition'] = f'attachment; filename="monthly_report_{month}_{year}.xlsx"'
-        wb.save(response)
-        return response
\ No newline at end of file
+        """Queue the monthly Excel report of all employees"""
+        return submit_report(request, 'MONTHLY')
+
+def submit_report(request, report_type):
+    """Queue a report from the ?year=, ?month= and ?department= parameters.
+
+    The workbook is built by the report worker, not in the request; the
+    response is the job to poll, as from ``POST /api/report-jobs/``.
+    """
+    year, month, error = month_params(request)
+    if error:
+        return error
+    department, error = department_param(request)
+    if error:
+        return error
+    
+    job, created = jobs.submit_report_job(report_type, year, month, department, user=request.user)
+    return report_job_response(request, job, created)
+
+def report_job_response(request, job, created):
+    data = ReportJobSerializer(job, context={'request': request}).data
+    data['merged'] = not created
+    return Response(data, status=status.HTTP_202_ACCEPTED, 
+                    headers={'Location': reverse('report-jobs-detail', kwargs={'pk': job.id}, request=request)})
+
+class ReportJobViewSet(viewsets.ViewSet):
+    """Queue Excel reports for background generation and download them when ready"""
+    
+    def _get_job(self, request, pk):
+        try:
+            job = ReportJob.objects.get(pk=pk)
+        except (ReportJob.DoesNotExist, ValidationError):
+            return None
+        if job.report_type == 'COMPREHENSIVE' and not is_admin(request.user):
+            return None
+        return job
+    
+    def create(self, request):
+        """Submit a report job, or join an identical one still waiting in the queue"""
+        serializer = ReportJobSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if serializer.validated_data['report_type'] == 'COMPREHENSIVE' and not is_admin(request.user):
+            return Response({'message': 'Admin access required'}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        job, created = jobs.submit_report_job(user=request.user, **serializer.validated_data)
+        return report_job_response(request, job, created)
+    
+    def retrieve(self, request, pk=None):
+        """Poll the status of a report job"""
+        job = self._get_job(request, pk)
+        if job is None:
+            return Response({'message': 'Report job not found'}, 
+                          status=status.HTTP_404_NOT_FOUND)
+        return Response(ReportJobSerializer(job, context={'request': request}).data)
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download the workbook of a finished report job"""
+        job = self._get_job(request, pk)
+        if job is None:
+            return Response({'message': 'Report job not found'}, 
+                          status=status.HTTP_404_NOT_FOUND)
+        if job.status != 'DONE':
+            return Response({'message': f'Report is not ready (status: {job.status})'}, 
+                          status=status.HTTP_409_CONFLICT)
+        
+        return FileResponse(job.file.open('rb'), as_attachment=True,
+                            filename=jobs.report_filename(job), content_type=excel.CONTENT_TYPE)
\ No newline at end of file
@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
 import { useAuth } from '@/context/AuthContext'
-import { api } from '@/services/api'
+import { api, fetchDepartmentSummary, fetchReport, subscribePresence, DepartmentSummary } from '@/services/api'
 import Layout from './Layout'
 
 interface SystemStats {
@@ -38,10 +38,12 @@ export default function AdminDashboard() {
   const [systemStats, setSystemStats] = useState<SystemStats | null>(null)
   const [allEmployees, setAllEmployees] = useState<Employee[]>([])
   const [employeesData, setEmployeesData] = useState<AllEmployeesData[]>([])
+  const [departments, setDepartments] = useState<DepartmentSummary[]>([])
   const [loading, setLoading] = useState(true)
   const [selectedMonth, setSelectedMonth] = useState(new Date().getMonth() + 1)
   const [selectedYear, setSelectedYear] = useState(new Date().getFullYear())
   const [downloading, setDownloading] = useState(false)
+  const [reportError, setReportError] = useState('')
 
   // Check if user is admin
   const isAdmin = user?.employee_id === 'ADMIN001' || user?.department === 'HR'
@@ -76,14 +78,21 @@ export default function AdminDashboard() {
     }
   }
 
+  const fetchDepartments = async () => {
+    try {
+      setDepartments(await fetchDepartmentSummary(selectedYear, selectedMonth))
+    } catch (error) {
+      console.error('Error fetching department summary:', error)
+    }
+  }
+
   const downloadComprehensiveReport = async () => {
     try {
       setDownloading(true)
-      const response = await api.get(`/admin/comprehensive_excel/?year=${selectedYear}&month=${selectedMonth}`, {
-        responseType: 'blob'
-      })
+      setReportError('')
+      const data = await fetchReport('COMPREHENSIVE', selectedYear, selectedMonth)
       
-      const blob = new Blob([response.data], { 
+      const blob = new Blob([data], { 
         type: 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' 
       })
       
@@ -95,16 +104,44 @@ export default function AdminDashboard() {
       window.URL.revokeObjectURL(url)
     } catch (error) {
       console.error('Error downloading comprehensive report:', error)
+      setReportError(error instanceof Error ? error.message : 'Report generation failed')
     } finally {
       setDownloading(false)
     }
   }
 
+  // Keep today's check-in counts live from the presence feed
+  useEffect(() => {
+    if (user && isAdmin) {
+      let departments: Record<string, number> = {}
+      const applyCheckedIn = () => {
+        const checkedIn = Object.values(departments).reduce((total, count) => total + count, 0)
+        setSystemStats(stats => stats && {
+          ...stats,
+          checked_in_today: checkedIn,
+          checked_out_today: stats.total_employees - checkedIn
+        })
+      }
+      const presence = subscribePresence(
+        (delta) => {
+          departments = { ...departments, [delta.department]: delta.checked_in }
+          applyCheckedIn()
+        },
+        (snapshot) => {
+          departments = snapshot.departments
+          applyCheckedIn()
+        }
+      )
+      return () => presence.close()
+    }
+  }, [user, isAdmin])
+
   useEffect(() => {
     if (user && isAdmin) {
       fetchSystemStats()
       fetchAllEmployees()
       fetchEmployeesRecords()
+      fetchDepartments()
     }
   }, [user, isAdmin, selectedMonth, selectedYear])
 
@@ -374,8 +411,108 @@ export default function AdminDashboard() {
               {downloading ? 'Generating...' : 'Download Comprehensive Report'}
             </button>
           </div>
+          {reportError && (
+            <div style={{
+              marginTop: '16px',
+              padding: '12px 16px',
+              borderRadius: '8px',
+              fontSize: '14px',
+              background: '#fee2e2',
+              color: '#991b1b',
+              border: '1px solid #fecaca'
+            }}>
+              {reportError}
+            </div>
+          )}
         </div>
 
+        {/* Department Summary Table */}
+        {departments.length > 0 && (
+          <div style={{
+            background: 'rgba(255, 255, 255, 0.95)',
+            borderRadius: '16px',
+            overflow: 'hidden',
+            marginBottom: '24px',
+            boxShadow: '0 4px 15px rgba(0, 0, 0, 0.1)',
+            backdropFilter: 'blur(10px)',
+            border: '1px solid rgba(255, 255, 255, 0.2)'
+          }}>
+            <div style={{
+              padding: '24px',
+              borderBottom: '1px solid #f3f4f6',
+              background: 'linear-gradient(135deg, #f8fafc 0%, #f1f5f9 100%)'
+            }}>
+              <h3 style={{
+                fontSize: '20px',
+                fontWeight: 'bold',
+                color: '#1f2937',
+                margin: 0
+              }}>
+                🏢 Departments - {months[selectedMonth - 1]} {selectedYear}
+              </h3>
+            </div>
+            <div style={{ overflowX: 'auto' }}>
+              <table style={{ width: '100%', borderCollapse: 'collapse' }}>
+                <thead style={{ background: '#f9fafb' }}>
+                  <tr>
+                    <th style={{ padding: '16px', textAlign: 'left', fontSize: '12px', fontWeight: '600', color: '#6b7280', textTransform: 'uppercase', letterSpacing: '0.5px' }}>
+                      DEPARTMENT
+                    </th>
+                    <th style={{ padding: '16px', textAlign: 'left', fontSize: '12px', fontWeight: '600', color: '#6b7280', textTransform: 'uppercase', letterSpacing: '0.5px' }}>
+                      HEADCOUNT
+                    </th>
+                    <th style={{ padding: '16px', textAlign: 'left', fontSize: '12px', fontWeight: '600', color: '#6b7280', textTransform: 'uppercase', letterSpacing: '0.5px' }}>
+                      CHECKED IN NOW
+                    </th>
+                    <th style={{ padding: '16px', textAlign: 'left', fontSize: '12px', fontWeight: '600', color: '#6b7280', textTransform: 'uppercase', letterSpacing: '0.5px' }}>
+                      WORKING DAYS
+                    </th>
+                    <th style={{ padding: '16px', textAlign: 'left', fontSize: '12px', fontWeight: '600', color: '#6b7280', textTransform: 'uppercase', letterSpacing: '0.5px' }}>
+                      TOTAL HOURS
+                    </th>
+                    <th style={{ padding: '16px', textAlign: 'left', fontSize: '12px', fontWeight: '600', color: '#6b7280', textTransform: 'uppercase', letterSpacing: '0.5px' }}>
+                      AVG HOURS/EMPLOYEE
+                    </th>
+                    <th style={{ padding: '16px', textAlign: 'left', fontSize: '12px', fontWeight: '600', color: '#6b7280', textTransform: 'uppercase', letterSpacing: '0.5px' }}>
+                      MISSED CHECKOUTS
+                    </th>
+                  </tr>
+                </thead>
+                <tbody>
+                  {departments.map((row, index) => (
+                    <tr key={row.department} style={{
+                      borderTop: '1px solid #f3f4f6',
+                      background: index % 2 === 0 ? 'white' : '#fafafa'
+                    }}>
+                      <td style={{ padding: '16px', fontSize: '14px', color: '#6b7280' }}>
+                        {row.department_name}
+                      </td>
+                      <td style={{ padding: '16px', fontSize: '14px', fontWeight: '600', color: '#1f2937' }}>
+                        {row.headcount}
+                      </td>
+                      <td style={{ padding: '16px', fontSize: '14px', fontWeight: '600', color: '#1f2937' }}>
+                        {row.checked_in_now}
+                      </td>
+                      <td style={{ padding: '16px', fontSize: '14px', fontWeight: '600', color: '#1f2937' }}>
+                        {row.total_working_days}
+                      </td>
+                      <td style={{ padding: '16px', fontSize: '14px', fontWeight: '600', color: '#1f2937' }}>
+                        {row.total_working_hours}h
+                      </td>
+                      <td style={{ padding: '16px', fontSize: '14px', fontWeight: '600', color: '#1f2937' }}>
+                        {row.average_hours_per_employee}h
+                      </td>
+                      <td style={{ padding: '16px', fontSize: '14px', fontWeight: '600', color: row.forgotten_checkouts > 0 ? '#dc2626' : '#6b7280' }}>
+                        {row.forgotten_checkouts}
+                      </td>
+                    </tr>
+                  ))}
+                </tbody>
+              </table>
+            </div>
+          </div>
+        )}
+
         {/* All Employees Table */}
         <div style={{
           background: 'rgba(255, 255, 255, 0.95)',
@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
 import { useAuth } from '@/context/AuthContext'
-import { api } from '@/services/api'
+import { api, subscribePresence } from '@/services/api'
 import Layout from './Layout'
 
 interface CurrentStatus {
@@ -47,9 +47,31 @@ export default function Dashboard() {
   useEffect(() => {
     if (user) {
       fetchCurrentStatus()
-      // Update status every 30 seconds
-      const statusInterval = setInterval(fetchCurrentStatus, 30000)
-      return () => clearInterval(statusInterval)
+      // Refresh only when the presence feed reports a change for this employee
+      const presence = subscribePresence((delta) => {
+        if (delta.employee_id === user.employee_id) {
+          fetchCurrentStatus()
+        }
+      })
+      // Poll every 30 seconds while the feed is down; EventSource gives up for good
+      // on a non-200 answer, such as the 501 of a server without ASGI
+      let statusInterval: ReturnType<typeof setInterval> | undefined
+      presence.onerror = () => {
+        if (!statusInterval) {
+          statusInterval = setInterval(fetchCurrentStatus, 30000)
+        }
+      }
+      presence.onopen = () => {
+        if (statusInterval) {
+          clearInterval(statusInterval)
+          statusInterval = undefined
+          fetchCurrentStatus()
+        }
+      }
+      return () => {
+        presence.close()
+        clearInterval(statusInterval)
+      }
     }
   }, [user])
 
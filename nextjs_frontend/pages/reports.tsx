@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
 import { useAuth } from '@/context/AuthContext'
-import { api } from '@/services/api'
+import { api, fetchReport } from '@/services/api'
 import Layout from '@/components/Layout'
 
 interface TimeRecord {
@@ -20,6 +20,7 @@ export default function Reports() {
   const [selectedMonth, setSelectedMonth] = useState(new Date().getMonth() + 1)
   const [selectedYear, setSelectedYear] = useState(new Date().getFullYear())
   const [downloading, setDownloading] = useState(false)
+  const [reportError, setReportError] = useState('')
 
   const fetchMonthlyRecords = async () => {
     try {
@@ -36,11 +37,10 @@ export default function Reports() {
   const downloadExcelReport = async () => {
     try {
       setDownloading(true)
-      const response = await api.get(`/reports/monthly_excel/?year=${selectedYear}&month=${selectedMonth}`, {
-        responseType: 'blob'
-      })
+      setReportError('')
+      const data = await fetchReport('MONTHLY', selectedYear, selectedMonth)
       
-      const blob = new Blob([response.data], { 
+      const blob = new Blob([data], { 
         type: 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' 
       })
       
@@ -52,6 +52,7 @@ export default function Reports() {
       window.URL.revokeObjectURL(url)
     } catch (error) {
       console.error('Error downloading report:', error)
+      setReportError(error instanceof Error ? error.message : 'Report generation failed')
     } finally {
       setDownloading(false)
     }
@@ -201,6 +202,19 @@ export default function Reports() {
               {downloading ? 'Downloading...' : 'Download Excel'}
             </button>
           </div>
+          {reportError && (
+            <div style={{
+              marginTop: '16px',
+              padding: '12px 16px',
+              borderRadius: '8px',
+              fontSize: '14px',
+              background: '#fee2e2',
+              color: '#991b1b',
+              border: '1px solid #fecaca'
+            }}>
+              {reportError}
+            </div>
+          )}
         </div>
 
         {/* Summary Cards */}
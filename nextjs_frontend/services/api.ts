@@ -53,4 +53,82 @@ api.interceptors.response.use(
     }
     return Promise.reject(error)
   }
-)
\ No newline at end of file
+)
+const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms))
+
+// How long to wait for the background worker before giving up on a report
+const REPORT_TIMEOUT_MS = 5 * 60 * 1000
+
+// Queue an Excel report, optionally of one department, wait for the background worker and return the file
+export const fetchReport = async (
+  reportType: 'MONTHLY' | 'COMPREHENSIVE', year: number, month: number, department?: string
+) => {
+  let { data: job } = await api.post('/report-jobs/', { report_type: reportType, year, month, department })
+  const deadline = Date.now() + REPORT_TIMEOUT_MS
+
+  while (job.status === 'PENDING' || job.status === 'RUNNING') {
+    if (Date.now() >= deadline) {
+      throw new Error(job.status === 'PENDING'
+        ? 'The report was not picked up by the report worker, please try again later'
+        : 'The report is taking too long, please try again later')
+    }
+    await sleep(1000)
+    job = (await api.get(`/report-jobs/${job.id}/`)).data
+  }
+
+  if (job.status !== 'DONE') {
+    // job.error holds the worker's traceback, which is no message for the user
+    console.error('Report job failed:', job.error)
+    throw new Error('Report generation failed, please try again')
+  }
+
+  const response = await api.get(`/report-jobs/${job.id}/download/`, { responseType: 'blob' })
+  return response.data as Blob
+}
+
+export interface PresenceSnapshot {
+  date: string
+  departments: Record<string, number>
+  employees: Record<string, string>
+}
+
+export interface PresenceDelta {
+  date: string
+  employee_id: string
+  department: string
+  status: string
+  checked_in: number
+}
+
+// Server-Sent Events feed of check-ins, pushed by the backend on every change
+export const subscribePresence = (
+  onDelta: (delta: PresenceDelta) => void,
+  onSnapshot?: (snapshot: PresenceSnapshot) => void
+) => {
+  const source = new EventSource(`${API_URL}/api/presence/stream/`, { withCredentials: true })
+  source.addEventListener('presence', (event) => onDelta(JSON.parse((event as MessageEvent).data)))
+  if (onSnapshot) {
+    source.addEventListener('snapshot', (event) => onSnapshot(JSON.parse((event as MessageEvent).data)))
+  }
+  return source
+}
+
+export interface DepartmentSummary {
+  department: string
+  department_name: string
+  headcount: number
+  checked_in_now: number
+  total_working_days: number
+  total_working_hours: number
+  forgotten_checkouts: number
+  average_hours_per_employee: number
+  average_hours_per_day: number
+}
+
+// Headcount and monthly totals per department, computed by the database in one grouped query
+export const fetchDepartmentSummary = async (year: number, month: number, department?: string) => {
+  const { data } = await api.get<{ year: number; month: number; departments: DepartmentSummary[] }>(
+    '/admin/department_summary/', { params: { year, month, department } }
+  )
+  return data.departments
+}